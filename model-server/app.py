@@ -1,25 +1,56 @@
-﻿import numpy as np
-from flask import Flask, render_template, Response, jsonify, request, send_from_directory
+﻿from flask import Flask, render_template, Response, g, jsonify, request
 from flask_cors import CORS
+import atexit
+import io
 import os
+import json
 import logging
 import time
-import re
-import subprocess
+import shlex
+import sys
 import threading
-from datetime import datetime, timedelta
+from datetime import datetime
 
-# Try to import cv2 and YOLO - use fallback if not available
+from startup import DISABLED, FAILED, LazyComponent, StartupProfiler
+
+# STARTUP_PROFILE=<path> (or '-' for stdout) writes import, load and first-request timings as JSON
+profiler = StartupProfiler(os.getenv('STARTUP_PROFILE'))
+profiler.time_import('cv2')
+
+from assets import AssetStore
+from compositor import SequenceCompositor
+from detectors import BACKEND_MODULES, backend_available, load_detector
+from events import SignEventBus, relay_event_stream, sign_event_stream
+from frame_capture import FrameHub, GifFrameSource
+from inference import InferenceEngine
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry as MetricsRegistry
+from motion import MotionGate
+from mjpeg import MjpegBroadcaster, PlaceholderFrames, multipart_chunk
+from owner_ipc import EventRelay, MjpegRelay, OwnerClient, is_internal_path, secret_matches
+from process_stats import ProcessStats
+from sessions import SessionRegistry, normalize_session_id
+from shm_ring import FrameRing
+from smoothing import TemporalSmoother
+from ratelimit import RateLimiter, SharedRateLimiter, parse_rate
+from speech import SpeechDispatcher
+from sign_matcher import MatchCache, PhraseMatcher, map_texts, merge_cache_stats
+from signs import NO_SIGN_GIF, SignRegistry
+from variants import VariantCache
+
+# 'ultralytics' runs model/best.pt through PyTorch; 'onnx' / 'openvino' run an exported copy on the CPU
+DETECTOR_BACKEND = os.getenv('DETECTOR_BACKEND', 'ultralytics').lower()
+
+# Try to import cv2 and check for the detector runtime - use fallback if not available
 try:
     import cv2
-    from ultralytics import YOLO
+    if not backend_available(DETECTOR_BACKEND):
+        raise ImportError(f"runtime for detector backend '{DETECTOR_BACKEND}' is not installed")
     CAMERA_AVAILABLE = True
-    print("✅ OpenCV and YOLO loaded successfully")
+    print(f"✅ OpenCV loaded, detector backend: {DETECTOR_BACKEND}")
 except ImportError as e:
-    print(f"⚠️ OpenCV/YOLO not available: {e}")
+    print(f"⚠️ OpenCV/detector not available: {e}")
     print("🔄 Running in GIF-only mode")
     cv2 = None
-    YOLO = None
     CAMERA_AVAILABLE = False
 
 # Set up logging
@@ -34,62 +65,167 @@ CORS(app, origins=cors_origins)
 
 # Configuration
 AVATARS_DIR = os.path.join(os.path.dirname(__file__), 'avatars')
+AVATARS_ZIP = os.path.join(os.path.dirname(__file__), 'avatars.zip')
+# 'dir' serves AVATARS_DIR, 'zip' serves avatars.zip (falling back to AVATARS_DIR for missing files)
+AVATAR_SOURCE = os.getenv('AVATAR_SOURCE', 'dir').lower()
+AVATAR_CACHE_MAX_AGE = int(os.getenv('AVATAR_CACHE_MAX_AGE', 31536000))
+# How often every process checks the avatars dir/zip and signs.json for changes (0 = never)
+SIGN_RELOAD_INTERVAL = float(os.getenv('SIGN_RELOAD_INTERVAL', 5))
+# Smaller avatar encodings picked per request from Accept and ?size= (webp, webm, mp4, apng; '' = GIF only)
+AVATAR_VARIANTS = [f.strip().lower() for f in os.getenv('AVATAR_VARIANTS', 'webp,webm,mp4').split(',') if f.strip()]
+AVATAR_VARIANT_WIDTHS = [w.strip() for w in os.getenv('AVATAR_VARIANT_WIDTHS', '320,160').split(',') if w.strip()]
+AVATAR_VARIANT_QUALITY = int(os.getenv('AVATAR_VARIANT_QUALITY', 80))
+AVATAR_VARIANT_CACHE = os.getenv('AVATAR_VARIANT_CACHE',
+                                 os.path.join(os.path.dirname(os.path.abspath(__file__)), '.avatar-cache'))
+# 'webcam' probes real devices, 'fake' loops over the avatar GIFs (no hardware needed),
+# 'none' disables camera and detection (GIF-only mode)
+CAMERA_SOURCE = os.getenv('CAMERA_SOURCE', 'webcam').lower()
+if CAMERA_SOURCE == 'none' and CAMERA_AVAILABLE:
+    print("🔄 Camera disabled (CAMERA_SOURCE=none) - running in GIF-only mode")
+    CAMERA_AVAILABLE = False
+# 'standalone' does everything in one process; under serve.py one 'owner' process holds the
+# camera, detector, speech and session state and 'worker' processes serve the stateless routes
+SERVER_ROLE = os.getenv('SERVER_ROLE', 'standalone').lower()
+OWNER_ADDRESS = os.getenv('OWNER_ADDRESS', '127.0.0.1:5001')
+OWNER_TIMEOUT = float(os.getenv('OWNER_TIMEOUT', 30))
+# Shared by the owner and its workers (generated per deployment by serve.py); the owner rejects requests without it
+OWNER_SECRET = os.getenv('OWNER_SECRET', '')
+# Directory shared by the owner and workers for the rate-limit table and stats snapshots (set by serve.py)
+SHARED_STATE_DIR = os.getenv('SHARED_STATE_DIR', '')
+if SERVER_ROLE == 'worker':
+    # Workers never touch the camera or the model; the owner process does
+    CAMERA_AVAILABLE = False
+FAKE_CAMERA_FPS = float(os.getenv('FAKE_CAMERA_FPS', 30))
+# With no camera, device probing backs off from 1 s up to this many seconds between attempts
+CAMERA_RETRY_MAX = float(os.getenv('CAMERA_RETRY_MAX', 30))
+# Name of a shared-memory ring that mirrors camera frames for detector / encoder processes ('' = off)
+FRAME_RING_NAME = os.getenv('FRAME_RING_NAME', '')
+FRAME_RING_SLOTS = int(os.getenv('FRAME_RING_SLOTS', 4))
+STREAM_FPS = float(os.getenv('STREAM_FPS', 15))
+STREAM_JPEG_QUALITY = int(os.getenv('STREAM_JPEG_QUALITY', 80))
+PLACEHOLDER_FPS = float(os.getenv('PLACEHOLDER_FPS', 2))
+# Frame size of /api/text-to-sign/stream; every avatar is letterboxed to it once, when first decoded
+SEQUENCE_STREAM_SIZE = tuple(int(v) for v in os.getenv('SEQUENCE_STREAM_SIZE', '426x240').lower().split('x'))
+INFERENCE_MAX_BATCH = int(os.getenv('INFERENCE_MAX_BATCH', 8))
+INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', 20))
+# Weights for the detector backend (defaults: model/best.pt, model/best.onnx, model/best_openvino_model)
+MODEL_PATH = os.getenv('MODEL_PATH') or None
+DETECTOR_THREADS = int(os.getenv('DETECTOR_THREADS', 0))
+# Motion-gated detection rate: DETECT_MAX_FPS while the scene changes, DETECT_MIN_FPS when idle
+MOTION_GATING = os.getenv('MOTION_GATING', '1').lower() not in ('0', 'false', 'no')
+DETECT_MIN_FPS = float(os.getenv('DETECT_MIN_FPS', 1))
+DETECT_MAX_FPS = float(os.getenv('DETECT_MAX_FPS', 10))
+MOTION_THRESHOLD = float(os.getenv('MOTION_THRESHOLD', 0.5))
+# Temporal smoothing of detections; SMOOTHING_WINDOW=0 commits every single-frame detection
+SMOOTHING_WINDOW = int(os.getenv('SMOOTHING_WINDOW', 8))
+# Window length in seconds, so it does not stretch when the motion gate slows detection; 0 counts SMOOTHING_WINDOW frames
+SMOOTHING_SECONDS = float(os.getenv('SMOOTHING_SECONDS', 0.8))
+SMOOTHING_ENTER = float(os.getenv('SMOOTHING_ENTER', 0.5))
+SMOOTHING_EXIT = float(os.getenv('SMOOTHING_EXIT', 0.25))
+SESSION_IDLE_TIMEOUT = float(os.getenv('SESSION_IDLE_TIMEOUT', 3600))
+MAX_SESSIONS = int(os.getenv('MAX_SESSIONS', 1000))
+# Meeting session that the local camera's detections belong to
+CAMERA_SESSION_ID = normalize_session_id(os.getenv('CAMERA_SESSION_ID', 'default'))
+# Sequence timing: 'gif' uses each GIF's real playback length, 'fixed' uses sign_duration
+SIGN_TIMING = os.getenv('SIGN_TIMING', 'gif').lower()
+MAX_BATCH_TEXTS = int(os.getenv('MAX_BATCH_TEXTS', 10000))
+TEXT_CACHE_SIZE = int(os.getenv('TEXT_CACHE_SIZE', 4096))
+EVENT_HISTORY = int(os.getenv('EVENT_HISTORY', 1024))
+# 1: load the detector, speech worker and camera in the background right after startup;
+# 0: load each one on first use (AI participant activation, /video_feed, first speech)
+PRELOAD_COMPONENTS = os.getenv('PRELOAD_COMPONENTS', '1').lower() not in ('0', 'false', 'no')
+# TTS worker: SPEECH_COMMAND overrides the whole command, otherwise SPEECH_PYTHON runs SPEECH_WORKER
+SPEECH_PYTHON = os.getenv('SPEECH_PYTHON', sys.executable)
+SPEECH_WORKER = os.getenv('SPEECH_WORKER', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'speak_worker.py'))
+SPEECH_COMMAND = os.getenv('SPEECH_COMMAND')
+SPEECH_QUEUE_SIZE = int(os.getenv('SPEECH_QUEUE_SIZE', 8))
+SPEECH_WRITE_TIMEOUT = float(os.getenv('SPEECH_WRITE_TIMEOUT', 5))
+# Seconds the worker may take to speak one utterance before it is restarted
+SPEECH_TIMEOUT = float(os.getenv('SPEECH_TIMEOUT', 30))
+# Seconds before the same text may be spoken again in a session
+SPEECH_REPEAT_WINDOW = float(os.getenv('SPEECH_REPEAT_WINDOW', 4))
+# Per-client limit for /api/text-to-sign(/batch) as "requests/seconds", e.g. "60/60"; empty disables it
+TEXT_TO_SIGN_RATE_LIMIT = os.getenv('TEXT_TO_SIGN_RATE_LIMIT', '')
+RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', 10000))
+# Longest the startup profile waits for the first request and for components to finish loading
+STARTUP_PROFILE_TIMEOUT = float(os.getenv('STARTUP_PROFILE_TIMEOUT', 120))
+
+# Every avatar GIF is loaded into memory once and served with ETag / Range support
+asset_store = AssetStore(max_age=AVATAR_CACHE_MAX_AGE)
+
+# The sign vocabulary (GIFs + avatars/signs.json) behind every route, the matcher and speech
+sign_registry = SignRegistry(asset_store, AVATARS_DIR, AVATARS_ZIP, prefer_zip=AVATAR_SOURCE == 'zip')
+
+# Text -> sign matching rules; compiled once into a single-pass matcher behind an LRU cache
+sign_cache = MatchCache(PhraseMatcher({}, []), maxsize=TEXT_CACHE_SIZE)
+
+@sign_registry.on_reload
+def reload_sign_mapping(vocabulary):
+    """Rebuild the matcher for a newly loaded vocabulary; cached results are invalidated.
+
+    This is the only place the matcher changes. It runs on every successful
+    SignRegistry.load(): the startup load, the SIGN_RELOAD_INTERVAL watcher
+    and POST /api/signs/reload (in serve.py workers, when the owner's
+    'signs-reloaded' event arrives).
+    """
+    matcher = PhraseMatcher(vocabulary.phrase_mapping, vocabulary.semantic_keywords)
+    sign_cache.set_matcher(matcher)
+    logger.info(f"🔁 Sign mapping reloaded: {len(matcher.mapping)} phrases")
+    return matcher
 
-# Available sign language words mapping to GIF files
-SIGN_MAPPING = {
-    'hello': 'hello.gif',
-    'hi': 'hello.gif',
-    'hey': 'hello.gif',
-    'good morning': 'goodmorning.gif',
-    'morning': 'goodmorning.gif',
-    'how are you': 'howareyou.gif',
-    'how': 'howareyou.gif',
-    'thanks': 'thanks.gif',
-    'thank you': 'thanks.gif',
-    'thank': 'thanks.gif',
-    'yes': 'yes.gif',
-    'okay': 'yes.gif',
-    'sure': 'yes.gif',
-    'no': 'no.gif',
-    'nope': 'no.gif',
-    'help': 'helpme.gif',
-    'help me': 'helpme.gif',
-    'i love you': 'iloveyou.gif',
-    'love': 'iloveyou.gif',
-    'more': 'more.gif',
-    'repeat': 'repeat.gif',
-    'again': 'repeat.gif',
-    'none': 'none.gif'
-}
-
-# Initialize model and speech process only if available
+def load_avatars():
+    vocabulary = sign_registry.load()
+    logger.info(f"🖼️ Loaded {len(asset_store)} avatar GIFs ({asset_store.total_bytes() // 1024} KB) "
+                f"and {len(vocabulary)} signs from {AVATAR_SOURCE}")
+    if vocabulary.missing:
+        logger.warning(f"⚠️ signs.json refers to missing GIFs: {', '.join(vocabulary.missing)}")
+    if SERVER_ROLE != 'worker':
+        # Workers don't poll; the owner tells them to reload through their event relay
+        sign_registry.watch(SIGN_RELOAD_INTERVAL)
+    return asset_store
+
+# Avatars are small and needed by the first request, so they load synchronously
+avatars_component = LazyComponent('avatars', load_avatars).start(block=True)
+
+# Transcoded avatars live in a content-addressed cache dir shared by every process
+avatar_variants = VariantCache(AVATAR_VARIANT_CACHE, AVATAR_VARIANTS, AVATAR_VARIANT_WIDTHS,
+                               quality=AVATAR_VARIANT_QUALITY)
+
+def build_avatar_variants():
+    count = avatar_variants.build(asset_store.get(name) for name in asset_store.names())
+    stats = avatar_variants.stats()
+    logger.info(f"🗜️ {count} avatar variants ready ({stats['transcoded']} transcoded, {stats['reused']} cached)")
+    if stats['unsupported']:
+        logger.warning(f"⚠️ No encoder for avatar variants: {', '.join(stats['unsupported'])}")
+    return avatar_variants
+
+# Built in the background (or on the first GIF request); GIFs are served as-is until then
+variants_component = LazyComponent('avatar_variants', build_avatar_variants,
+                                   enabled=bool(AVATAR_VARIANTS or AVATAR_VARIANT_WIDTHS))
+
+def rebuild_avatar_variants(vocabulary):
+    if variants_component.ready:
+        threading.Thread(target=build_avatar_variants, name='avatar-variants', daemon=True).start()
+
+sign_registry.on_reload(rebuild_avatar_variants)
+
+# Model and speech worker are loaded in the background (see start_background_init)
 model = None
 labels = {}
-speech_process = None
 
-if CAMERA_AVAILABLE:
-    try:
-        model = YOLO("model/best.pt")
-        labels = model.names
-        print("✅ YOLO model loaded successfully")
-    except Exception as e:
-        print(f"⚠️ Could not load YOLO model: {e}")
-        model = None
-
-    # Initialize speech process
-    try:
-        speech_process = subprocess.Popen(
-            ["sign_lang_env\\Scripts\\python.exe", "speak_worker.py"],
-            stdin=subprocess.PIPE,
-            text=True
-        )
-        print("✅ Speech process initialized")
-    except Exception as e:
-        print(f"⚠️ Could not initialize speech process: {e}")
-        speech_process = None
+# Utterances go through a bounded queue to a supervised worker, so TTS never blocks detection
+speech = SpeechDispatcher(shlex.split(SPEECH_COMMAND) if SPEECH_COMMAND else [SPEECH_PYTHON, SPEECH_WORKER],
+                          max_queue=SPEECH_QUEUE_SIZE, write_timeout=SPEECH_WRITE_TIMEOUT,
+                          speak_timeout=SPEECH_TIMEOUT,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+speech_component = LazyComponent('speech', speech.start, enabled=CAMERA_AVAILABLE)
 
 # Camera initialization
 def init_camera():
+    if CAMERA_SOURCE == 'fake':
+        print(f"🎞️ Using fake camera from {AVATARS_DIR}")
+        return GifFrameSource(AVATARS_DIR, fps=FAKE_CAMERA_FPS)
+
     if not CAMERA_AVAILABLE or cv2 is None:
         print("⚠️ Camera not available - OpenCV not loaded")
         return None
@@ -109,191 +245,472 @@ def init_camera():
     print("❌ Cannot open webcam. Please check your camera connection.")
     return None
 
-cap = init_camera()
+# Hot-path latency histograms, exported with everything else at /metrics
+metrics = MetricsRegistry()
+capture_seconds = metrics.histogram('cosign_frame_capture_seconds', 'Time to grab one frame from the camera')
+predict_seconds = metrics.histogram('cosign_model_predict_seconds', 'Duration of one detector predict() call (one micro-batch)')
+encode_seconds = metrics.histogram('cosign_jpeg_encode_seconds', 'Time to JPEG-encode one /video_feed frame')
+request_seconds = metrics.histogram('cosign_http_request_duration_seconds',
+                                    'Request latency by route (time to first byte for streaming routes)',
+                                    labelnames=('method', 'route', 'status'))
+detections_total = metrics.counter('cosign_detections_total', 'Sign detections applied to a session')
+
+# Other processes attach to the ring by name and read frames without copying them
+def create_frame_ring(frame):
+    """Called with the first captured frame, so the ring fits whatever resolution the camera delivers"""
+    try:
+        ring = FrameRing(FRAME_RING_NAME, shape=frame.shape, dtype=frame.dtype, slots=FRAME_RING_SLOTS,
+                         create=True)
+    except Exception as e:
+        print(f"⚠️ Could not create frame ring '{FRAME_RING_NAME}': {e}")
+        return None
+    atexit.register(ring.close)
+    print(f"✅ Frame ring '{ring.name}' created ({FRAME_RING_SLOTS} slots of {frame.shape})")
+    return ring
+
+# A single capture thread owns the device; detection and video clients read from its buffer
+frame_hub = FrameHub(init_camera, capture_histogram=capture_seconds, max_reconnect_delay=CAMERA_RETRY_MAX,
+                     ring_factory=create_frame_ring if FRAME_RING_NAME and CAMERA_AVAILABLE else None)
+
+def ensure_camera_started():
+    """Start the capture thread (device probing happens on that thread)"""
+    if CAMERA_AVAILABLE:
+        frame_hub.start()
+
+def camera_readiness():
+    error = None
+    if not CAMERA_AVAILABLE:
+        state = DISABLED
+    else:
+        state = {'connected': 'ready', 'stopped': 'pending'}.get(frame_hub.state, frame_hub.state)
+        if state == 'no_camera':
+            error = (f"No camera after {frame_hub.open_failures} attempts; "
+                     f"retrying every {frame_hub.retry_delay:g}s")
+    open_seconds = frame_hub.open_seconds
+    return {
+        'state': state,
+        'load_seconds': round(open_seconds, 3) if open_seconds is not None else None,
+        'error': error,
+    }
+
+# Frames are encoded once and the same JPEG bytes are shared by every /video_feed viewer
+mjpeg_broadcaster = MjpegBroadcaster(frame_hub, target_fps=STREAM_FPS, jpeg_quality=STREAM_JPEG_QUALITY,
+                                     encode_histogram=encode_seconds)
+# "No camera" / "disconnected" / "frame error" frames are rendered once and served at a low rate
+placeholder_frames = PlaceholderFrames(fps=PLACEHOLDER_FPS)
+
+# Sign sequences are played back to back in one MJPEG stream from decoded, cached avatar frames
+sequence_compositor = SequenceCompositor(asset_store, size=SEQUENCE_STREAM_SIZE, jpeg_quality=STREAM_JPEG_QUALITY)
+sign_registry.on_reload(lambda vocabulary: sequence_compositor.prune())
+
+# Per-meeting state (current sign, detection, participant/camera flags) lives in sessions
+sessions = SessionRegistry(idle_timeout=SESSION_IDLE_TIMEOUT, max_sessions=MAX_SESSIONS,
+                           pinned=[CAMERA_SESSION_ID])
+
+# Sign changes are pushed to /api/events subscribers instead of being polled
+sign_events = SignEventBus(history=EVENT_HISTORY)
+
+# Worker processes forward every route except these to the owner process
+WORKER_LOCAL_ENDPOINTS = {'get_sign_gif', 'text_to_sign', 'text_to_sign_batch', 'text_to_sign_stream',
+                          'text_to_sign_cache_stats', 'available_signs', 'sign_event_feed', 'video_feed',
+                          'prometheus_metrics', 'static'}
+owner_client = (OwnerClient(OWNER_ADDRESS, timeout=OWNER_TIMEOUT, secret=OWNER_SECRET)
+                if SERVER_ROLE == 'worker' else None)
+
+# Workers serve /api/events and /video_feed themselves from one relayed owner stream each,
+# so streaming clients never hold owner threads
+def on_owner_control(event):
+    if event.get('type') == 'signs-reloaded' and sign_registry.reload_if_changed():
+        logger.info(f"🔁 Signs reloaded after the owner did (version {sign_registry.vocabulary.version})")
+
+event_relay = (EventRelay(owner_client, sign_events, on_control=on_owner_control).start()
+               if owner_client is not None else None)
+
+if SERVER_ROLE == 'owner':
+    # Session-less event on the bus: every worker's relay sees it and reloads its own copy
+    sign_registry.on_reload(lambda vocabulary: sign_events.publish(None, {
+        'type': 'signs-reloaded', 'version': vocabulary.version, 'timestamp': time.time()}))
+video_relay = MjpegRelay(owner_client) if owner_client is not None else None
+
+if owner_client is not None:
+    @app.before_request
+    def forward_to_owner():
+        # Unknown URLs and the owner's /internal/ routes stay here, or workers would proxy them to the owner
+        if request.endpoint is None or is_internal_path(request.path):
+            return jsonify({'success': False, 'error': 'Not found'}), 404
+        if request.endpoint not in WORKER_LOCAL_ENDPOINTS:
+            return owner_client.forward(request)
+
+if SERVER_ROLE == 'owner':
+    if not OWNER_SECRET:
+        logger.warning("⚠️ OWNER_SECRET is not set: the owner accepts requests from anyone who can reach it")
+
+    @app.before_request
+    def require_owner_secret():
+        if OWNER_SECRET and not secret_matches(request.headers, OWNER_SECRET):
+            return jsonify({'success': False, 'error': 'Forbidden'}), 403
+
+# Repeated speech is suppressed per session; old entries expire instead of piling up
+speech_limiter = RateLimiter(limit=1, window=SPEECH_REPEAT_WINDOW, max_keys=RATE_LIMIT_MAX_KEYS)
+text_to_sign_limit, text_to_sign_window = parse_rate(TEXT_TO_SIGN_RATE_LIMIT)
+text_to_sign_limiter = None
+if text_to_sign_limit > 0 and SHARED_STATE_DIR:
+    # Under serve.py every process counts in one shared table, so the limit is per client, not per worker
+    text_to_sign_limiter = SharedRateLimiter(os.path.join(SHARED_STATE_DIR, 'text-to-sign.ratelimit'),
+                                             text_to_sign_limit, text_to_sign_window,
+                                             max_keys=RATE_LIMIT_MAX_KEYS)
+elif text_to_sign_limit > 0:
+    text_to_sign_limiter = RateLimiter(text_to_sign_limit, text_to_sign_window, max_keys=RATE_LIMIT_MAX_KEYS)
+
+# Every serve.py process publishes its stats, so any of them can report deployment-wide totals
+process_stats = ProcessStats(SHARED_STATE_DIR) if SHARED_STATE_DIR else None
+if process_stats is not None:
+    process_stats.register('sign_cache', sign_cache.stats)
+    process_stats.start()
 
 # Global variables
-detected_label = "Detecting..."
-detected_gif = "none.gif"
-lock = threading.Lock()
-camera_active = False  # Start with camera inactive
-ai_participant_active = False  # Track if AI participant is in meeting
-last_spoken = {}
-current_sign = 'none'
-sign_start_time = time.time()
 sign_duration = 4.0
+# GIF ETag -> playback seconds; emptied on reload so replaced avatars don't pile up
+gif_durations = {}
+sign_registry.on_reload(lambda vocabulary: gif_durations.clear())
 
 detect_thread = None
 
-def speak(text):
-    """Handle text-to-speech with rate limiting"""
-    if not speech_process:
+def speak(text, session_id=None):
+    """Queue text-to-speech with rate limiting; never blocks on the TTS worker"""
+    if speech_component.state == DISABLED:
         return
-        
-    now = datetime.now()
-    if text.lower() not in last_spoken or (now - last_spoken[text.lower()]) > timedelta(seconds=4):
-        try:
-            speech_process.stdin.write(text + "\n")
-            speech_process.stdin.flush()
-            last_spoken[text.lower()] = now
-            print(f"🔊 Spoke: {text}")
-        except Exception as e:
-            print(f"[Speak Error] {e}")
+    if not speech_component.ready:
+        # Spawn the worker on first use; this utterance waits in the queue until it is up
+        speech_component.start()
+
+    if speech_limiter.allow(text.lower(), scope=session_id):
+        speech.say(text)
+
+def throttle_text_to_sign():
+    """429 response if this client exceeded TEXT_TO_SIGN_RATE_LIMIT, else None"""
+    if text_to_sign_limiter is None:
+        return None
+    client = request.remote_addr or 'unknown'
+    if text_to_sign_limiter.allow(client, scope='text-to-sign'):
+        return None
+    retry_after = text_to_sign_limiter.retry_after(client, scope='text-to-sign')
+    response = jsonify({'success': False, 'error': 'Too many requests', 'retry_after': round(retry_after, 1)})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response
 
 def text_to_sign_mapping(text):
     """Enhanced text to sign mapping with better phrase matching"""
-    if not text:
-        return 'none.gif'
-    
-    text = text.lower().strip()
-    logger.info(f"🔤 Processing: '{text}'")
-    
-    # Direct mapping
-    if text in SIGN_MAPPING:
-        result = SIGN_MAPPING[text]
-        logger.info(f"✅ Direct match: {text} -> {result}")
-        return result
-    
-    # Word matches
-    words = text.split()
-    for word in words:
-        if word in SIGN_MAPPING:
-            result = SIGN_MAPPING[word]
-            logger.info(f"✅ Word match: {word} -> {result}")
-            return result
-    
-    # Semantic matches
-    if any(w in text for w in ['hello', 'hi', 'hey']):
-        return 'hello.gif'
-    elif any(w in text for w in ['how', 'what']):
-        return 'howareyou.gif'  
-    elif any(w in text for w in ['thank', 'thanks']):
-        return 'thanks.gif'
-    elif any(w in text for w in ['yes', 'okay', 'sure']):
-        return 'yes.gif'
-    elif any(w in text for w in ['no', 'nope']):
-        return 'no.gif'
-    elif any(w in text for w in ['help', 'assist']):
-        return 'helpme.gif'
-    elif any(w in text for w in ['love', 'care']):
-        return 'iloveyou.gif'
-    elif any(w in text for w in ['more', 'continue']):
-        return 'more.gif'
-    elif any(w in text for w in ['repeat', 'again']):
-        return 'repeat.gif'
-    
-    logger.info(f"❌ No match for: '{text}', using none.gif")
-    return 'none.gif'
+    result = sign_cache.match(text)
+    logger.debug("🔤 %r -> %s", text, result)
+    return result
+
+def sign_gif_url(sign_name):
+    """Avatar URL versioned by the content hash of the GIF it serves, so browsers may cache it for good"""
+    asset = asset_store.get(sign_registry.vocabulary.gif_for(sign_name)) or asset_store.get(NO_SIGN_GIF)
+    if asset is None:
+        return f'/api/get-sign-gif/{sign_name}'
+    return f'/api/get-sign-gif/{sign_name}?v={asset.etag}'
+
+def get_gif_duration(gif_filename):
+    """Playback length of a sign GIF in seconds, read from the loaded avatar and cached per content"""
+    if SIGN_TIMING != 'gif':
+        return sign_duration
+    asset = asset_store.get(gif_filename)
+    if asset is None:
+        # Already reported as missing when the vocabulary was loaded
+        return sign_duration
+    duration = gif_durations.get(asset.etag)
+    if duration is None:
+        duration = sign_duration
+        try:
+            from PIL import Image
+            with Image.open(io.BytesIO(asset.data)) as gif:
+                total_ms = 0
+                for index in range(getattr(gif, 'n_frames', 1)):
+                    gif.seek(index)
+                    # Browsers treat a missing/zero frame delay as 100ms
+                    total_ms += gif.info.get('duration') or 100
+            duration = total_ms / 1000.0
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read GIF duration for {gif_filename}: {e}")
+        gif_durations[asset.etag] = duration
+    return duration
+
+def iter_sign_sequence(text):
+    """Yield the ordered signs for a whole utterance, with start offsets and durations"""
+    offset = 0.0
+    for index, (phrase, gif_filename) in enumerate(sign_cache.matcher.iter_sequence(text)):
+        sign_name = gif_filename.replace('.gif', '')
+        duration = get_gif_duration(gif_filename)
+        yield {
+            'index': index,
+            'phrase': phrase,
+            'sign': sign_name,
+            'gif': gif_filename,
+            'gif_url': sign_gif_url(sign_name),
+            'start': round(offset, 3),
+            'duration': round(duration, 3)
+        }
+        offset += duration
+
+def sign_sequence_response(session, text, stream_format=None):
+    """Translate text into a sign sequence, streamed as NDJSON/SSE or returned as JSON"""
+    accept = request.headers.get('Accept', '')
+    stream_format = (stream_format or '').lower()
+    if not stream_format:
+        if 'text/event-stream' in accept:
+            stream_format = 'sse'
+        elif 'application/x-ndjson' in accept:
+            stream_format = 'ndjson'
+
+    def generate():
+        count = 0
+        total = 0.0
+        for item in iter_sign_sequence(text):
+            if count == 0:
+                # The client starts playing the first sign as soon as it arrives
+                set_session_sign(session, item['sign'], 'text')
+            count += 1
+            total = item['start'] + item['duration']
+            yield 'sign', item
+        yield 'done', {
+            'done': True,
+            'session_id': session.session_id,
+            'text': text,
+            'count': count,
+            'total_duration': round(total, 3)
+        }
+
+    if stream_format == 'sse':
+        def sse():
+            for event, payload in generate():
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        return Response(sse(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    if stream_format == 'ndjson':
+        def ndjson():
+            for _, payload in generate():
+                yield json.dumps(payload) + '\n'
+        return Response(ndjson(), mimetype='application/x-ndjson',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    signs = []
+    summary = {}
+    for event, payload in generate():
+        if event == 'sign':
+            signs.append(payload)
+        else:
+            summary = payload
+    return jsonify({
+        'success': True,
+        'session_id': session.session_id,
+        'text': text,
+        'signs': signs,
+        'count': summary.get('count', 0),
+        'total_duration': summary.get('total_duration', 0.0),
+        'timestamp': time.time()
+    })
+
+def sign_snapshot(session):
+    """Current sign state of a session, as pushed to event stream clients"""
+    return {
+        'session_id': session.session_id,
+        'sign': session.current_sign,
+        'label': session.detected_label,
+        'gif_url': sign_gif_url(session.current_sign),
+        'ai_participant_active': session.ai_participant_active,
+        'camera_active': session.camera_active,
+        'timestamp': time.time()
+    }
+
+def set_session_sign(session, sign, source, label=None):
+    """Update a session's sign and notify /api/events listeners if it changed"""
+    if owner_client is not None:
+        # Session state lives in the owner process
+        try:
+            owner_client.set_session_sign(session.session_id, sign, source, label)
+        except Exception as e:
+            logger.error(f"❌ Could not update sign on owner: {e}")
+        return
+    if session.set_sign(sign, label):
+        sign_events.publish(session.session_id, {
+            'sign': sign,
+            'label': session.detected_label,
+            'gif_url': sign_gif_url(sign),
+            'source': source,
+            'timestamp': time.time()
+        })
+
+def request_session_id():
+    """Session id of the current request.
+
+    The id is taken from the X-Session-Id header, a session_id query
+    parameter or a session_id field in the JSON body, in that order.
+    """
+    session_id = request.headers.get('X-Session-Id') or request.args.get('session_id')
+    if not session_id and request.is_json:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            session_id = data.get('session_id')
+    return normalize_session_id(session_id)
+
+def get_session():
+    """Resolve the meeting session for the current request"""
+    return sessions.get(request_session_id())
+
+def on_sign_detected(state, label, confidence):
+    """Apply a detection from the inference engine and trigger speech"""
+    session = sessions.get(state.stream_id)
+
+    sign = sign_registry.vocabulary.for_label(label)
+    # Named after the GIF stem, as text-to-sign names it ('helpme', not the manifest name 'help')
+    sign_name = os.path.splitext(sign.gif)[0] if sign is not None else label.lower()
+    spoken_text = sign.speech if sign is not None else label
+
+    # Update current_sign to drive GIF display
+    set_session_sign(session, sign_name, 'detection', label=label)
+    detections_total.inc()
+    print(f"🎭 Detected sign [{session.session_id}]: {label} -> {sign.gif if sign is not None else 'none.gif'}")
+
+    speak(spoken_text, session.session_id)
+
+# One engine batches frames from every registered stream into a single predict() call
+inference_engine = None
+
+def load_sign_detector():
+    """Load the detector and build the inference engine around it (runs in the background)"""
+    global model, labels, inference_engine
+    # Import the runtime separately so the startup profile can tell import from weight loading
+    for module_name in BACKEND_MODULES.get(DETECTOR_BACKEND, ()):
+        profiler.time_import(module_name)
+    with profiler.phase('model_load'):
+        detector = load_detector(DETECTOR_BACKEND, MODEL_PATH, threads=DETECTOR_THREADS)
+    detector_labels = detector.names
+    unmapped = sign_registry.vocabulary.unmapped_labels(detector_labels.values())
+    if unmapped:
+        logger.warning(f"⚠️ Detector classes without a sign in signs.json: {', '.join(unmapped)}")
+    smoother_factory = None
+    if SMOOTHING_WINDOW > 0 and detector_labels:
+        num_classes = max(detector_labels) + 1
+        smoother_factory = lambda: TemporalSmoother(num_classes, window=SMOOTHING_WINDOW,
+                                                    enter_threshold=SMOOTHING_ENTER,
+                                                    exit_threshold=SMOOTHING_EXIT,
+                                                    window_seconds=SMOOTHING_SECONDS or None)
+    engine = InferenceEngine(detector, detector_labels,
+                             max_batch_size=INFERENCE_MAX_BATCH,
+                             max_wait=INFERENCE_MAX_WAIT_MS / 1000.0,
+                             smoother_factory=smoother_factory,
+                             predict_histogram=predict_seconds)
+    engine.register_stream(CAMERA_SESSION_ID, on_result=on_sign_detected)
+    labels = detector_labels
+    inference_engine = engine
+    model = detector
+    print(f"✅ Sign detector loaded ({detector.backend}, {len(detector_labels)} classes)")
+    return detector
+
+detector_component = LazyComponent('detector', load_sign_detector, enabled=CAMERA_AVAILABLE)
+
+# Skips inference on the local camera while nothing in the frame moves
+motion_gate = MotionGate(DETECT_MIN_FPS, DETECT_MAX_FPS, MOTION_THRESHOLD) if MOTION_GATING else None
 
 def detect_loop():
-    """Camera detection loop that detects signs and triggers speech"""
-    global detected_label, camera_active, current_sign, sign_start_time
-    
-    if not CAMERA_AVAILABLE or cap is None or model is None:
+    """Feed camera frames to the inference engine while the AI participant is active"""
+    if not CAMERA_AVAILABLE:
         print("⚠️ Detection loop disabled - camera/model not available")
         return
-        
+
+    # The detector may still be loading in the background
+    while detector_component.wait(timeout=1.0) is None:
+        if detector_component.state in (FAILED, DISABLED):
+            print("⚠️ Detection loop disabled - camera/model not available")
+            return
+
+    inference_engine.start()
+    camera_session = sessions.get(CAMERA_SESSION_ID)
+    last_seq = 0
     while True:
         try:
             # Only run detection if AI participant is active
-            if not ai_participant_active or not camera_active:
+            if not camera_session.ai_participant_active or not camera_session.camera_active:
                 time.sleep(1)
                 continue
 
-            success, frame = cap.read()
-            if not success:
-                print("⚠️ Frame grab failed, reconnecting...")
-                camera_active = False
-                reconnect_camera()
-                time.sleep(1)
+            last_seq, frame = frame_hub.wait_for_frame(last_seq, timeout=1.0)
+            if frame is None:
+                # Capture thread handles reconnects; just wait for the next frame
                 continue
 
-            results = model.predict(source=frame, stream=False, verbose=False)
-
-            if results and results[0].boxes:
-                label_index = int(results[0].boxes.cls[0])
-                confidence = float(results[0].boxes.conf[0])
-
-                if confidence > 0.5:
-                    label = labels[label_index]
-                    
-                    # Enhanced speech mapping
-                    speech_map = {
-                        "iloveyou": "I love you",
-                        "thanks": "Thank you",
-                        "hello": "Hello, how are you?",
-                        "yes": "Yes I can",
-                        "no": "No I can't",
-                        "help": "Help me",
-                        "helpme": "Help me",
-                        "repeat": "Please repeat again",
-                        "more": "More please",
-                        "howareyou": "How are you?",
-                        "goodmorning": "Good morning"
-                    }
-                    speech = speech_map.get(label.lower(), label)
-
-                    with lock:
-                        detected_label = label
-                        # Update current_sign to drive GIF display
-                        current_sign = label.lower()
-                        sign_start_time = time.time()
-                        print(f"🎭 Detected sign: {label} -> {current_sign}.gif")
-                    
-                    speak(speech)
-
-            time.sleep(0.1)
+            if motion_gate is not None:
+                # The gate paces inference, so look at every captured frame
+                if not motion_gate.should_infer(frame):
+                    continue
+                inference_engine.submit(CAMERA_SESSION_ID, frame)
+            else:
+                # Non-blocking: results come back through on_sign_detected
+                inference_engine.submit(CAMERA_SESSION_ID, frame)
+                time.sleep(1.0 / DETECT_MAX_FPS if DETECT_MAX_FPS > 0 else 0.1)
 
         except Exception as e:
             print(f"[Detect Error] {e}")
             time.sleep(1)
 
 def reconnect_camera():
-    """Reconnect camera if connection is lost"""
-    global cap, camera_active
+    """Ask the capture thread to reopen the camera"""
     if not CAMERA_AVAILABLE:
         return
-        
-    try:
-        if cap:
-            cap.release()
-        cap = init_camera()
-        camera_active = cap is not None
-        if camera_active:
-            print("✅ Camera reconnected")
-        else:
-            print("❌ Camera reconnection failed")
-    except Exception as e:
-        print(f"❌ Camera reconnection failed: {e}")
-        camera_active = False
+    frame_hub.reconnect()
 
-def start_detection_thread():
-    global detect_thread, camera_active
+def start_detection_thread(session):
+    global detect_thread
+    session.camera_active = True
+    ensure_camera_started()
+    detector_component.start()
     if detect_thread is None or not detect_thread.is_alive():
-        camera_active = True
         detect_thread = threading.Thread(target=detect_loop, daemon=True)
         detect_thread.start()
         logger.info("🤖 AI Participant activated - Camera detection started")
     else:
         logger.info("🤖 Detection thread already running")
 
-def stop_detection_thread():
-    global camera_active
-    camera_active = False
+def stop_detection_thread(session):
+    session.camera_active = False
     logger.info("🤖 AI Participant deactivated - Camera detection stopped")
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     try:
-        gifs = [f for f in os.listdir(AVATARS_DIR) if f.endswith('.gif')]
+        session = get_session()
+        gifs = asset_store.names()
+        components = {
+            'avatars': avatars_component.to_dict(),
+            'detector': detector_component.to_dict(),
+            'speech': speech_component.to_dict(),
+            'avatar_variants': variants_component.to_dict(),
+            'camera': camera_readiness(),
+        }
         return jsonify({
             'status': 'healthy',
+            # GIF and text-to-sign routes work as soon as the avatars are loaded
+            'ready': avatars_component.ready,
+            'components': components,
             'message': 'Enhanced Flask server with speech running',
             'available_gifs': len(gifs),
             'gifs': gifs,
-            'current_sign': current_sign,
+            'current_sign': session.current_sign,
+            'session_id': session.session_id,
+            'active_sessions': len(sessions),
             'model_loaded': model is not None,
-            'camera_active': camera_active,
-            'speech_available': speech_process is not None,
+            'detector_backend': DETECTOR_BACKEND,
+            'camera_active': session.camera_active,
+            'speech_available': speech_component.ready and speech.alive,
+            'speech': speech.stats(),
+            'frame_ring': frame_hub.ring.stats() if frame_hub.ring is not None else None,
+            'signs': sign_registry.stats(),
+            'avatar_variants': avatar_variants.stats(),
+            'sequence_compositor': sequence_compositor.stats(),
             'server_time': datetime.now().isoformat()
         })
     except Exception as e:
@@ -302,38 +719,36 @@ def health_check():
 @app.route('/api/get-sign-gif/<sign_name>', methods=['GET'])
 def get_sign_gif(sign_name):
     try:
-        # Map sign names to available GIFs
-        available_gifs = {
-            'hello': 'hello.gif',
-            'thanks': 'thanks.gif', 
-            'thank_you': 'thanks.gif',
-            'yes': 'yes.gif',
-            'no': 'no.gif',
-            'help': 'helpme.gif',
-            'help_me': 'helpme.gif',
-            'repeat': 'repeat.gif',
-            'more': 'more.gif',
-            'i_love_you': 'iloveyou.gif',
-            'iloveyou': 'iloveyou.gif',
-            'how_are_you': 'howareyou.gif',
-            'howareyou': 'howareyou.gif',
-            'good_morning': 'goodmorning.gif',
-            'goodmorning': 'goodmorning.gif',
-            'none': 'none.gif'
-        }
-        
-        gif_filename = available_gifs.get(sign_name.lower(), 'none.gif')
-        
-        logger.info(f"🎬 Serving: {gif_filename}")
-        return send_from_directory(AVATARS_DIR, gif_filename, mimetype='image/gif')
+        gif_filename = sign_registry.vocabulary.gif_for(sign_name)
+        asset = asset_store.get(gif_filename) or asset_store.get(NO_SIGN_GIF)
+        if asset is None:
+            return jsonify({'error': f'GIF not found: {gif_filename}'}), 404
+        # Only a URL carrying this content's version (see sign_gif_url) may be cached as immutable
+        versioned = request.args.get('v') == asset.etag
+
+        # Smallest encoding this client accepts at the requested width (?size=, ?format= forces one)
+        variants = variants_component.start().get()
+        if variants is not None and variants.covers(asset):
+            asset = variants.select(asset, request.headers.get('Accept'),
+                                    request.args.get('size', type=int), request.args.get('format'))
+        elif variants_component.state != DISABLED:
+            # Variants of this GIF are not built yet: clients must not keep the fallback GIF
+            versioned = False
+
+        logger.debug("🎬 Serving: %s (%s)", asset.name, asset.content_type)
+        response = asset_store.response(asset, request, versioned=versioned)
+        response.vary.add('Accept')
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/text-to-sign', methods=['POST'])
 def text_to_sign():
-    global current_sign, sign_start_time
-    
+    throttled = throttle_text_to_sign()
+    if throttled is not None:
+        return throttled
     try:
+        session = get_session()
         data = request.get_json()
         text = data.get('text', '').strip()
         
@@ -341,20 +756,24 @@ def text_to_sign():
             return jsonify({'error': 'No text provided'}), 400
         
         logger.info(f"🎯 TEXT-TO-SIGN: '{text}'")
+
+        # mode=sequence returns every sign in the utterance instead of just the first
+        if data.get('mode') == 'sequence':
+            return sign_sequence_response(session, text, data.get('stream'))
         
         gif_filename = text_to_sign_mapping(text)
         sign_name = gif_filename.replace('.gif', '')
         
-        current_sign = sign_name
-        sign_start_time = time.time()
+        set_session_sign(session, sign_name, 'text')
         
         response = {
             'success': True,
+            'session_id': session.session_id,
             'text': text,
             'sign': sign_name,
             'gif': gif_filename,
             'gif_filename': gif_filename,
-            'gif_url': f'/api/get-sign-gif/{sign_name}',
+            'gif_url': sign_gif_url(sign_name),
             'timestamp': time.time()
         }
         
@@ -365,41 +784,158 @@ def text_to_sign():
         logger.error(f"❌ Error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/text-to-sign/batch', methods=['POST'])
+def text_to_sign_batch():
+    """Map an array of texts (e.g. a whole transcript) to signs in one call"""
+    throttled = throttle_text_to_sign()
+    if throttled is not None:
+        return throttled
+    try:
+        data = request.get_json(silent=True) or {}
+        texts = data.get('texts')
+        if not isinstance(texts, list):
+            return jsonify({'success': False, 'error': "'texts' must be an array of strings"}), 400
+        if len(texts) > MAX_BATCH_TEXTS:
+            return jsonify({'success': False, 'error': f'At most {MAX_BATCH_TEXTS} texts per batch'}), 413
+
+        texts = [t if isinstance(t, str) else '' for t in texts]
+        gifs = map_texts(texts, sign_cache)
+        results = []
+        for text, gif_filename in zip(texts, gifs):
+            sign_name = gif_filename.replace('.gif', '')
+            results.append({
+                'text': text,
+                'sign': sign_name,
+                'gif': gif_filename,
+                'gif_url': sign_gif_url(sign_name)
+            })
+
+        logger.info(f"🎯 TEXT-TO-SIGN BATCH: {len(results)} texts")
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'results': results,
+            'timestamp': time.time()
+        })
+
+    except Exception as e:
+        logger.error(f"❌ Error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/text-to-sign/stream', methods=['GET'])
+def text_to_sign_stream():
+    """The signs for ?text= played back to back as one MJPEG stream (usable as an <img> src)"""
+    throttled = throttle_text_to_sign()
+    if throttled is not None:
+        return throttled
+    text = request.args.get('text', '').strip()
+    if not text:
+        return jsonify({'success': False, 'error': 'No text provided'}), 400
+
+    logger.info(f"🎞️ TEXT-TO-SIGN STREAM: '{text}'")
+    matcher = sign_cache.matcher
+
+    def sequence():
+        # Matched lazily, so the first sign starts playing before the rest of the text is scanned
+        found = False
+        for _, gif_filename in matcher.iter_sequence(text):
+            found = True
+            yield gif_filename
+        if not found:
+            yield NO_SIGN_GIF
+
+    return Response(sequence_compositor.stream(sequence()),
+                    mimetype='multipart/x-mixed-replace; boundary=frame',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/text-to-sign/cache-stats', methods=['GET'])
+def text_to_sign_cache_stats():
+    """Hit/miss/eviction counters of the text-to-sign LRU cache (summed over all serve.py processes)"""
+    if process_stats is None:
+        return jsonify({'success': True, **sign_cache.stats()})
+    return jsonify({'success': True, **merge_cache_stats(process_stats.collect('sign_cache'))})
+
+@app.route('/api/rate-limits', methods=['GET'])
+def rate_limit_stats():
+    """Passed/suppressed counters of the speech and text-to-sign rate limiters"""
+    return jsonify({
+        'success': True,
+        'speech': speech_limiter.stats(),
+        'text_to_sign': text_to_sign_limiter.stats() if text_to_sign_limiter is not None else None
+    })
+
 @app.route('/api/current-sign', methods=['GET'])
 def get_current_sign():
+    session = get_session()
+    current_sign = session.current_sign
     return jsonify({
+        'session_id': session.session_id,
         'sign': current_sign,
-        'gif_filename': f'{current_sign}.gif',
-        'gif_url': f'/api/get-sign-gif/{current_sign}'
+        'gif_filename': sign_registry.vocabulary.gif_for(current_sign),
+        'gif_url': sign_gif_url(current_sign)
     })
 
+@app.route('/api/events', methods=['GET'])
+def sign_event_feed():
+    """Server-Sent Events stream of sign changes for one session.
+
+    Reconnecting clients send Last-Event-ID (browsers do this automatically)
+    or ?last_event_id= to resume without missing changes.
+    """
+    session_id = request_session_id()
+    if owner_client is not None:
+        # Sessions live in the owner; events come from this worker's mirror of its bus
+        snapshot = lambda: owner_client.session_snapshot(session_id)
+    else:
+        session_id = sessions.get(session_id).session_id
+        snapshot = lambda: sign_snapshot(sessions.get(session_id))
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_version = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_version = None
+
+    stream = sign_event_stream(sign_events, session_id, snapshot, last_version=last_version)
+    return Response(stream, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/ai-participant/activate', methods=['POST'])
 def activate_ai_participant():
-    global ai_participant_active
     try:
-        ai_participant_active = True
-        start_detection_thread()
+        session = get_session()
+        if session.session_id != CAMERA_SESSION_ID:
+            # There is one local camera and detect_loop feeds it to this session only
+            return jsonify({
+                'success': False,
+                'error': f"The camera belongs to session '{CAMERA_SESSION_ID}'; detection cannot run for this session",
+                'session_id': session.session_id,
+                'camera_session_id': CAMERA_SESSION_ID
+            }), 409
+        session.ai_participant_active = True
+        start_detection_thread(session)
         return jsonify({
             'success': True,
             'message': 'AI participant activated',
-            'ai_participant_active': ai_participant_active,
-            'camera_active': camera_active
+            'session_id': session.session_id,
+            'ai_participant_active': session.ai_participant_active,
+            'camera_active': session.camera_active
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/ai-participant/deactivate', methods=['POST'])
 def deactivate_ai_participant():
-    global ai_participant_active, current_sign
     try:
-        ai_participant_active = False
-        stop_detection_thread()
-        current_sign = 'none'  # Reset to none when deactivated
+        session = get_session()
+        session.ai_participant_active = False
+        stop_detection_thread(session)
+        set_session_sign(session, 'none', 'deactivate')  # Reset to none when deactivated
         return jsonify({
             'success': True,
             'message': 'AI participant deactivated',
-            'ai_participant_active': ai_participant_active,
-            'camera_active': camera_active
+            'session_id': session.session_id,
+            'ai_participant_active': session.ai_participant_active,
+            'camera_active': session.camera_active
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -407,36 +943,111 @@ def deactivate_ai_participant():
 @app.route('/api/ai-participant/status', methods=['GET'])
 def get_ai_participant_status():
     """Get current AI participant and camera status"""
+    session = get_session()
     return jsonify({
-        'ai_participant_active': ai_participant_active,
-        'camera_active': camera_active,
-        'current_sign': current_sign,
+        'session_id': session.session_id,
+        'ai_participant_active': session.ai_participant_active,
+        'camera_active': session.camera_active,
+        'current_sign': session.current_sign,
         'camera_available': CAMERA_AVAILABLE,
+        'camera_session_id': CAMERA_SESSION_ID,
         'model_loaded': model is not None
     })
 
+@app.route('/api/sessions', methods=['GET'])
+def list_sessions():
+    """Active meeting sessions hosted by this process"""
+    return jsonify({
+        'success': True,
+        'sessions': [s.to_dict() for s in sessions.sessions()],
+        **sessions.stats()
+    })
+
+@app.route('/api/inference/stats', methods=['GET'])
+def inference_stats():
+    """Per-stream and aggregate inference FPS for capacity planning"""
+    if inference_engine is None:
+        return jsonify({'success': False, 'error': 'Model not loaded'}), 503
+    return jsonify({
+        'success': True,
+        **inference_engine.stats(),
+        'motion_gate': motion_gate.stats() if motion_gate is not None else None
+    })
+
+# Counters and gauges the server already keeps are read at scrape time, not per frame
+metrics.callback('cosign_frames_captured_total', 'Frames read from the camera',
+                 lambda: frame_hub.frames_captured, 'counter')
+metrics.callback('cosign_frame_grab_failures_total', 'Failed camera reads',
+                 lambda: frame_hub.grab_failures, 'counter')
+metrics.callback('cosign_camera_open_failures', 'Consecutive failed camera probes (0 while a camera is open)',
+                 lambda: frame_hub.open_failures)
+metrics.callback('cosign_camera_reconnects_total', 'Times the camera was reopened after being lost',
+                 lambda: frame_hub.reconnects, 'counter')
+metrics.callback('cosign_frames_skipped_total', 'Camera frames the motion gate kept from the detector',
+                 lambda: motion_gate.frames_skipped if motion_gate is not None else None, 'counter')
+metrics.callback('cosign_frames_inferred_total', 'Frames run through the detector',
+                 lambda: inference_engine.fps.total if inference_engine is not None else None, 'counter')
+metrics.callback('cosign_speech_total', 'Utterances by outcome',
+                 lambda: {(outcome,): speech.stats()[outcome] for outcome in ('spoken', 'dropped', 'failed')},
+                 'counter', labelnames=('outcome',))
+metrics.callback('cosign_speech_suppressed_total', 'Utterances suppressed by SPEECH_REPEAT_WINDOW',
+                 lambda: speech_limiter.suppressed, 'counter')
+def stream_clients():
+    clients = {('events',): sign_events.subscribers, ('sequence',): sequence_compositor.active_streams}
+    # The owner's video clients are the workers' relays; the workers count the real viewers
+    if SERVER_ROLE != 'owner':
+        clients[('video',)] = (video_relay or mjpeg_broadcaster).subscriber_count
+    return clients
+
+metrics.callback('cosign_stream_clients', 'Connected streaming clients', stream_clients, labelnames=('stream',))
+metrics.callback('cosign_active_sessions', 'Meeting sessions',
+                 lambda: len(sessions) if owner_client is None else None)
+
+if process_stats is not None:
+    process_stats.register('metrics', metrics.snapshot)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def observe_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Label by URL rule, not path, so /get-sign-gif/<name> stays one series
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        request_seconds.labels(request.method, route, response.status_code).observe(time.perf_counter() - started)
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus text-format metrics, summed over every serve.py process"""
+    if process_stats is None:
+        return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+    # Other processes' samples are at most one publish interval (5 s) old
+    return Response(metrics.render(process_stats.others('metrics')), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api/available-signs')
 def available_signs():
     """Get list of all available sign language animations"""
-    signs = [
-        {'name': 'hello', 'display': 'Hello', 'gif': 'hello.gif'},
-        {'name': 'thanks', 'display': 'Thank You', 'gif': 'thanks.gif'},
-        {'name': 'yes', 'display': 'Yes', 'gif': 'yes.gif'},
-        {'name': 'no', 'display': 'No', 'gif': 'no.gif'},
-        {'name': 'help', 'display': 'Help Me', 'gif': 'helpme.gif'},
-        {'name': 'repeat', 'display': 'Repeat', 'gif': 'repeat.gif'},
-        {'name': 'more', 'display': 'More', 'gif': 'more.gif'},
-        {'name': 'iloveyou', 'display': 'I Love You', 'gif': 'iloveyou.gif'},
-        {'name': 'howareyou', 'display': 'How Are You', 'gif': 'howareyou.gif'},
-        {'name': 'goodmorning', 'display': 'Good Morning', 'gif': 'goodmorning.gif'}
-    ]
-    
+    vocabulary = sign_registry.vocabulary
     return jsonify({
         'success': True,
-        'signs': signs,
-        'total': len(signs)
+        'signs': vocabulary.public_signs,
+        'total': len(vocabulary.public_signs),
+        'version': vocabulary.version
     })
 
+@app.route('/api/signs/reload', methods=['POST'])
+def reload_signs():
+    """Re-read the avatars and signs.json now instead of waiting for SIGN_RELOAD_INTERVAL"""
+    try:
+        sign_registry.load()
+    except Exception as e:
+        logger.error(f"❌ Sign reload failed: {e}")
+        return jsonify({'success': False, 'error': str(e), **sign_registry.stats()}), 400
+    return jsonify({'success': True, **sign_registry.stats()})
+
 # Routes for the web interface (from backup)
 @app.route('/')
 def index():
@@ -447,66 +1058,148 @@ def index():
             'message': 'Co-Sign Enhanced Server with Speech',
             'version': '2.0.0',
             'status': 'ready',
-            'current_sign': current_sign,
-            'speech_available': speech_process is not None
+            'current_sign': get_session().current_sign,
+            'speech_available': speech_component.ready and speech.alive
         })
 
 def gen_frames():
     """Generate camera frames for web interface"""
-    while True:
-        try:
-            if not CAMERA_AVAILABLE or cv2 is None or cap is None:
-                # Create a simple placeholder frame
-                frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                # Add text without cv2 - just return a simple static frame
-                import io
-                from PIL import Image
-                
-                # Create simple image with PIL instead of OpenCV
-                img = Image.new('RGB', (640, 480), color='black')
-                buffer = io.BytesIO()
-                img.save(buffer, format='JPEG')
-                frame_bytes = buffer.getvalue()
-                
-            elif not camera_active:
-                frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                cv2.putText(frame, "Camera Disconnected", (50, 240),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-                frame = cv2.resize(frame, (640, 480))
-                ret, buffer = cv2.imencode('.jpg', frame)
-                frame_bytes = buffer.tobytes()
-            else:
-                success, frame = cap.read()
-                if not success:
-                    frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                    cv2.putText(frame, "Frame Error", (50, 240),
-                                cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-
-            frame = cv2.resize(frame, (640, 480))
-            ret, buffer = cv2.imencode('.jpg', frame)
-            frame_bytes = buffer.tobytes()
-                
-            yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        except Exception as e:
-            print(f"[Frame Error] {e}")
-            time.sleep(0.1)
+    camera_session = sessions.get(CAMERA_SESSION_ID)
+    ensure_camera_started()
+    subscriber = None
+    try:
+        while True:
+            try:
+                live = CAMERA_AVAILABLE and cv2 is not None and frame_hub.connected and camera_session.camera_active
+                if live and subscriber is None:
+                    subscriber = mjpeg_broadcaster.subscribe()
+                elif not live and subscriber is not None:
+                    # Stop holding the encoder open while showing a placeholder
+                    subscriber.close()
+                    subscriber = None
+
+                if not CAMERA_AVAILABLE or cv2 is None or not frame_hub.connected:
+                    yield multipart_chunk(placeholder_frames.get('no_camera'))
+                    placeholder_frames.wait()
+                elif not camera_session.camera_active:
+                    yield multipart_chunk(placeholder_frames.get('disconnected'))
+                    placeholder_frames.wait()
+                else:
+                    # Shared, already-encoded JPEG; slow viewers simply skip frames
+                    frame_bytes = subscriber.next_frame(timeout=1.0)
+                    if frame_bytes is None:
+                        # next_frame() already waited, so no extra pacing needed here
+                        frame_bytes = placeholder_frames.get('frame_error')
+                    yield multipart_chunk(frame_bytes)
+            except Exception as e:
+                print(f"[Frame Error] {e}")
+                time.sleep(0.1)
+    finally:
+        if subscriber is not None:
+            subscriber.close()
+
+def relayed_frames():
+    """Camera frames for a worker's viewers, from its single relayed owner stream"""
+    subscriber = video_relay.subscribe()
+    try:
+        while True:
+            frame_bytes = subscriber.next_frame(timeout=2.0)
+            if frame_bytes is None:
+                # Owner unreachable or restarting; next_frame() already waited
+                frame_bytes = placeholder_frames.get('frame_error')
+            yield multipart_chunk(frame_bytes)
+    finally:
+        subscriber.close()
 
 @app.route('/video_feed')
 def video_feed():
-    return Response(gen_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    frames = relayed_frames() if video_relay is not None else gen_frames()
+    return Response(frames, mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/get-status')
 def get_status():
-    with lock:
+    session = get_session()
+    with session.lock:
         return jsonify({
-            'label': detected_label,
-            'gif': detected_gif,
-            'camera_status': 'active' if camera_active else 'inactive'
+            'session_id': session.session_id,
+            'label': session.detected_label,
+            'gif': session.detected_gif,
+            'camera_status': 'active' if session.camera_active else 'inactive',
+            'speech_available': speech_component.ready and speech.alive
         })
 
+if SERVER_ROLE == 'owner':
+    @app.route('/internal/session-sign', methods=['POST'])
+    def internal_session_sign():
+        """Sign updates from worker processes (only reachable with OWNER_SECRET)"""
+        data = request.get_json(silent=True) or {}
+        session = sessions.get(data.get('session_id'))
+        set_session_sign(session, data.get('sign', 'none'), data.get('source', 'text'), data.get('label'))
+        return jsonify({'success': True, 'session_id': session.session_id})
+
+    @app.route('/internal/session-snapshot', methods=['GET'])
+    def internal_session_snapshot():
+        """Current sign state of a session, for /api/events streams served by workers"""
+        return jsonify(sign_snapshot(sessions.get(request.args.get('session_id'))))
+
+    @app.route('/internal/events', methods=['GET'])
+    def internal_events():
+        """Every session's sign events as NDJSON, mirrored by each worker's EventRelay"""
+        since = request.args.get('since', type=int)
+        heartbeat = request.args.get('heartbeat', 15.0, type=float)
+        return Response(relay_event_stream(sign_events, since, heartbeat=heartbeat),
+                        mimetype='application/x-ndjson', headers={'Cache-Control': 'no-cache'})
+
+@app.after_request
+def mark_first_request(response):
+    profiler.mark('first_request')
+    return response
+
+def write_startup_profile():
+    """Wait for the first request and for components to settle, then write the startup report"""
+    deadline = time.monotonic() + STARTUP_PROFILE_TIMEOUT
+    components = {}
+    while time.monotonic() < deadline:
+        components = {
+            'avatars': avatars_component.to_dict(),
+            'detector': detector_component.to_dict(),
+            'speech': speech_component.to_dict(),
+            'camera': camera_readiness(),
+        }
+        settled = all(c['state'] not in ('loading', 'connecting') for c in components.values())
+        if settled and 'first_request' in profiler.marks:
+            break
+        time.sleep(0.05)
+    if frame_hub.open_seconds is not None:
+        profiler.record('camera_probe', frame_hub.open_seconds)
+    if avatars_component.load_seconds is not None:
+        profiler.record('avatars', avatars_component.load_seconds)
+    profiler.write(components=components, config={
+        'detector_backend': DETECTOR_BACKEND,
+        'camera_source': CAMERA_SOURCE,
+        'camera_available': CAMERA_AVAILABLE,
+        'preload_components': PRELOAD_COMPONENTS,
+    })
+    logger.info(f"⏱️ Startup profile written to {profiler.path}")
+
+def start_background_init():
+    """Kick off detector, speech worker and camera setup without blocking the server"""
+    profiler.mark('app_imported')
+    if profiler.enabled:
+        threading.Thread(target=write_startup_profile, name='startup-profile', daemon=True).start()
+    if not PRELOAD_COMPONENTS:
+        return
+    detector_component.start()
+    speech_component.start()
+    variants_component.start()
+    ensure_camera_started()
+
+start_background_init()
+
 if __name__ == '__main__':
     # Do NOT start detection thread at startup
+    # Development server only; use `python serve.py` in production
     port = int(os.getenv('FLASK_PORT', 5000))
-    debug = os.getenv('FLASK_ENV', 'development') == 'development'
+    debug = os.getenv('FLASK_ENV', 'production') == 'development'
     logger.info(f"🚀 Starting Enhanced Co-Sign Server with Speech on port {port}...")
     app.run(host='0.0.0.0', port=port, debug=debug, threaded=True)
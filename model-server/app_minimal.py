@@ -5,10 +5,14 @@ This version serves GIFs without camera/cv2 dependencies for testing
 
 from flask import Flask, render_template, Response, jsonify, request
 from flask_cors import CORS
+import os
 import threading
 import time
 from datetime import datetime
 
+from sign_matcher import PhraseMatcher
+from signs import load_vocabulary
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
@@ -17,40 +21,14 @@ detected_label = "hello"
 detected_gif = "hello.gif"
 current_sign_index = 0
 
-# Available signs (matching your GIF files)
-available_signs = [
-    {'name': 'hello', 'display': 'Hello', 'gif': 'hello.gif'},
-    {'name': 'thanks', 'display': 'Thank You', 'gif': 'thanks.gif'},
-    {'name': 'yes', 'display': 'Yes', 'gif': 'yes.gif'},
-    {'name': 'no', 'display': 'No', 'gif': 'no.gif'},
-    {'name': 'help', 'display': 'Help Me', 'gif': 'helpme.gif'},
-    {'name': 'repeat', 'display': 'Repeat', 'gif': 'repeat.gif'},
-    {'name': 'more', 'display': 'More', 'gif': 'more.gif'},
-    {'name': 'iloveyou', 'display': 'I Love You', 'gif': 'iloveyou.gif'},
-    {'name': 'howareyou', 'display': 'How Are You', 'gif': 'howareyou.gif'},
-    {'name': 'goodmorning', 'display': 'Good Morning', 'gif': 'goodmorning.gif'}
-]
+# Signs, phrases and aliases come from the GIFs in avatars/ plus avatars/signs.json
+vocabulary = load_vocabulary(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'avatars'))
+available_signs = vocabulary.public_signs
+matcher = PhraseMatcher(vocabulary.phrase_mapping, vocabulary.semantic_keywords)
 
 def match_gif(text):
     """Map text to appropriate GIF file"""
-    phrase_map = {
-        "hello": "hello.gif",
-        "how are you": "howareyou.gif",
-        "i am fine": "iamfine.gif",
-        "love you": "iloveyou.gif",
-        "thank you": "thanks.gif",
-        "yes": "yes.gif",
-        "no": "no.gif",
-        "repeat": "repeat.gif",
-        "more": "more.gif",
-        "help me": "helpme.gif",
-        "good morning": "goodmorning.gif"
-    }
-    text = text.lower()
-    for phrase in phrase_map:
-        if phrase in text:
-            return phrase_map[phrase]
-    return "none.gif"
+    return matcher.match(text)
 
 def cycle_signs():
     """Cycle through signs for demonstration"""
@@ -109,26 +87,7 @@ def text_to_sign():
 def get_sign_gif(sign_name):
     """Get specific sign GIF by name"""
     try:
-        available_gifs = {
-            'hello': 'hello.gif',
-            'thanks': 'thanks.gif', 
-            'thank_you': 'thanks.gif',
-            'yes': 'yes.gif',
-            'no': 'no.gif',
-            'help': 'helpme.gif',
-            'help_me': 'helpme.gif',
-            'repeat': 'repeat.gif',
-            'more': 'more.gif',
-            'i_love_you': 'iloveyou.gif',
-            'iloveyou': 'iloveyou.gif',
-            'how_are_you': 'howareyou.gif',
-            'howareyou': 'howareyou.gif',
-            'good_morning': 'goodmorning.gif',
-            'goodmorning': 'goodmorning.gif',
-            'none': 'none.gif'
-        }
-        
-        gif_file = available_gifs.get(sign_name.lower(), 'none.gif')
+        gif_file = vocabulary.gif_for(sign_name)
         
         return jsonify({
             'success': True,
@@ -0,0 +1,138 @@
+"""
+In-memory avatar GIF store.
+
+Every GIF under AVATARS_DIR (or inside avatars.zip) is read once at startup
+and served straight from memory with a strong ETag, If-None-Match -> 304 and
+Range support, so repeated avatar fetches never touch the filesystem.
+
+Avatar URLs are named after signs, not content, so the same URL can serve
+different bytes (an unknown sign's fallback GIF, a hot-reloaded GIF). Only
+URLs that carry the content version (?v=<etag>) get long-lived, immutable
+Cache-Control; all other responses must be revalidated, which costs a 304.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import zipfile
+
+from flask import Response
+
+
+class GifAsset:
+    """One immutable, fully-loaded asset"""
+
+    __slots__ = ('name', 'data', 'etag', 'last_modified', 'content_type', 'source')
+
+    def __init__(self, name, data, last_modified=None, content_type='image/gif', source=''):
+        self.name = name
+        self.data = data
+        # Content hash, so the ETag only changes when the bytes do
+        self.etag = hashlib.sha256(data).hexdigest()[:32]
+        self.last_modified = last_modified or time.time()
+        self.content_type = content_type
+        self.source = source
+
+    @property
+    def size(self):
+        return len(self.data)
+
+
+class AssetStore:
+    """Name -> GifAsset map, swapped atomically when (re)loaded"""
+
+    def __init__(self, max_age=31536000, immutable=True):
+        self.max_age = max_age
+        self.immutable = immutable
+        self._assets = {}
+        self._lock = threading.Lock()
+        self.loaded_at = None
+
+    def __contains__(self, name):
+        return name in self._assets
+
+    def __len__(self):
+        return len(self._assets)
+
+    def names(self):
+        return sorted(self._assets)
+
+    def get(self, name):
+        return self._assets.get(name)
+
+    def total_bytes(self):
+        return sum(asset.size for asset in self._assets.values())
+
+    @staticmethod
+    def read_directory(directory, suffix='.gif'):
+        assets = {}
+        if not os.path.isdir(directory):
+            return assets
+        for filename in sorted(os.listdir(directory)):
+            if not filename.lower().endswith(suffix):
+                continue
+            path = os.path.join(directory, filename)
+            with open(path, 'rb') as f:
+                data = f.read()
+            assets[filename] = GifAsset(filename, data, os.path.getmtime(path), source=path)
+        return assets
+
+    @staticmethod
+    def read_zip(zip_path, suffix='.gif'):
+        assets = {}
+        if not os.path.isfile(zip_path):
+            return assets
+        with zipfile.ZipFile(zip_path) as archive:
+            for info in archive.infolist():
+                filename = os.path.basename(info.filename)
+                if info.is_dir() or not filename.lower().endswith(suffix):
+                    continue
+                modified = time.mktime(info.date_time + (0, 0, -1))
+                assets[filename] = GifAsset(filename, archive.read(info), modified,
+                                            source=f'{zip_path}:{info.filename}')
+        return assets
+
+    def read(self, directory=None, zip_path=None, prefer_zip=False):
+        """Read every GIF into a new name -> GifAsset dict without touching the live set.
+
+        With prefer_zip the archive is the primary source and the directory
+        only fills in files the archive lacks.
+        """
+        from_dir = self.read_directory(directory) if directory else {}
+        from_zip = self.read_zip(zip_path) if zip_path and prefer_zip else {}
+        assets = dict(from_dir)
+        assets.update(from_zip)
+        return assets
+
+    def swap(self, assets):
+        """Replace the live set in one step; readers see either the old or the new one"""
+        with self._lock:
+            self._assets = assets
+            self.loaded_at = time.time()
+        return len(assets)
+
+    def load(self, directory=None, zip_path=None, prefer_zip=False):
+        """Read every GIF into memory and swap it in; returns the asset count"""
+        return self.swap(self.read(directory, zip_path, prefer_zip))
+
+    def cache_control(self, versioned=False):
+        if not versioned:
+            # Cacheable, but checked against the ETag on every use
+            return 'public, no-cache'
+        value = f'public, max-age={int(self.max_age)}'
+        if self.immutable:
+            value += ', immutable'
+        return value
+
+    def response(self, asset, request, versioned=False):
+        """Build a conditional (304) / partial (206) / full (200) response from memory.
+
+        versioned: the URL names this exact content, so it may be cached for max_age.
+        """
+        response = Response(asset.data, mimetype=asset.content_type)
+        response.set_etag(asset.etag)
+        response.last_modified = asset.last_modified
+        response.headers['Cache-Control'] = self.cache_control(versioned)
+        # Handles If-None-Match / If-Modified-Since (304) and Range / If-Range (206/416)
+        return response.make_conditional(request, accept_ranges=True, complete_length=asset.size)
@@ -0,0 +1,96 @@
+"""
+Benchmark: server-side compositing of a sign sequence into one MJPEG stream.
+
+For each sentence, compares producing every frame of its sign sequence
+(unpaced, so this is pure CPU time):
+
+    uncached  - decode, letterbox and JPEG-encode every GIF on every request
+    cold      - SequenceCompositor on its first request (decodes into the cache)
+    warm      - SequenceCompositor once the clips and JPEGs are cached
+
+Reports time to the first multipart chunk, total time per stream, and the
+memory held by the clip cache before and after every frame is encoded.
+
+Usage (from model-server/):
+    python benchmarks/bench_compositor.py [--repeat 20] [--size 426x240]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assets import AssetStore  # noqa: E402
+from compositor import SequenceCompositor  # noqa: E402
+from signs import load_vocabulary  # noqa: E402
+from sign_matcher import PhraseMatcher  # noqa: E402
+
+AVATARS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'avatars')
+SENTENCES = [
+    'hello',
+    'hello how are you',
+    'good morning thank you i love you',
+    'help me please repeat again yes no more',
+]
+
+
+def measure(stream):
+    """(seconds to first chunk, seconds for the whole stream, chunks)"""
+    started = time.perf_counter()
+    first = None
+    chunks = 0
+    for _ in stream:
+        if first is None:
+            first = time.perf_counter() - started
+        chunks += 1
+    return first or 0.0, time.perf_counter() - started, chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--size', default='426x240')
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.lower().split('x'))
+
+    store = AssetStore()
+    store.load(AVATARS_DIR)
+    vocabulary = load_vocabulary(AVATARS_DIR)
+    matcher = PhraseMatcher(vocabulary.phrase_mapping, vocabulary.semantic_keywords)
+
+    print(f"{'sentence':<42} {'signs':>5} {'frames':>6} {'mode':>9} {'first ms':>9} {'stream ms':>10}")
+    for text in SENTENCES:
+        gifs = [gif for _, gif in matcher.iter_sequence(text)]
+        rows = {}
+        # A fresh compositor per request is the uncached path
+        runs = [measure(SequenceCompositor(store, size).stream(gifs, realtime=False))
+                for _ in range(max(1, args.repeat // 5))]
+        rows['uncached'] = runs
+        compositor = SequenceCompositor(store, size)
+        rows['cold'] = [measure(compositor.stream(gifs, realtime=False))]
+        rows['warm'] = [measure(compositor.stream(gifs, realtime=False)) for _ in range(args.repeat)]
+        for mode, runs in rows.items():
+            first = statistics.median(r[0] for r in runs) * 1000
+            total = statistics.median(r[1] for r in runs) * 1000
+            label = text if mode == 'uncached' else ''
+            count = f'{len(gifs):>5} {runs[0][2]:>6}' if mode == 'uncached' else f"{'':>5} {'':>6}"
+            print(f"{label:<42} {count} {mode:>9} {first:>9.2f} {total:>10.2f}")
+
+    compositor = SequenceCompositor(store, size)
+    for name in store.names():
+        compositor.clip(name)
+    stats = compositor.stats()
+    print(f"\nAll {stats['clips']} avatars decoded at {size[0]}x{size[1]}: {stats['frames']} frames, "
+          f"{stats['bytes'] / 1e6:.1f} MB, {stats['decode_seconds']:.2f}s to decode")
+    for _ in compositor.iter_frames(store.names()):
+        pass
+    stats = compositor.stats()
+    print(f"Once every frame is encoded: {stats['bytes'] / 1e6:.1f} MB of frames, "
+          f"{stats['jpeg_bytes'] / 1e6:.1f} MB of JPEGs cached")
+
+
+if __name__ == '__main__':
+    main()
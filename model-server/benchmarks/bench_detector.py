@@ -0,0 +1,179 @@
+"""
+Benchmark: sign detector backends (latency, throughput, memory, agreement).
+
+Each backend runs in its own subprocess, so import cost and resident memory
+are measured in isolation. For every backend it reports model load time,
+single-frame latency (median / p95), batched throughput, RSS added by the
+detector and peak RSS, then compares every backend's best box with the
+first one listed: same top class (what parse_result() and the smoother
+use), the box IoU and the confidence difference.
+
+Frames are avatar GIF frames by default, or images from --images.
+
+Usage (from model-server/):
+    python benchmarks/bench_detector.py --backend ultralytics --backend onnx --backend openvino
+    python benchmarks/bench_detector.py --backend onnx --weights onnx=model/best.onnx --images samples/
+"""
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def memory_mb():
+    """(current RSS, peak RSS) of this process in MB"""
+    values = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    key, value = line.split(':', 1)
+                    values[key] = int(value.split()[0]) / 1024
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return peak, peak
+    return values.get('VmRSS', 0.0), values.get('VmHWM', 0.0)
+
+
+def load_frames(count, images=None):
+    if images:
+        import cv2
+        paths = sorted(p for p in glob.glob(os.path.join(images, '*'))
+                       if p.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp')))
+        frames = [cv2.imread(p) for p in paths]
+    else:
+        from frame_capture import GifFrameSource
+        frames = list(GifFrameSource(os.path.join(ROOT, 'avatars'), realtime=False).iter_frames())
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        raise SystemExit("No frames to benchmark with")
+    picks = np.linspace(0, len(frames) - 1, min(count, len(frames))).astype(int)
+    return [frames[i] for i in picks]
+
+
+def worker(args):
+    """Run one backend and print its measurements as JSON"""
+    frames = load_frames(args.frames, args.images)
+    rss_before, _ = memory_mb()
+
+    from detectors import load_detector
+    started = time.perf_counter()
+    detector = load_detector(args.worker, args.weights or None, threads=args.threads)
+    load_seconds = time.perf_counter() - started
+    rss_loaded, _ = memory_mb()
+
+    for frame in frames[:3]:
+        detector.predict(source=[frame], stream=False, verbose=False)
+
+    latencies = []
+    top = []
+    for frame in frames:
+        started = time.perf_counter()
+        result = detector.predict(source=[frame], stream=False, verbose=False)[0]
+        latencies.append(time.perf_counter() - started)
+        boxes = result.boxes
+        top.append([int(boxes.cls[0]), float(boxes.conf[0]), [float(v) for v in np.asarray(boxes.xyxy[0])]]
+                   if boxes is not None and len(boxes) else None)
+
+    started = time.perf_counter()
+    for i in range(0, len(frames), args.batch):
+        detector.predict(source=frames[i:i + args.batch], stream=False, verbose=False)
+    throughput = len(frames) / (time.perf_counter() - started)
+
+    rss_now, rss_peak = memory_mb()
+    print(json.dumps({
+        'backend': args.worker,
+        'load_s': load_seconds,
+        'latency_ms_p50': 1000 * float(np.median(latencies)),
+        'latency_ms_p95': 1000 * float(np.percentile(latencies, 95)),
+        'throughput_fps': throughput,
+        'rss_detector_mb': rss_loaded - rss_before,
+        'rss_mb': rss_now,
+        'rss_peak_mb': rss_peak,
+        'top': top,
+    }))
+
+
+def iou(a, b):
+    w = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    h = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = w * h
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter + 1e-9)
+
+
+def agreement(reference, top):
+    """(frames with the same top class, box IoUs, |confidence differences|) against the reference"""
+    same = 0
+    ious = []
+    deltas = []
+    for a, b in zip(reference, top):
+        if a is None or b is None:
+            same += a is None and b is None
+            continue
+        if a[0] == b[0]:
+            same += 1
+            ious.append(iou(a[2], b[2]))
+            deltas.append(abs(a[1] - b[1]))
+    return same, ious, deltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', action='append', default=[],
+                        help='ultralytics, onnx or openvino; repeatable (default: onnx)')
+    parser.add_argument('--weights', action='append', default=[],
+                        help='backend=path override, e.g. onnx=model/best.onnx; repeatable')
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--batch', type=int, default=8, help='batch size for the throughput run')
+    parser.add_argument('--threads', type=int, default=0, help='CPU threads per backend (0 = runtime default)')
+    parser.add_argument('--images', help='directory of images to use instead of avatar GIF frames')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        args.weights = args.weights[0] if args.weights else None
+        return worker(args)
+
+    weights = dict(item.split('=', 1) for item in args.weights)
+    results = []
+    for backend in args.backend or ['onnx']:
+        command = [sys.executable, os.path.abspath(__file__), '--worker', backend,
+                   '--frames', str(args.frames), '--batch', str(args.batch), '--threads', str(args.threads)]
+        if backend in weights:
+            command += ['--weights', weights[backend]]
+        if args.images:
+            command += ['--images', args.images]
+        proc = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            print(f"{backend}: failed\n{proc.stderr.strip()[-2000:]}")
+            continue
+        results.append(json.loads(lines[-1]))
+
+    if not results:
+        return
+    print(f"\n{'backend':<13}{'load s':>8}{'p50 ms':>9}{'p95 ms':>9}{'fps@b' + str(args.batch):>10}"
+          f"{'+RSS MB':>9}{'peak MB':>9}{'top agree':>11}{'min IoU':>9}{'max dconf':>11}")
+    reference = results[0]['top']
+    for r in results:
+        same, ious, deltas = agreement(reference, r['top'])
+        print(f"{r['backend']:<13}{r['load_s']:>8.2f}{r['latency_ms_p50']:>9.1f}{r['latency_ms_p95']:>9.1f}"
+              f"{r['throughput_fps']:>10.1f}{r['rss_detector_mb']:>9.0f}{r['rss_peak_mb']:>9.0f}"
+              f"{100 * same / max(1, len(reference)):>10.0f}%"
+              f"{min(ious, default=float('nan')):>9.3f}{max(deltas, default=float('nan')):>11.4f}")
+    print(f"\n{len(reference)} frames; agreement, IoU and confidence difference of the best box are "
+          f"measured against {results[0]['backend']} on frames where both found the same class")
+
+
+if __name__ == '__main__':
+    main()
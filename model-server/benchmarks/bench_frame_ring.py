@@ -0,0 +1,180 @@
+"""
+Benchmark: handing camera frames to a consumer in another process.
+
+Compares three ways of getting 640x480 BGR frames from the capture side to
+a detector-like consumer, with the same producer rate and the same
+per-frame work (letterbox + normalize to the 640x640 model input, i.e.
+the CPU part of detection without the model):
+
+    thread  - FrameHub + consumer thread in one process (today's detect_loop)
+    pipe    - consumer process, frames pickled through a multiprocessing Pipe
+    shm     - consumer process reading zero-copy views from shm_ring.FrameRing
+
+Reports frames produced and processed per second, and CPU time of every
+process involved (as % of one core) per processed frame.
+
+Usage (from model-server/):
+    python benchmarks/bench_frame_ring.py [--seconds 5] [--fps 30] [--mode thread --mode shm]
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detectors import letterbox  # noqa: E402
+from frame_capture import FrameHub, GifFrameSource  # noqa: E402
+from shm_ring import FrameRing  # noqa: E402
+
+AVATARS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'avatars')
+MODES = ('thread', 'pipe', 'shm')
+
+
+def work(frame):
+    """CPU stand-in for one detection: the preprocessing an exported detector does"""
+    image, _, _ = letterbox(frame, (640, 640))
+    return np.ascontiguousarray(image[:, :, ::-1].transpose(2, 0, 1), dtype=np.float32) / 255.0
+
+
+class CopyingSource(GifFrameSource):
+    """GIF camera that returns a fresh array per read, like cv2.VideoCapture"""
+
+    def read(self):
+        success, frame = super().read()
+        return success, frame.copy() if success else frame
+
+
+def cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    return own.ru_utime + own.ru_stime
+
+
+def run_thread(args):
+    source = CopyingSource(AVATARS_DIR, fps=args.fps)
+    hub = FrameHub(lambda: source)
+    processed = 0
+    stop = threading.Event()
+
+    def consume():
+        nonlocal processed
+        last_seq = 0
+        while not stop.is_set():
+            last_seq, frame = hub.wait_for_frame(last_seq, timeout=0.5)
+            if frame is not None:
+                work(frame)
+                processed += 1
+
+    cpu = cpu_seconds()
+    hub.start()
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    time.sleep(args.seconds)
+    stop.set()
+    consumer.join()
+    hub.stop()
+    return hub.frames_captured, processed, cpu_seconds() - cpu
+
+
+def _pipe_consumer(conn, results):
+    cpu = cpu_seconds()
+    processed = 0
+    while True:
+        data = conn.recv_bytes()
+        # Drain the backlog and keep only the newest frame, like FrameBuffer readers do
+        while conn.poll():
+            data = conn.recv_bytes()
+        if not data:
+            break
+        work(np.frombuffer(data, np.uint8).reshape(480, 640, 3))
+        processed += 1
+    results.put((processed, cpu_seconds() - cpu))
+
+
+def _shm_consumer(name, stop, results):
+    ring = FrameRing(name)
+    cpu = cpu_seconds()
+    processed = 0
+    last_seq = 0
+    while not stop.is_set():
+        last_seq, frame = ring.wait_for_frame(last_seq, timeout=0.5)
+        if frame is None:
+            continue
+        work(frame)
+        # A frame overwritten while in use would be discarded by a real reader
+        if ring.valid(last_seq):
+            processed += 1
+    results.put((processed, cpu_seconds() - cpu))
+    ring.close()
+
+
+def produce(source, args, publish):
+    produced = 0
+    deadline = time.monotonic() + args.seconds
+    while time.monotonic() < deadline:
+        success, frame = source.read()
+        publish(frame)
+        produced += 1
+    return produced
+
+
+def run_pipe(args):
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    results = context.Queue()
+    consumer = context.Process(target=_pipe_consumer, args=(receiver, results))
+    consumer.start()
+    source = CopyingSource(AVATARS_DIR, fps=args.fps)
+    cpu = cpu_seconds()
+    produced = produce(source, args, lambda frame: sender.send_bytes(memoryview(frame).cast('B')))
+    sender.send_bytes(b'')
+    processed, consumer_cpu = results.get()
+    consumer.join()
+    return produced, processed, cpu_seconds() - cpu + consumer_cpu
+
+
+def run_shm(args):
+    context = multiprocessing.get_context('spawn')
+    ring = FrameRing(shape=(480, 640, 3), slots=args.slots, create=True)
+    stop = context.Event()
+    results = context.Queue()
+    consumer = context.Process(target=_shm_consumer, args=(ring.name, stop, results))
+    consumer.start()
+    source = CopyingSource(AVATARS_DIR, fps=args.fps)
+    cpu = cpu_seconds()
+    produced = produce(source, args, ring.write)
+    stop.set()
+    processed, consumer_cpu = results.get()
+    consumer.join()
+    ring.close()
+    return produced, processed, cpu_seconds() - cpu + consumer_cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--fps', type=float, default=30.0, help='camera rate (0 = as fast as possible)')
+    parser.add_argument('--slots', type=int, default=4)
+    parser.add_argument('--mode', action='append', choices=MODES)
+    args = parser.parse_args()
+    if args.fps <= 0:
+        args.fps = 1e9
+
+    runners = {'thread': run_thread, 'pipe': run_pipe, 'shm': run_shm}
+    print(f"{os.cpu_count()} CPUs, {args.seconds:.0f}s per mode, camera at "
+          f"{'max' if args.fps >= 1e9 else f'{args.fps:.0f}'} FPS\n")
+    print(f"{'mode':>8} {'produced/s':>11} {'processed/s':>12} {'CPU %':>7} {'CPU ms/frame':>13}")
+    for mode in args.mode or MODES:
+        produced, processed, cpu = runners[mode](args)
+        print(f"{mode:>8} {produced / args.seconds:>11.1f} {processed / args.seconds:>12.1f} "
+              f"{100 * cpu / args.seconds:>7.1f} {1000 * cpu / max(processed, 1):>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
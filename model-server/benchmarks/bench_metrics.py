@@ -0,0 +1,80 @@
+"""
+Benchmark: per-frame cost of the /metrics instrumentation.
+
+Times Histogram.observe() (what the capture, predict and encode hot paths
+pay per frame, plus the perf_counter() call around it) from one and from
+several threads, and the cost of rendering a full scrape. Compares the
+per-frame cost against the 33 ms frame budget at 30 FPS.
+
+Usage (from model-server/):
+    python benchmarks/bench_metrics.py [--observations 200000] [--threads 4]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Registry  # noqa: E402
+
+FRAME_BUDGET = 1.0 / 30
+
+
+def time_observe(histogram, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        histogram.observe(time.perf_counter() - t0)
+    return time.perf_counter() - started
+
+
+def time_baseline(count):
+    """The same loop without the observe() call"""
+    started = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        _ = time.perf_counter() - t0
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--observations', type=int, default=200000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    registry = Registry()
+    histogram = registry.histogram('bench_seconds', 'benchmark')
+    routes = registry.histogram('bench_route_seconds', 'benchmark', labelnames=('method', 'route', 'status'))
+
+    baseline = time_baseline(args.observations)
+    single = time_observe(histogram, args.observations)
+    per_call = (single - baseline) / args.observations
+
+    threads = [threading.Thread(target=time_observe, args=(histogram, args.observations))
+               for _ in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    contended = (time.perf_counter() - started) / (args.observations * args.threads)
+
+    for i in range(30):
+        routes.labels('GET', f'/route/{i}', 200).observe(0.01)
+    started = time.perf_counter()
+    for _ in range(100):
+        text = registry.render()
+    render = (time.perf_counter() - started) / 100
+
+    print(f"observe(), 1 thread:       {per_call * 1e6:7.2f} µs/call "
+          f"({100 * per_call / FRAME_BUDGET:.4f}% of a 30 FPS frame)")
+    print(f"observe(), {args.threads} threads:      {contended * 1e6:7.2f} µs/call incl. timing loop")
+    print(f"render(), 31 series:       {render * 1e3:7.2f} ms/scrape ({len(text.splitlines())} lines)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: inference calls saved by motion gating, and what it costs.
+
+Builds camera-like clips from the avatar GIF frames: motion segments play
+consecutive GIF frames, idle segments hold one frame with sensor noise.
+Each clip is replayed at the capture rate through the legacy fixed-rate
+loop (one inference every 1/max_fps seconds) and through MotionGate, then
+reports inference calls, compute saved, gate cost per frame and the delay
+between motion onset and the first inferred frame of that motion.
+
+Usage (from model-server/):
+    python benchmarks/bench_motion_gate.py [--clips 5] [--idle-ratio 0.7]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_capture import GifFrameSource  # noqa: E402
+from motion import MotionGate  # noqa: E402
+
+AVATARS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'avatars')
+
+
+def build_clip(rng, frames, segments=10, segment_seconds=(1.0, 4.0), idle_ratio=0.7, fps=30.0, noise=2.0):
+    """Return (frames, motion_onsets): list of BGR frames and frame indices where motion starts"""
+    clip = []
+    onsets = []
+    position = int(rng.integers(len(frames)))
+    for _ in range(segments):
+        length = int(rng.uniform(*segment_seconds) * fps)
+        if rng.random() < idle_ratio:
+            still = frames[position % len(frames)].astype(np.int16)
+            for _ in range(length):
+                jitter = rng.normal(0, noise, still.shape[:2])[..., None].astype(np.int16)
+                clip.append(np.clip(still + jitter, 0, 255).astype(np.uint8))
+        else:
+            onsets.append(len(clip))
+            for _ in range(length):
+                clip.append(frames[position % len(frames)])
+                position += 1
+    return clip, onsets
+
+
+def run_fixed(clip, fps, max_fps):
+    interval = 1.0 / max_fps
+    last = None
+    inferred = []
+    for i in range(len(clip)):
+        now = i / fps
+        if last is None or now - last >= interval:
+            last = now
+            inferred.append(i)
+    return inferred
+
+
+def run_gated(clip, fps, gate):
+    inferred = []
+    started = time.perf_counter()
+    for i, frame in enumerate(clip):
+        if gate.should_infer(frame, now=i / fps):
+            inferred.append(i)
+    per_frame_us = (time.perf_counter() - started) / max(1, len(clip)) * 1e6
+    return inferred, per_frame_us
+
+
+def onset_latency(inferred, onsets, fps):
+    """Seconds from each motion onset to the first inferred frame at or after it"""
+    inferred = np.asarray(inferred)
+    delays = []
+    for onset in onsets:
+        later = inferred[inferred >= onset]
+        if later.size:
+            delays.append((later[0] - onset) / fps)
+    return delays
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clips', type=int, default=5)
+    parser.add_argument('--fps', type=float, default=30.0, help='capture rate')
+    parser.add_argument('--idle-ratio', type=float, default=0.7, help='share of segments with no motion')
+    parser.add_argument('--min-fps', type=float, default=1.0)
+    parser.add_argument('--max-fps', type=float, default=10.0)
+    parser.add_argument('--threshold', type=float, default=0.5, help='percent of pixels that must change')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    print("Loading avatar frames...")
+    source = GifFrameSource(AVATARS_DIR, realtime=False)
+    frames = list(source.iter_frames())
+    if not frames:
+        sys.exit(f"No GIF frames found in {AVATARS_DIR}")
+
+    rng = np.random.default_rng(args.seed)
+    totals = np.zeros(3, dtype=np.int64)
+    fixed_delays = []
+    gated_delays = []
+    cost = []
+    print(f"{'clip':<10}{'frames':>8}{'fixed inf':>11}{'gated inf':>11}{'saved':>8}")
+    for n in range(args.clips):
+        clip, onsets = build_clip(rng, frames, idle_ratio=args.idle_ratio, fps=args.fps)
+        fixed = run_fixed(clip, args.fps, args.max_fps)
+        gate = MotionGate(args.min_fps, args.max_fps, args.threshold)
+        gated, us = run_gated(clip, args.fps, gate)
+        fixed_delays += onset_latency(fixed, onsets, args.fps)
+        gated_delays += onset_latency(gated, onsets, args.fps)
+        cost.append(us)
+        totals += (len(clip), len(fixed), len(gated))
+        saved = 100 * (1 - len(gated) / max(1, len(fixed)))
+        print(f"clip-{n:<5}{len(clip):>8}{len(fixed):>11}{len(gated):>11}{saved:>7.1f}%")
+
+    frames_total, fixed_total, gated_total = totals
+    print(f"\n{frames_total} frames at {args.fps:g} fps, idle ratio {args.idle_ratio}, "
+          f"min/max {args.min_fps:g}/{args.max_fps:g} fps, threshold {args.threshold:g}")
+    print(f"inference calls: {fixed_total} -> {gated_total} "
+          f"({100 * (1 - gated_total / max(1, fixed_total)):.1f}% saved)")
+    if fixed_delays and gated_delays:
+        print(f"motion onset -> first inference: fixed mean {1000 * np.mean(fixed_delays):.0f} ms "
+              f"(max {1000 * np.max(fixed_delays):.0f}), gated mean {1000 * np.mean(gated_delays):.0f} ms "
+              f"(max {1000 * np.max(gated_delays):.0f})")
+    print(f"gate cost: {np.mean(cost):.1f} us/frame")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark: precompiled PhraseMatcher vs the original text_to_sign_mapping.
+
+Builds a synthetic corpus of meeting-transcript caption lines (and whole
+transcripts made by joining them), checks that both implementations return
+identical GIFs for every input, then times them. The legacy mapper is timed
+with logging at --log-level (app.py runs at INFO) sent to os.devnull.
+
+Usage (from model-server/):
+    python benchmarks/bench_sign_matcher.py [--lines 20000] [--repeat 5] [--log-level INFO]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sign_matcher import SIGN_MAPPING, PhraseMatcher  # noqa: E402
+
+logger = logging.getLogger('bench_sign_matcher')
+
+CAPTIONS = [
+    "hello everyone", "hi, can you hear me?", "hey there", "good morning all",
+    "how are you doing today", "thank you so much", "thanks for joining",
+    "yes", "okay let's start", "sure, go ahead", "no", "nope, not yet",
+    "can you help me with the slides", "i love you all", "we need more time",
+    "can you repeat that", "say it again please", "what did you say",
+    "let's continue with the agenda", "I don't know", "this is the last item",
+    "could you share your screen", "you're on mute", "let me assist you",
+    "I care about the deadline", "see you next week", "anything else?",
+    "that's all from me", "nothing to add", "the quarterly numbers look good",
+]
+FILLERS = ["so", "um", "right", "well", "actually", "basically", "I think", "and",
+           "the", "deployment", "budget", "design", "review", "sprint", "roadmap"]
+
+
+def legacy_text_to_sign_mapping(text):
+    """The original multi-pass implementation from app.py, kept for comparison"""
+    if not text:
+        return 'none.gif'
+
+    text = text.lower().strip()
+    logger.info(f"🔤 Processing: '{text}'")
+
+    if text in SIGN_MAPPING:
+        result = SIGN_MAPPING[text]
+        logger.info(f"✅ Direct match: {text} -> {result}")
+        return result
+
+    words = text.split()
+    for word in words:
+        if word in SIGN_MAPPING:
+            result = SIGN_MAPPING[word]
+            logger.info(f"✅ Word match: {word} -> {result}")
+            return result
+
+    if any(w in text for w in ['hello', 'hi', 'hey']):
+        return 'hello.gif'
+    elif any(w in text for w in ['how', 'what']):
+        return 'howareyou.gif'
+    elif any(w in text for w in ['thank', 'thanks']):
+        return 'thanks.gif'
+    elif any(w in text for w in ['yes', 'okay', 'sure']):
+        return 'yes.gif'
+    elif any(w in text for w in ['no', 'nope']):
+        return 'no.gif'
+    elif any(w in text for w in ['help', 'assist']):
+        return 'helpme.gif'
+    elif any(w in text for w in ['love', 'care']):
+        return 'iloveyou.gif'
+    elif any(w in text for w in ['more', 'continue']):
+        return 'more.gif'
+    elif any(w in text for w in ['repeat', 'again']):
+        return 'repeat.gif'
+
+    logger.info(f"❌ No match for: '{text}', using none.gif")
+    return 'none.gif'
+
+
+def build_corpus(lines, seed=42):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(lines):
+        parts = [rng.choice(CAPTIONS)]
+        for _ in range(rng.randint(0, 12)):
+            parts.insert(rng.randint(0, len(parts)), rng.choice(FILLERS))
+        line = ' '.join(parts)
+        if rng.random() < 0.3:
+            line = line.upper() if rng.random() < 0.5 else '  ' + line + '  '
+        corpus.append(line)
+    # Edge cases: empty, whitespace, overlapping keywords, punctuation-glued words
+    corpus += ['', '   ', 'nokay', 'heyes', 'whathank', 'carepeat', 'hello,', 'thank-you', 'Yes!']
+    return corpus
+
+
+def build_transcripts(count, lines_per_transcript=40):
+    return [' '.join(build_corpus(lines_per_transcript, seed=i)) for i in range(count)]
+
+
+def time_it(fn, corpus, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for line in corpus:
+            fn(line)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--transcripts', type=int, default=500)
+    parser.add_argument('--log-level', default='WARNING',
+                        help='logging level while timing the legacy mapper (its f-strings run regardless)')
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, stream=open(os.devnull, 'w'))
+
+    matcher = PhraseMatcher()
+    corpora = [
+        ('caption lines', build_corpus(args.lines)),
+        ('full transcripts', build_transcripts(args.transcripts)),
+    ]
+
+    for label, corpus in corpora:
+        mismatches = [(text, legacy_text_to_sign_mapping(text), matcher.match(text))
+                      for text in corpus if legacy_text_to_sign_mapping(text) != matcher.match(text)]
+        if mismatches:
+            for text, old, new in mismatches[:20]:
+                print(f"MISMATCH {text[:60]!r}: legacy={old} matcher={new}")
+            sys.exit(1)
+        print(f"✅ {label}: {len(corpus)} inputs, identical results")
+
+    for label, corpus in corpora:
+        print(f"\n{label} (logging={args.log_level})")
+        legacy = time_it(legacy_text_to_sign_mapping, corpus, args.repeat)
+        compiled = time_it(matcher.match, corpus, args.repeat)
+        for name, seconds in (('legacy', legacy), ('compiled', compiled)):
+            print(f"{name:>9}: {seconds * 1000:8.1f} ms total, "
+                  f"{seconds / len(corpus) * 1e6:8.2f} us/input, {len(corpus) / seconds:10.0f} inputs/s")
+        print(f"  speedup: {legacy / compiled:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark: state updates and speech calls with and without temporal smoothing.
+
+Replays per-frame detections through the legacy rule (any top box with
+confidence > 0.5 rewrites current_sign and calls speak(), which suppresses
+repeats of the same text within 4 s) and through TemporalSmoother, then
+reports how many state updates and speech calls each produces.
+
+Detections come from a recorded clip CSV (columns: frame, class_id,
+confidence; one row per box, e.g. written by the offline evaluation mode)
+or from synthetic clips with realistic flicker.
+
+Usage (from model-server/):
+    python benchmarks/bench_smoothing.py [--clips 20] [--fps 10]
+    python benchmarks/bench_smoothing.py --predictions detections.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from smoothing import TemporalSmoother  # noqa: E402
+
+NUM_CLASSES = 10
+SPEAK_INTERVAL = 4.0
+
+
+def synthetic_clip(rng, segments=12, frames_per_sign=(15, 40), miss=0.25, flicker=0.15):
+    """Per-frame list of (classes, confidences): signs held for a while, with dropouts and flicker"""
+    frames = []
+    truth = []
+    for _ in range(segments):
+        sign = int(rng.integers(NUM_CLASSES))
+        for _ in range(int(rng.integers(*frames_per_sign))):
+            roll = rng.random()
+            if roll < miss:
+                frames.append((np.empty(0, np.intp), np.empty(0, np.float32)))
+            elif roll < miss + flicker:
+                wrong = int(rng.integers(NUM_CLASSES))
+                frames.append((np.array([wrong]), np.array([rng.uniform(0.45, 0.8)], np.float32)))
+            else:
+                frames.append((np.array([sign]), np.array([rng.uniform(0.5, 0.95)], np.float32)))
+            truth.append(sign)
+        # Hands down between signs
+        for _ in range(int(rng.integers(5, 15))):
+            frames.append((np.empty(0, np.intp), np.empty(0, np.float32)))
+            truth.append(-1)
+    return frames, truth
+
+
+def load_predictions(path):
+    """Read frame,class_id,confidence rows into per-frame arrays"""
+    boxes = {}
+    last_frame = -1
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            frame = int(row['frame'])
+            last_frame = max(last_frame, frame)
+            if row.get('class_id') not in (None, '', '-1'):
+                boxes.setdefault(frame, []).append((int(row['class_id']), float(row['confidence'])))
+    frames = []
+    for frame in range(last_frame + 1):
+        items = sorted(boxes.get(frame, []), key=lambda b: -b[1])
+        frames.append((np.array([c for c, _ in items], np.intp),
+                       np.array([p for _, p in items], np.float32)))
+    return frames
+
+
+class SpeechCounter:
+    """Same suppression rule as speak(): one call per text per SPEAK_INTERVAL"""
+
+    def __init__(self):
+        self.last = {}
+        self.calls = 0
+
+    def speak(self, label, now):
+        if label not in self.last or now - self.last[label] > SPEAK_INTERVAL:
+            self.last[label] = now
+            self.calls += 1
+
+
+def run_legacy(frames, fps):
+    updates = 0
+    speech = SpeechCounter()
+    for i, (classes, confidences) in enumerate(frames):
+        if classes.size and confidences[0] > 0.5:
+            updates += 1
+            speech.speak(int(classes[0]), i / fps)
+    return updates, speech.calls
+
+
+def run_smoothed(frames, fps, num_classes, window, enter, exit_, seconds=None):
+    smoother = TemporalSmoother(num_classes, window=window, enter_threshold=enter, exit_threshold=exit_,
+                                window_seconds=seconds)
+    updates = 0
+    speech = SpeechCounter()
+    started = time.perf_counter()
+    for i, (classes, confidences) in enumerate(frames):
+        committed = smoother.update(classes, confidences, i / fps)
+        if committed is not None:
+            updates += 1
+            speech.speak(committed, i / fps)
+    per_frame_us = (time.perf_counter() - started) / max(1, len(frames)) * 1e6
+    return updates, speech.calls, per_frame_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--predictions', action='append', default=[],
+                        help='recorded clip CSV (frame,class_id,confidence); repeatable')
+    parser.add_argument('--clips', type=int, default=20, help='synthetic clips when no --predictions given')
+    parser.add_argument('--fps', type=float, default=10.0, help='detection rate the clip was recorded at')
+    parser.add_argument('--window', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=0.0,
+                        help='window length in seconds instead of --window frames')
+    parser.add_argument('--enter', type=float, default=0.5)
+    parser.add_argument('--exit', type=float, default=0.25)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    if args.predictions:
+        clips = [(os.path.basename(p), load_predictions(p), None) for p in args.predictions]
+        num_classes = max([int(c.max()) + 1 for _, frames, _ in clips for c, _ in frames if c.size] + [1])
+    else:
+        rng = np.random.default_rng(args.seed)
+        clips = [(f'synthetic-{i}',) + synthetic_clip(rng) for i in range(args.clips)]
+        num_classes = NUM_CLASSES
+
+    totals = np.zeros(4, dtype=np.int64)
+    frames_total = 0
+    cost = []
+    segments = 0
+    print(f"{'clip':<16}{'frames':>8}{'legacy upd':>12}{'smooth upd':>12}{'legacy tts':>12}{'smooth tts':>12}")
+    for name, frames, truth in clips:
+        legacy_updates, legacy_speech = run_legacy(frames, args.fps)
+        smooth_updates, smooth_speech, us = run_smoothed(frames, args.fps, num_classes,
+                                                         args.window, args.enter, args.exit,
+                                                         args.seconds or None)
+        totals += (legacy_updates, smooth_updates, legacy_speech, smooth_speech)
+        frames_total += len(frames)
+        cost.append(us)
+        if truth is not None:
+            segments += sum(1 for a, b in zip([-1] + truth, truth) if b != -1 and a != b)
+        print(f"{name:<16}{len(frames):>8}{legacy_updates:>12}{smooth_updates:>12}{legacy_speech:>12}{smooth_speech:>12}")
+
+    legacy_updates, smooth_updates, legacy_speech, smooth_speech = totals
+    window = f'{args.seconds:g}s' if args.seconds else args.window
+    print(f"\n{frames_total} frames at {args.fps:g} fps, window={window} enter={args.enter} exit={args.exit}")
+    if segments:
+        print(f"signs actually performed: {segments}")
+    print(f"state updates: {legacy_updates} -> {smooth_updates} "
+          f"({100 * (1 - smooth_updates / max(1, legacy_updates)):.1f}% removed)")
+    print(f"speech calls:  {legacy_speech} -> {smooth_speech} "
+          f"({100 * (1 - smooth_speech / max(1, legacy_speech)):.1f}% removed)")
+    print(f"smoother cost: {np.mean(cost):.1f} us/frame")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmark: cold start of app.py (time to first response and to fully ready).
+
+Starts the real server as a subprocess with STARTUP_PROFILE set, polls
+/api/health from the moment of spawn, and combines what it sees from the
+outside (first successful response, all components settled) with the
+server's own startup report (heavy imports, model load, camera probe,
+first request served).
+
+Modes:
+    gif   - CAMERA_SOURCE=none: no camera, no model (GIF-only deployment)
+    mock  - fake camera plus a stand-in `ultralytics` package whose model
+            loads in --mock-load-seconds, so server overhead is measured
+            without torch or weights
+    real  - whatever the current environment provides (DETECTOR_BACKEND,
+            CAMERA_SOURCE, MODEL_PATH are passed through)
+
+Use --save to record a baseline and --compare to fail (exit 1) when the
+median time to first response or to ready regresses beyond --tolerance.
+
+Usage (from model-server/):
+    python benchmarks/bench_startup.py --mode gif --mode mock --runs 5
+    python benchmarks/bench_startup.py --mode gif --save startup_baseline.json
+    python benchmarks/bench_startup.py --mode gif --compare startup_baseline.json
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stand-in for ultralytics: same YOLO surface the server uses, no torch, configurable load time
+MOCK_ULTRALYTICS = '''
+import os
+import time
+
+
+class _Result:
+    boxes = None
+
+
+class YOLO:
+    def __init__(self, weights):
+        time.sleep(float(os.getenv('MOCK_MODEL_LOAD_SECONDS', 0)))
+        self.names = {0: 'hello', 1: 'thanks', 2: 'yes', 3: 'no'}
+
+    def predict(self, source, **kwargs):
+        return [_Result() for _ in source]
+'''
+
+METRICS = ('first_response_s', 'ready_s', 'app_imported', 'first_request',
+           'import:cv2', 'import:torch', 'import:ultralytics', 'model_load', 'camera_probe')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def mode_env(mode, mock_dir, mock_load_seconds):
+    env = dict(os.environ, FLASK_ENV='production', PYTHONUNBUFFERED='1')
+    if mode == 'gif':
+        env['CAMERA_SOURCE'] = 'none'
+    elif mode == 'mock':
+        env.update(CAMERA_SOURCE='fake', DETECTOR_BACKEND='ultralytics',
+                   MOCK_MODEL_LOAD_SECONDS=str(mock_load_seconds))
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [mock_dir, env.get('PYTHONPATH')]))
+    return env
+
+
+def get_health(port):
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1.0) as response:
+            return json.load(response)
+    except (OSError, ValueError):
+        return None
+
+
+def run_once(mode, mock_dir, mock_load_seconds, timeout):
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = os.path.join(tmp, 'startup.json')
+        env = mode_env(mode, mock_dir, mock_load_seconds)
+        env.update(FLASK_PORT=str(port), STARTUP_PROFILE=report_path)
+        started = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, 'app.py'], cwd=ROOT, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        result = {}
+        try:
+            deadline = started + timeout
+            while time.perf_counter() < deadline:
+                health = get_health(port)
+                if health is not None:
+                    result.setdefault('first_response_s', time.perf_counter() - started)
+                    states = [c['state'] for c in health.get('components', {}).values()]
+                    if not any(state in ('pending', 'loading', 'connecting') for state in states):
+                        result['ready_s'] = time.perf_counter() - started
+                        result['components'] = health.get('components', {})
+                        break
+                elif proc.poll() is not None:
+                    raise RuntimeError(f"server exited with code {proc.returncode}")
+                time.sleep(0.01)
+            while not os.path.exists(report_path) and time.perf_counter() < deadline:
+                time.sleep(0.05)
+            time.sleep(0.05)
+            if os.path.exists(report_path):
+                with open(report_path) as f:
+                    report = json.load(f)
+                result.update(report.get('marks', {}))
+                result.update(report.get('phases', {}))
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', action='append', choices=('gif', 'mock', 'real'), default=[])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--mock-load-seconds', type=float, default=0.0)
+    parser.add_argument('--timeout', type=float, default=120.0, help='seconds to wait for each start')
+    parser.add_argument('--save', help='write the medians to this JSON baseline')
+    parser.add_argument('--compare', help='baseline JSON to check against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown vs baseline (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    medians = {}
+    with tempfile.TemporaryDirectory() as mock_dir:
+        os.makedirs(os.path.join(mock_dir, 'ultralytics'))
+        with open(os.path.join(mock_dir, 'ultralytics', '__init__.py'), 'w') as f:
+            f.write(MOCK_ULTRALYTICS)
+
+        for mode in args.mode or ['gif', 'mock']:
+            runs = []
+            for _ in range(args.runs):
+                try:
+                    runs.append(run_once(mode, mock_dir, args.mock_load_seconds, args.timeout))
+                except RuntimeError as e:
+                    print(f"{mode}: {e}")
+            medians[mode] = {m: float(np.median([r[m] for r in runs]))
+                             for m in METRICS if runs and all(m in r for r in runs)}
+            if runs and 'components' in runs[-1]:
+                states = {name: c['state'] for name, c in runs[-1]['components'].items()}
+                print(f"{mode}: components {states}")
+
+    print(f"\n{'metric (median s)':<22}" + ''.join(f'{mode:>12}' for mode in medians))
+    for metric in METRICS:
+        if any(metric in values for values in medians.values()):
+            cells = ''.join(f"{values[metric]:>12.3f}" if metric in values else f"{'-':>12}"
+                            for values in medians.values())
+            print(f"{metric:<22}{cells}")
+    print(f"\n{args.runs} runs per mode; first_response_s / ready_s measured from process spawn, "
+          f"the rest from the server's startup report")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(medians, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        failures = []
+        for mode, values in medians.items():
+            for metric in ('first_response_s', 'ready_s'):
+                before = baseline.get(mode, {}).get(metric)
+                if before and metric in values and values[metric] > before * (1 + args.tolerance):
+                    failures.append(f"{mode} {metric}: {before:.3f}s -> {values[metric]:.3f}s")
+        if failures:
+            print("Startup regression:\n  " + "\n  ".join(failures))
+            sys.exit(1)
+        print(f"No startup regression beyond {args.tolerance:.0%}")
+
+
+if __name__ == '__main__':
+    main()
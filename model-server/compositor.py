@@ -0,0 +1,214 @@
+"""
+Server-side compositing of sign sequences into one MJPEG stream.
+
+A sentence that maps to several signs used to mean several GIF requests,
+chained by the client with a visible gap between them. SequenceCompositor
+decodes each avatar GIF once into a NumPy array of BGR frames, letterboxed
+to one common size, and keeps it cached next to the frame delays. Each
+frame is JPEG-encoded the first time it is streamed and the bytes are
+reused afterwards; once every frame of a clip is encoded, its decoded
+array is released and only the JPEGs stay cached. A sequence is then just the cached frames of its signs
+played back to back, as parts of a multipart/x-mixed-replace response
+(the /video_feed format).
+
+stream() takes the GIF names lazily: the first frame is sent as soon as the
+first sign is known, while the rest of the text is still being matched.
+"""
+
+import io
+import threading
+import time
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from mjpeg import multipart_chunk
+from variants import decode_gif
+
+
+class SignClip:
+    """Decoded frames of one GIF: uint8 array (n, height, width, 3) in BGR plus delays in seconds.
+
+    frames becomes None once every frame has its JPEG in _jpegs.
+    """
+
+    __slots__ = ('name', 'etag', 'frames', 'durations', '_jpegs', '_pending')
+
+    def __init__(self, name, etag, frames, durations):
+        self.name = name
+        self.etag = etag
+        self.frames = frames
+        self.durations = durations
+        self._jpegs = [None] * len(frames)
+        self._pending = len(frames)
+
+    def __len__(self):
+        return len(self.durations)
+
+    @property
+    def duration(self):
+        return float(sum(self.durations))
+
+    @property
+    def nbytes(self):
+        """Bytes held by the decoded frames (0 once they are released)"""
+        frames = self.frames
+        return frames.nbytes if frames is not None else 0
+
+    @property
+    def jpeg_bytes(self):
+        return sum(len(data) for data in self._jpegs if data is not None)
+
+
+def letterbox_frame(frame, size, background=(255, 255, 255)):
+    """Fit an RGBA PIL frame into size keeping its aspect ratio; returns a BGR array"""
+    width, height = size
+    scale = min(width / frame.width, height / frame.height)
+    fitted = (max(1, round(frame.width * scale)), max(1, round(frame.height * scale)))
+    if fitted != frame.size:
+        frame = frame.resize(fitted, Image.LANCZOS)
+    canvas = Image.new('RGBA', size, background + (255,))
+    canvas.alpha_composite(frame, ((width - fitted[0]) // 2, (height - fitted[1]) // 2))
+    return np.asarray(canvas.convert('RGB'))[:, :, ::-1]
+
+
+class SequenceCompositor:
+    """Plays the avatar GIFs of a sign sequence back to back as a single MJPEG stream"""
+
+    def __init__(self, asset_store, size=(426, 240), jpeg_quality=80, encode_histogram=None):
+        self._assets = asset_store
+        self.size = tuple(size)
+        self.jpeg_quality = jpeg_quality
+        self._clips = {}
+        self._lock = threading.Lock()
+        # Guards the counters and the JPEG slots, which every streaming thread updates
+        self._stats_lock = threading.Lock()
+        self.active_streams = 0
+        self.streams = 0
+        self.frames_sent = 0
+        self.clips_decoded = 0
+        self.frames_encoded = 0
+        self.decode_seconds = 0.0
+        # Optional metrics.Histogram fed with the duration of each JPEG encode
+        self.encode_histogram = encode_histogram
+
+    def clip(self, gif_name):
+        """Cached decoded clip for a GIF, decoding it on first use (or after the GIF changed)"""
+        asset = self._assets.get(gif_name)
+        if asset is None:
+            return None
+        clip = self._clips.get(gif_name)
+        if clip is not None and clip.etag == asset.etag:
+            return clip
+        with self._lock:
+            clip = self._clips.get(gif_name)
+            if clip is None or clip.etag != asset.etag:
+                started = time.perf_counter()
+                pil_frames, delays = decode_gif(asset.data)
+                frames = np.stack([letterbox_frame(frame, self.size) for frame in pil_frames])
+                clip = SignClip(gif_name, asset.etag, frames, [delay / 1000.0 for delay in delays])
+                self._clips[gif_name] = clip
+                self.clips_decoded += 1
+                self.decode_seconds += time.perf_counter() - started
+        return clip
+
+    def prune(self):
+        """Drop clips whose GIF was removed or changed; returns how many were dropped"""
+        with self._lock:
+            stale = [name for name, clip in self._clips.items()
+                     if (self._assets.get(name) is None or self._assets.get(name).etag != clip.etag)]
+            for name in stale:
+                del self._clips[name]
+        return len(stale)
+
+    def jpeg(self, clip, index):
+        """JPEG bytes of one clip frame, encoded once; the clip's frames are released after its last one"""
+        data = clip._jpegs[index]
+        if data is not None:
+            return data
+        frames = clip.frames
+        if frames is None:
+            # Another stream encoded the last missing frame in the meantime
+            return clip._jpegs[index]
+        started = time.perf_counter()
+        data = self.encode(frames[index])
+        elapsed = time.perf_counter() - started
+        if self.encode_histogram is not None:
+            self.encode_histogram.observe(elapsed)
+        with self._stats_lock:
+            if clip._jpegs[index] is not None:
+                return clip._jpegs[index]
+            clip._jpegs[index] = data
+            clip._pending -= 1
+            if not clip._pending:
+                clip.frames = None
+            self.frames_encoded += 1
+        return data
+
+    def encode(self, frame):
+        if cv2 is not None:
+            ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, int(self.jpeg_quality)])
+            if ok:
+                return buffer.tobytes()
+        buffer = io.BytesIO()
+        Image.fromarray(frame[:, :, ::-1]).save(buffer, format='JPEG', quality=int(self.jpeg_quality))
+        return buffer.getvalue()
+
+    def iter_frames(self, gif_names):
+        """Yield (jpeg bytes, delay in seconds) for every frame of every GIF, in order"""
+        for gif_name in gif_names:
+            clip = self.clip(gif_name)
+            if clip is None:
+                continue
+            for index, delay in enumerate(clip.durations):
+                yield self.jpeg(clip, index), delay
+
+    def stream(self, gif_names, realtime=True):
+        """Multipart chunks for the whole sequence, paced by the GIF frame delays.
+
+        The first frame is yielded immediately; each later frame waits for
+        the previous frame's delay (skip with realtime=False).
+        """
+        with self._stats_lock:
+            self.active_streams += 1
+            self.streams += 1
+        try:
+            due = time.monotonic()
+            for data, delay in self.iter_frames(gif_names):
+                if realtime:
+                    wait = due - time.monotonic()
+                    if wait > 0:
+                        time.sleep(wait)
+                yield multipart_chunk(data)
+                with self._stats_lock:
+                    self.frames_sent += 1
+                # A slow client restarts the schedule instead of getting a burst of catch-up frames
+                due = max(due + delay, time.monotonic())
+        finally:
+            with self._stats_lock:
+                self.active_streams -= 1
+
+    def stats(self):
+        clips = list(self._clips.values())
+        return {
+            'size': list(self.size),
+            'clips': len(clips),
+            'frames': sum(len(clip) for clip in clips),
+            'bytes': sum(clip.nbytes for clip in clips),
+            'jpeg_bytes': sum(clip.jpeg_bytes for clip in clips),
+            'clips_decoded': self.clips_decoded,
+            'decode_seconds': round(self.decode_seconds, 3),
+            'frames_encoded': self.frames_encoded,
+            'frames_sent': self.frames_sent,
+            'streams': self.streams,
+            'active_streams': self.active_streams,
+        }
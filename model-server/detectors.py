@@ -0,0 +1,351 @@
+"""
+Pluggable sign detector backends.
+
+The inference engine only needs predict(source=[frames]) returning one
+result per frame with .boxes.cls / .boxes.conf (best box first) plus a
+.names dict. UltralyticsDetector wraps the PyTorch YOLO model as before;
+OnnxDetector and OpenVinoDetector run a `yolo export` of best.pt on the CPU
+with letterboxing and NMS done in NumPy, so neither torch nor ultralytics
+has to be installed or imported.
+"""
+
+import ast
+import importlib.util
+import os
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+BACKENDS = ('ultralytics', 'onnx', 'openvino')
+
+DEFAULT_WEIGHTS = {
+    'ultralytics': 'model/best.pt',
+    'onnx': 'model/best.onnx',
+    'openvino': 'model/best_openvino_model',
+}
+
+# Heavy modules each backend imports; the last one is the backend's own runtime
+BACKEND_MODULES = {
+    'ultralytics': ('torch', 'ultralytics'),
+    'onnx': ('onnxruntime',),
+    'openvino': ('openvino',),
+}
+
+
+def backend_available(backend):
+    """True if the runtime for a backend is installed (does not import it)"""
+    modules = BACKEND_MODULES.get(backend)
+    return bool(modules) and importlib.util.find_spec(modules[-1]) is not None
+
+
+class Boxes:
+    """NumPy stand-in for ultralytics Boxes: xyxy, conf and cls, best first"""
+
+    __slots__ = ('xyxy', 'conf', 'cls')
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    def __len__(self):
+        return len(self.conf)
+
+
+class DetectionResult:
+    """One frame's detections, shaped like an ultralytics Results object"""
+
+    __slots__ = ('boxes', 'names', 'orig_shape')
+
+    def __init__(self, boxes, names, orig_shape):
+        self.boxes = boxes
+        self.names = names
+        self.orig_shape = orig_shape
+
+
+def _resize(image, width, height):
+    if cv2 is not None:
+        return cv2.resize(image, (width, height), interpolation=cv2.INTER_LINEAR)
+    # Nearest-neighbour fallback when OpenCV is missing
+    rows = (np.arange(height) * (image.shape[0] / height)).astype(np.intp)
+    cols = (np.arange(width) * (image.shape[1] / width)).astype(np.intp)
+    return image[rows[:, None], cols]
+
+
+def letterbox(frame, size, pad_value=114, stride=None):
+    """Resize keeping aspect ratio and pad to size (h, w); returns (image, gain, (pad_x, pad_y)).
+
+    With stride, pad only up to the next multiple of stride instead of all
+    the way to size (ultralytics' auto mode, used for dynamic-shape models).
+    """
+    height, width = frame.shape[:2]
+    gain = min(size[0] / height, size[1] / width)
+    new_w, new_h = int(round(width * gain)), int(round(height * gain))
+    if stride:
+        size = (new_h + (size[0] - new_h) % stride, new_w + (size[1] - new_w) % stride)
+    # Same rounding as ultralytics' LetterBox so boxes line up with the .pt model
+    pad_x, pad_y = (size[1] - new_w) / 2, (size[0] - new_h) / 2
+    left, top = int(round(pad_x - 0.1)), int(round(pad_y - 0.1))
+    canvas = np.full((size[0], size[1], 3), pad_value, dtype=np.uint8)
+    resized = frame if (new_w, new_h) == (width, height) else _resize(frame, new_w, new_h)
+    canvas[top:top + new_h, left:left + new_w] = resized
+    return canvas, gain, (left, top)
+
+
+def nms(boxes, scores, iou_threshold):
+    """Greedy non-maximum suppression; returns kept indices, highest score first"""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-7)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.intp)
+
+
+def postprocess(prediction, conf_threshold=0.25, iou_threshold=0.7, max_det=300,
+                max_nms=30000, max_wh=7680, num_classes=None):
+    """Decode one YOLOv8 output (4 + num_classes, anchors) into (xyxy, conf, cls) in input pixels"""
+    if num_classes:
+        channels_first = prediction.shape[0] == num_classes + 4
+    else:
+        channels_first = prediction.shape[0] < prediction.shape[1]
+    if channels_first:
+        prediction = prediction.T  # (4 + num_classes, anchors) -> (anchors, 4 + num_classes)
+    class_scores = prediction[:, 4:]
+    cls = class_scores.argmax(axis=1)
+    conf = class_scores[np.arange(len(cls)), cls]
+    keep = conf > conf_threshold
+    if not keep.any():
+        empty = np.zeros(0, dtype=np.float32)
+        return np.zeros((0, 4), dtype=np.float32), empty, empty
+    xywh, conf, cls = prediction[keep, :4], conf[keep], cls[keep]
+    if len(conf) > max_nms:
+        top = conf.argsort()[::-1][:max_nms]
+        xywh, conf, cls = xywh[top], conf[top], cls[top]
+
+    xyxy = np.empty_like(xywh)
+    xyxy[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+    xyxy[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+    # Offset boxes per class so one NMS pass never suppresses across classes
+    kept = nms(xyxy + (cls[:, None] * max_wh), conf, iou_threshold)[:max_det]
+    return (xyxy[kept].astype(np.float32), conf[kept].astype(np.float32),
+            cls[kept].astype(np.float32))
+
+
+def parse_names(value):
+    """Class names from exported model metadata ("{0: 'hello', ...}") as {int: str}"""
+    if not value:
+        return {}
+    if isinstance(value, str):
+        value = ast.literal_eval(value)
+    if isinstance(value, (list, tuple)):
+        value = dict(enumerate(value))
+    return {int(k): str(v) for k, v in value.items()}
+
+
+def read_metadata_names(path):
+    """Read `names:` from an ultralytics metadata.yaml without requiring PyYAML"""
+    try:
+        import yaml
+        with open(path) as f:
+            return parse_names((yaml.safe_load(f) or {}).get('names'))
+    except ImportError:
+        pass
+    names = {}
+    in_names = False
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if not line.startswith((' ', '\t')):
+                in_names = line.startswith('names:')
+                continue
+            if in_names and ':' in line:
+                key, value = line.strip().split(':', 1)
+                names[int(key)] = value.strip().strip('\'"')
+    return names
+
+
+class UltralyticsDetector:
+    """The PyTorch YOLO model, loaded through ultralytics"""
+
+    backend = 'ultralytics'
+
+    def __init__(self, weights=DEFAULT_WEIGHTS['ultralytics'], threads=0, **options):
+        from ultralytics import YOLO
+        if threads:
+            import torch
+            torch.set_num_threads(int(threads))
+        self.model = YOLO(weights)
+        self.names = self.model.names
+        self.options = options
+
+    def predict(self, source, **kwargs):
+        kwargs.setdefault('verbose', False)
+        return self.model.predict(source=source, **dict(self.options, **kwargs))
+
+
+class _ExportedDetector:
+    """Shared NumPy pre/post-processing for exported YOLOv8 graphs.
+
+    Subclasses set names, imgsz (h, w), batch_size (None when the graph
+    takes any batch size) and dynamic_shape (graph takes any height/width),
+    and implement _forward(batch) -> (B, 4 + nc, N).
+    """
+
+    backend = None
+
+    def __init__(self, conf=0.25, iou=0.7, max_det=300):
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+        self.names = {}
+        self.imgsz = (640, 640)
+        self.batch_size = None
+        self.dynamic_shape = False
+        self.stride = 32
+
+    def preprocess(self, frames):
+        """BGR uint8 frames -> (B, 3, H, W) float32 RGB in [0, 1], plus scaling info"""
+        # Like ultralytics, dynamic-shape graphs get the smaller stride-padded input when frames share a shape
+        stride = self.stride if self.dynamic_shape and len({f.shape for f in frames}) == 1 else None
+        batch = None
+        transforms = []
+        for i, frame in enumerate(frames):
+            image, gain, pad = letterbox(frame, self.imgsz, stride=stride)
+            if batch is None:
+                batch = np.empty((len(frames), 3) + image.shape[:2], dtype=np.float32)
+            batch[i] = image[:, :, ::-1].transpose(2, 0, 1)
+            transforms.append((gain, pad, frame.shape[:2]))
+        batch *= 1.0 / 255.0
+        return batch, transforms
+
+    def _forward(self, batch):
+        raise NotImplementedError
+
+    def _run(self, batch):
+        count = len(batch)
+        if self.batch_size is None or self.batch_size == count:
+            return self._forward(batch)
+        # Static-batch export: run full chunks, padding the last one by repeating its final frame
+        step = self.batch_size
+        outputs = []
+        for i in range(0, count, step):
+            chunk = batch[i:i + step]
+            if len(chunk) < step:
+                chunk = np.concatenate([chunk, np.repeat(chunk[-1:], step - len(chunk), axis=0)])
+            outputs.append(self._forward(chunk))
+        return np.concatenate(outputs)[:count]
+
+    def predict(self, source, conf=None, iou=None, max_det=None, **_):
+        frames = source if isinstance(source, (list, tuple)) else [source]
+        if not frames:
+            return []
+        batch, transforms = self.preprocess(frames)
+        outputs = self._run(batch)
+        results = []
+        for prediction, (gain, (pad_x, pad_y), shape) in zip(outputs, transforms):
+            xyxy, scores, cls = postprocess(prediction, self.conf if conf is None else conf,
+                                            self.iou if iou is None else iou,
+                                            self.max_det if max_det is None else max_det,
+                                            num_classes=len(self.names))
+            # Undo the letterbox to get boxes in original frame pixels
+            xyxy[:, [0, 2]] = ((xyxy[:, [0, 2]] - pad_x) / gain).clip(0, shape[1])
+            xyxy[:, [1, 3]] = ((xyxy[:, [1, 3]] - pad_y) / gain).clip(0, shape[0])
+            results.append(DetectionResult(Boxes(xyxy, scores, cls), self.names, shape))
+        return results
+
+
+class OnnxDetector(_ExportedDetector):
+    """best.onnx (`yolo export format=onnx`) on ONNX Runtime's CPU provider"""
+
+    backend = 'onnx'
+
+    def __init__(self, weights=DEFAULT_WEIGHTS['onnx'], threads=0, names=None, **options):
+        super().__init__(**options)
+        import onnxruntime as ort
+        session_options = ort.SessionOptions()
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            session_options.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(weights, sess_options=session_options,
+                                            providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch, _, height, width = model_input.shape
+        self.batch_size = batch if isinstance(batch, int) else None
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        if isinstance(height, int) and isinstance(width, int):
+            self.imgsz = (height, width)
+        else:
+            # dynamic=True export: any input size works; letterbox within the size it was exported at
+            self.dynamic_shape = True
+            if metadata.get('imgsz'):
+                self.imgsz = tuple(int(v) for v in ast.literal_eval(metadata['imgsz']))
+        if metadata.get('stride'):
+            self.stride = int(metadata['stride'])
+        self.names = parse_names(names) or parse_names(metadata.get('names'))
+
+    def _forward(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVinoDetector(_ExportedDetector):
+    """best_openvino_model/ (`yolo export format=openvino`) on the OpenVINO CPU plugin"""
+
+    backend = 'openvino'
+
+    def __init__(self, weights=DEFAULT_WEIGHTS['openvino'], threads=0, names=None, **options):
+        super().__init__(**options)
+        import openvino as ov
+        xml_path = weights
+        if os.path.isdir(weights):
+            xml_path = next(os.path.join(weights, f) for f in sorted(os.listdir(weights))
+                            if f.endswith('.xml'))
+        core = ov.Core()
+        model = core.read_model(xml_path)
+        shape = model.input(0).get_partial_shape()
+        self.batch_size = None if shape[0].is_dynamic else shape[0].get_length()
+        if shape[2].is_static and shape[3].is_static:
+            self.imgsz = (shape[2].get_length(), shape[3].get_length())
+        else:
+            self.dynamic_shape = True
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if threads:
+            config['INFERENCE_NUM_THREADS'] = int(threads)
+        self.compiled = core.compile_model(model, 'CPU', config)
+        self.output = self.compiled.output(0)
+        metadata = os.path.join(os.path.dirname(xml_path), 'metadata.yaml')
+        self.names = parse_names(names)
+        if not self.names and os.path.isfile(metadata):
+            self.names = read_metadata_names(metadata)
+
+    def _forward(self, batch):
+        return self.compiled(batch)[self.output]
+
+
+_DETECTORS = {
+    'ultralytics': UltralyticsDetector,
+    'onnx': OnnxDetector,
+    'openvino': OpenVinoDetector,
+}
+
+
+def load_detector(backend='ultralytics', weights=None, **options):
+    """Create the detector for a backend name, using its default weights path if none given"""
+    backend = (backend or 'ultralytics').lower()
+    if backend not in _DETECTORS:
+        raise ValueError(f"Unknown detector backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    return _DETECTORS[backend](weights or DEFAULT_WEIGHTS[backend], **options)
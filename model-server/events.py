@@ -0,0 +1,264 @@
+"""
+Push channel for sign changes.
+
+Instead of polling /api/current-sign, clients open a Server-Sent Events
+stream and receive an event only when a session's sign actually changes.
+Every event carries a process-wide, monotonically increasing version used
+as the SSE id, so a reconnecting client (Last-Event-ID) resumes from where
+it left off, or gets a fresh snapshot if it fell too far behind.
+
+Under serve.py the bus lives in the owner process; each web worker keeps a
+mirror of it fed by one relay_event_stream() connection (see
+owner_ipc.EventRelay) and serves its own SSE clients from that mirror.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class _Channel:
+    """One session's recent events and the streams waiting on them"""
+
+    __slots__ = ('events', 'cond', 'floor', 'waiters')
+
+    def __init__(self, history, floor):
+        self.events = deque(maxlen=history)
+        self.cond = threading.Condition()
+        # This session's events up to this version may have been dropped
+        self.floor = floor
+        self.waiters = 0
+
+    def push(self, event):
+        if len(self.events) == self.events.maxlen:
+            self.floor = self.events[0]['version']
+        self.events.append(event)
+        self.cond.notify_all()
+
+    def last_version(self):
+        return self.events[-1]['version'] if self.events else self.floor
+
+
+class SignEventBus:
+    """Bounded history of sign-change events plus wake-ups for waiting streams.
+
+    Every session has its own channel (recent events plus a condition), so a
+    publish only wakes that session's streams and they only scan that
+    session's events; a busy session cannot push an idle one's resume point
+    out of history. The combined history serves the relay (session None).
+    """
+
+    def __init__(self, history=1024, max_sessions=4096):
+        # Lock order: self._cond, then a channel's cond
+        self._cond = threading.Condition()
+        self._history = deque(maxlen=history)
+        self._session_history = history
+        self._channels = OrderedDict()
+        self._max_sessions = max_sessions
+        self._version = 0
+        # Events up to this version are unknown here (set when a mirror resyncs)
+        self._floor = 0
+        # Newest version of any channel evicted to bound memory
+        self._evicted = 0
+        self.subscribers = 0
+        self.published = 0
+
+    @property
+    def version(self):
+        return self._version
+
+    def add_subscriber(self, delta):
+        with self._cond:
+            self.subscribers += delta
+
+    def _channel_locked(self, session_id):
+        channel = self._channels.get(session_id)
+        if channel is not None:
+            self._channels.move_to_end(session_id)
+            return channel
+        channel = _Channel(self._session_history, max(self._floor, self._evicted))
+        self._channels[session_id] = channel
+        if len(self._channels) > self._max_sessions:
+            # Forget the least recently used session nobody is waiting on
+            for old_id, old in self._channels.items():
+                if old is not channel and not old.waiters:
+                    del self._channels[old_id]
+                    self._evicted = max(self._evicted, old.last_version())
+                    break
+        return channel
+
+    def _record_locked(self, event):
+        self._version = event['version']
+        self._history.append(event)
+        self.published += 1
+        # Only relay streams wait on the bus itself
+        self._cond.notify_all()
+        if event['session_id'] is not None:
+            channel = self._channel_locked(event['session_id'])
+            with channel.cond:
+                channel.push(event)
+
+    def publish(self, session_id, payload):
+        """Record an event for a session and wake its streams; returns its version"""
+        with self._cond:
+            event = dict(payload, session_id=session_id, version=self._version + 1)
+            self._record_locked(event)
+            return self._version
+
+    def append(self, event):
+        """Mirror an event that already carries its version (from the owner's bus)"""
+        with self._cond:
+            if event['version'] <= self._version:
+                return
+            self._record_locked(event)
+
+    def reset(self, version):
+        """Drop the history and continue from version; waiting streams fall back to a snapshot"""
+        with self._cond:
+            self._history.clear()
+            self._version = self._floor = self._evicted = version
+            for channel in self._channels.values():
+                with channel.cond:
+                    channel.events.clear()
+                    channel.floor = version
+                    channel.cond.notify_all()
+            self._cond.notify_all()
+
+    def events_since(self, session_id, version):
+        """Return (events, complete) for a session (None: every session) newer than version.
+
+        complete is False when older events have already been dropped from
+        the history, in which case the caller should send a snapshot.
+        """
+        if session_id is None:
+            with self._cond:
+                return self._events_since_locked(version)
+        channel = self._channel(session_id)
+        with channel.cond:
+            return self._channel_events_locked(channel, version)
+
+    def _events_since_locked(self, version):
+        complete = version >= self._floor and (not self._history or self._history[0]['version'] <= version + 1)
+        events = [e for e in self._history if e['version'] > version]
+        return events, complete
+
+    @staticmethod
+    def _channel_events_locked(channel, version):
+        if version < channel.floor:
+            return [], False
+        # Newest first, stopping at the resume point
+        events = []
+        for event in reversed(channel.events):
+            if event['version'] <= version:
+                break
+            events.append(event)
+        events.reverse()
+        return events, True
+
+    def _channel(self, session_id):
+        with self._cond:
+            return self._channel_locked(session_id)
+
+    def wait(self, session_id, version, timeout=15.0):
+        """Block until the session has events newer than version (or timeout)"""
+        deadline = time.monotonic() + timeout
+        if session_id is None:
+            with self._cond:
+                return self._wait_locked(self._cond, lambda: self._events_since_locked(version), deadline)
+        with self._cond:
+            channel = self._channel_locked(session_id)
+            # Keeps the channel from being evicted while we wait on it
+            channel.waiters += 1
+        try:
+            with channel.cond:
+                return self._wait_locked(channel.cond, lambda: self._channel_events_locked(channel, version), deadline)
+        finally:
+            with self._cond:
+                channel.waiters -= 1
+
+    @staticmethod
+    def _wait_locked(cond, scan, deadline):
+        while True:
+            events, complete = scan()
+            if events or not complete:
+                return events, complete
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return [], True
+            cond.wait(remaining)
+
+
+def format_sse(payload, event=None, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(payload)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def sign_event_stream(bus, session_id, snapshot, last_version=None, heartbeat=15.0):
+    """Generator of SSE messages for one client.
+
+    snapshot() returns the session's current state; it is sent first when
+    there is no resume point, or whenever events were missed.
+    """
+    bus.add_subscriber(1)
+    try:
+        # Ask the browser to wait a bit before reconnecting after a drop
+        yield 'retry: 2000\n\n'
+        if last_version is not None and last_version > bus.version:
+            # Resume point from before a server restart: start over from a snapshot
+            last_version = None
+        if last_version is None:
+            version = bus.version
+            yield format_sse(dict(snapshot(), version=version), 'snapshot', version)
+        else:
+            version = last_version
+        while True:
+            events, complete = bus.wait(session_id, version, timeout=heartbeat)
+            if not complete:
+                version = bus.version
+                yield format_sse(dict(snapshot(), version=version), 'snapshot', version)
+                continue
+            if not events:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': keep-alive\n\n'
+                continue
+            for event in events:
+                version = event['version']
+                yield format_sse(event, 'sign', version)
+    finally:
+        bus.add_subscriber(-1)
+
+
+def relay_event_stream(bus, since=None, heartbeat=15.0):
+    """Generator of NDJSON lines carrying every session's events to a worker's mirror.
+
+    Lines are {"type": "event", "event": {...}} in version order,
+    {"type": "reset", "version": N} when the mirror cannot be brought up to
+    date from the history (it must resync and let its clients snapshot),
+    and {"type": "keep-alive"} while nothing happens.
+    """
+    if since is not None and since > bus.version:
+        # The mirror is ahead of us, so this bus was restarted
+        since = None
+    if since is None:
+        version = bus.version
+        yield json.dumps({'type': 'reset', 'version': version}) + '\n'
+    else:
+        version = since
+    while True:
+        events, complete = bus.wait(None, version, timeout=heartbeat)
+        if not complete:
+            version = bus.version
+            yield json.dumps({'type': 'reset', 'version': version}) + '\n'
+            continue
+        if not events:
+            yield json.dumps({'type': 'keep-alive'}) + '\n'
+            continue
+        for event in events:
+            version = event['version']
+            yield json.dumps({'type': 'event', 'event': event}) + '\n'
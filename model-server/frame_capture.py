@@ -0,0 +1,330 @@
+"""
+Single-producer frame capture for the model server.
+
+One background thread owns the capture device and publishes the latest frame
+(plus a monotonically increasing sequence number) into a shared buffer.
+Detection and every /video_feed client read from that buffer instead of
+calling cap.read() themselves, so viewers never compete for the device.
+"""
+
+import glob
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class FrameBuffer:
+    """Latest-frame slot shared between one producer and many readers"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._timestamp = 0.0
+
+    def publish(self, frame):
+        """Store a new frame and wake up every waiting reader"""
+        with self._cond:
+            self._frame = frame
+            self._seq += 1
+            self._timestamp = time.time()
+            self._cond.notify_all()
+            return self._seq
+
+    def clear(self):
+        """Drop the current frame (e.g. when the device goes away)"""
+        with self._cond:
+            self._frame = None
+            self._cond.notify_all()
+
+    def latest(self):
+        """Return (seq, frame, timestamp) without blocking"""
+        with self._cond:
+            return self._seq, self._frame, self._timestamp
+
+    def wait_for_frame(self, last_seq=0, timeout=1.0):
+        """Block until a frame newer than last_seq is published.
+
+        Returns (seq, frame). frame is None if the timeout expired or the
+        buffer was cleared. Frames are shared between readers and must be
+        treated as read-only.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._seq <= last_seq or self._frame is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return self._seq, None
+                self._cond.wait(remaining)
+            return self._seq, self._frame
+
+
+class GifFrameSource:
+    """Fake camera that loops over the frames of the avatar GIFs.
+
+    Mimics the subset of the cv2.VideoCapture API used by the server
+    (read / isOpened / release / set / get) so it can stand in for a real
+    webcam in tests and benchmarks. Frames are decoded when read, and only
+    the last cache_frames of them are kept (all of them at 640x480 would
+    take ~270 MB for the bundled avatars).
+    """
+
+    def __init__(self, gif_dir, width=640, height=480, fps=30.0, realtime=True, cache_frames=16):
+        if Image is None:
+            raise RuntimeError("Pillow is required for the fake camera source")
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.realtime = realtime
+        self.cache_frames = cache_frames
+        # (path, frame number) of every frame of every GIF, in playback order
+        self._frame_index = []
+        for path in sorted(glob.glob(os.path.join(gif_dir, '*.gif'))):
+            with Image.open(path) as gif:
+                self._frame_index.extend((path, n) for n in range(getattr(gif, 'n_frames', 1)))
+        self._cache = OrderedDict()
+        self._gif = None
+        self._gif_path = None
+        self._lock = threading.Lock()
+        self._index = 0
+        self._next_time = 0.0
+        self._opened = bool(self._frame_index)
+
+    def __len__(self):
+        return len(self._frame_index)
+
+    def frame(self, index):
+        """Frame number index as a BGR array, decoded on demand (read-only: it may be cached)"""
+        with self._lock:
+            frame = self._cache.get(index)
+            if frame is not None:
+                self._cache.move_to_end(index)
+                return frame
+            path, number = self._frame_index[index]
+            if path != self._gif_path:
+                if self._gif is not None:
+                    self._gif.close()
+                self._gif = Image.open(path)
+                self._gif_path = path
+            # Reading in order keeps each seek incremental
+            self._gif.seek(number)
+            rgb = self._gif.convert('RGB')
+            if cv2 is not None:
+                # ~10x faster than PIL's resize, which would dominate the cost of a frame
+                frame = cv2.resize(cv2.cvtColor(np.asarray(rgb), cv2.COLOR_RGB2BGR), (self.width, self.height))
+            else:
+                # PIL is RGB, OpenCV consumers expect BGR
+                frame = np.ascontiguousarray(np.asarray(rgb.resize((self.width, self.height)))[:, :, ::-1])
+            if self.cache_frames > 0:
+                self._cache[index] = frame
+                if len(self._cache) > self.cache_frames:
+                    self._cache.popitem(last=False)
+            return frame
+
+    def iter_frames(self):
+        for index in range(len(self)):
+            yield self.frame(index)
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self):
+        if not self._opened:
+            return False, None
+        if self.realtime and self.fps > 0:
+            now = time.monotonic()
+            if self._next_time > now:
+                time.sleep(self._next_time - now)
+                now = self._next_time
+            self._next_time = max(now, self._next_time) + 1.0 / self.fps
+        frame = self.frame(self._index)
+        self._index = (self._index + 1) % len(self._frame_index)
+        return True, frame
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        self._opened = False
+        with self._lock:
+            if self._gif is not None:
+                self._gif.close()
+            self._gif = self._gif_path = None
+            self._cache.clear()
+
+
+class FrameHub:
+    """Owns the capture device on a dedicated thread and feeds a FrameBuffer.
+
+    When no device can be opened, probing backs off exponentially from
+    reconnect_delay up to max_reconnect_delay and state reports 'no_camera'
+    until a probe succeeds or reconnect() is called.
+    """
+
+    def __init__(self, open_source, reconnect_delay=1.0, name='frame-capture', capture_histogram=None,
+                 ring=None, max_reconnect_delay=30.0, ring_factory=None):
+        self._open_source = open_source
+        self._reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max(reconnect_delay, max_reconnect_delay)
+        self._name = name
+        self._source = None
+        self._source_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reconnect = threading.Event()
+        # Cuts a backoff wait short on stop() / reconnect()
+        self._wake = threading.Event()
+        self._thread = None
+        self.buffer = FrameBuffer()
+        self.frames_captured = 0
+        self.grab_failures = 0
+        # Times a lost device was reopened; failed probes are counted in open_failures instead
+        self.reconnects = 0
+        # Consecutive failed open attempts (0 once a device is open)
+        self.open_failures = 0
+        self.retry_delay = 0.0
+        # How long the last successful open_source() call took (device probing)
+        self.open_seconds = None
+        # Optional metrics.Histogram fed with the duration of each source.read()
+        self.capture_histogram = capture_histogram
+        # Optional shm_ring.FrameRing that mirrors every frame for readers in other processes;
+        # ring_factory(frame) instead creates it sized for the first captured frame
+        self.ring = ring
+        self._ring_factory = ring_factory
+        self._ring_rejects_logged = False
+
+    @property
+    def connected(self):
+        return self._source is not None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def state(self):
+        """'connected', 'connecting', 'no_camera' (probing failed, backing off) or 'stopped'"""
+        if self._source is not None:
+            return 'connected'
+        if not self.running:
+            return 'stopped'
+        return 'no_camera' if self.open_failures else 'connecting'
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._release()
+
+    def reconnect(self):
+        """Ask the capture thread to reopen the device now, skipping any backoff"""
+        self._reconnect.set()
+        self._wake.set()
+
+    def latest(self):
+        return self.buffer.latest()
+
+    def wait_for_frame(self, last_seq=0, timeout=1.0):
+        return self.buffer.wait_for_frame(last_seq, timeout)
+
+    def _release(self):
+        with self._source_lock:
+            source, self._source = self._source, None
+        if source is not None:
+            try:
+                source.release()
+            except Exception as e:
+                print(f"[Capture Error] release failed: {e}")
+        self.buffer.clear()
+
+    def _open(self):
+        started = time.perf_counter()
+        try:
+            source = self._open_source()
+        except Exception as e:
+            print(f"[Capture Error] open failed: {e}")
+            source = None
+        if source is not None:
+            self.open_seconds = time.perf_counter() - started
+        with self._source_lock:
+            self._source = source
+        return source
+
+    def _wait(self, delay):
+        self._wake.wait(delay)
+        self._wake.clear()
+
+    def _run(self):
+        lost = False
+        while not self._stop.is_set():
+            if self._reconnect.is_set():
+                self._reconnect.clear()
+                self.open_failures = 0
+                self._release()
+            source = self._source
+            if source is None:
+                if lost:
+                    self.reconnects += 1
+                    lost = False
+                source = self._open()
+                if source is None:
+                    self.open_failures += 1
+                    self.retry_delay = min(self._reconnect_delay * 2 ** (self.open_failures - 1),
+                                           self.max_reconnect_delay)
+                    if self.open_failures == 1:
+                        print(f"❌ No camera, retrying with backoff (up to every {self.max_reconnect_delay:g}s)")
+                    self._wait(self.retry_delay)
+                    continue
+                self.open_failures = 0
+                self.retry_delay = 0.0
+                print("✅ Frame capture started")
+
+            started = time.perf_counter()
+            try:
+                success, frame = source.read()
+            except Exception as e:
+                print(f"[Capture Error] {e}")
+                success, frame = False, None
+            if self.capture_histogram is not None:
+                self.capture_histogram.observe(time.perf_counter() - started)
+
+            if not success or frame is None:
+                self.grab_failures += 1
+                print("⚠️ Frame grab failed, reconnecting...")
+                self._release()
+                lost = True
+                self._wait(self._reconnect_delay)
+                continue
+
+            self.frames_captured += 1
+            self.buffer.publish(frame)
+            if self.ring is None and self._ring_factory is not None:
+                factory, self._ring_factory = self._ring_factory, None
+                self.ring = factory(frame)
+            if self.ring is not None and not self.ring.write(frame) and not self._ring_rejects_logged:
+                # E.g. the camera came back at another resolution; frames_rejected keeps counting
+                self._ring_rejects_logged = True
+                print(f"⚠️ Frame ring holds {self.ring.shape} frames, skipping {frame.shape} frames")
@@ -0,0 +1,296 @@
+"""
+Batched multi-stream inference for the sign detector.
+
+Frames from any number of registered streams (one per meeting room / camera)
+are collected into micro-batches bounded by max_batch_size and max_wait, run
+through a single batched model.predict() call, and each result is routed back
+to the state of the stream it came from.
+"""
+
+import threading
+import time
+
+
+class RateMeter:
+    """Events-per-second over a rolling window"""
+
+    def __init__(self, window=5.0):
+        self.window = window
+        self.total = 0
+        self._count = 0
+        self._started = time.monotonic()
+        self._rate = 0.0
+
+    def tick(self, n=1):
+        self.total += n
+        self._count += n
+        self._roll()
+
+    def _roll(self):
+        now = time.monotonic()
+        elapsed = now - self._started
+        if elapsed >= self.window:
+            self._rate = self._count / elapsed
+            self._count = 0
+            self._started = now
+
+    def rate(self):
+        self._roll()
+        elapsed = time.monotonic() - self._started
+        if self._rate == 0.0 and elapsed > 0:
+            # Still inside the first window: report the partial rate
+            return self._count / elapsed
+        return self._rate
+
+
+class StreamState:
+    """Detection state for one registered stream"""
+
+    __slots__ = ('stream_id', 'detected_label', 'current_sign', 'sign_start_time',
+                 'confidence', 'on_result', 'fps', 'frames_submitted', 'frames_dropped',
+                 'smoother', 'raw_detections', '_pending')
+
+    def __init__(self, stream_id, on_result=None, smoother=None):
+        self.stream_id = stream_id
+        self.detected_label = "Detecting..."
+        self.current_sign = 'none'
+        self.sign_start_time = time.time()
+        self.confidence = 0.0
+        self.on_result = on_result
+        self.fps = RateMeter()
+        self.frames_submitted = 0
+        self.frames_dropped = 0
+        self.smoother = smoother
+        # Frames whose top box passed min_confidence (what used to update state directly)
+        self.raw_detections = 0
+        self._pending = None
+
+    def to_dict(self):
+        return {
+            'stream_id': self.stream_id,
+            'detected_label': self.detected_label,
+            'current_sign': self.current_sign,
+            'confidence': self.confidence,
+            'fps': round(self.fps.rate(), 2),
+            'frames_inferred': self.fps.total,
+            'frames_submitted': self.frames_submitted,
+            'frames_dropped': self.frames_dropped,
+            'raw_detections': self.raw_detections,
+            'committed_signs': self.smoother.commits if self.smoother is not None else self.raw_detections,
+        }
+
+
+def parse_result(result, labels, min_confidence=0.5):
+    """Return (label, confidence) for the top box of one YOLO result, or None"""
+    if result is None or not result.boxes:
+        return None
+    label_index = int(result.boxes.cls[0])
+    confidence = float(result.boxes.conf[0])
+    if confidence <= min_confidence:
+        return None
+    return labels[label_index], confidence
+
+
+class InferenceEngine:
+    """Micro-batches frames from many streams into single predict() calls.
+
+    If smoother_factory is given, each stream gets its own smoother (see
+    smoothing.TemporalSmoother) and state only changes when a sign is stable.
+    """
+
+    def __init__(self, model, labels, max_batch_size=8, max_wait=0.02, min_confidence=0.5,
+                 smoother_factory=None, predict_histogram=None):
+        self.model = model
+        self.labels = labels
+        self.smoother_factory = smoother_factory
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max_wait
+        self.min_confidence = min_confidence
+        self._streams = {}
+        self._ready = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.fps = RateMeter()
+        self.batches = 0
+        self.batch_frames = 0
+        self.predict_seconds = 0.0
+        # Optional metrics.Histogram fed with the duration of each predict() call
+        self.predict_histogram = predict_histogram
+
+    def register_stream(self, stream_id, on_result=None):
+        """Add a stream; on_result(state, label, confidence) fires on each detection"""
+        with self._cond:
+            state = self._streams.get(stream_id)
+            if state is None:
+                smoother = self.smoother_factory() if self.smoother_factory else None
+                state = StreamState(stream_id, on_result, smoother)
+                self._streams[stream_id] = state
+            elif on_result is not None:
+                state.on_result = on_result
+            return state
+
+    def unregister_stream(self, stream_id):
+        with self._cond:
+            state = self._streams.pop(stream_id, None)
+            if state is not None and state._pending is not None:
+                self._ready.remove(state)
+                state._pending = None
+
+    def get_stream(self, stream_id):
+        return self._streams.get(stream_id)
+
+    def submit(self, stream_id, frame):
+        """Queue the latest frame for a stream without blocking.
+
+        Only one frame per stream waits for inference at a time; a newer frame
+        replaces an older one that has not been batched yet.
+        """
+        with self._cond:
+            state = self._streams.get(stream_id)
+            if state is None:
+                return False
+            state.frames_submitted += 1
+            if state._pending is not None:
+                state.frames_dropped += 1
+            else:
+                self._ready.append(state)
+            state._pending = frame
+            self._cond.notify()
+        return True
+
+    def attach_hub(self, stream_id, frame_hub, max_fps=10.0, should_run=None, gate=None):
+        """Feed a stream from a FrameHub on its own lightweight thread.
+
+        With a motion gate (motion.MotionGate) the gate decides which frames
+        are inferred and max_fps is ignored.
+        """
+        self.register_stream(stream_id)
+        interval = 1.0 / max_fps if max_fps > 0 else 0.0
+
+        def feed():
+            last_seq = 0
+            while self._running and stream_id in self._streams:
+                if should_run is not None and not should_run():
+                    time.sleep(1)
+                    continue
+                last_seq, frame = frame_hub.wait_for_frame(last_seq, timeout=1.0)
+                if frame is None:
+                    continue
+                if gate is not None:
+                    if gate.should_infer(frame):
+                        self.submit(stream_id, frame)
+                    continue
+                self.submit(stream_id, frame)
+                if interval:
+                    time.sleep(interval)
+
+        thread = threading.Thread(target=feed, name=f'inference-feed-{stream_id}', daemon=True)
+        thread.start()
+        return thread
+
+    def start(self):
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name='inference-engine', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _next_batch(self):
+        """Wait for frames, then collect up to max_batch_size or until max_wait expires"""
+        with self._cond:
+            while self._running and not self._ready:
+                self._cond.wait(0.5)
+            if not self._running:
+                return []
+            # Each stream has at most one pending frame, so never wait for more than that
+            target = min(self.max_batch_size, len(self._streams))
+            deadline = time.monotonic() + self.max_wait
+            while len(self._ready) < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._ready[:self.max_batch_size]
+            del self._ready[:self.max_batch_size]
+            items = []
+            for state in batch:
+                items.append((state, state._pending))
+                state._pending = None
+            return items
+
+    def _run(self):
+        while self._running:
+            items = self._next_batch()
+            if not items:
+                continue
+            try:
+                frames = [frame for _, frame in items]
+                started = time.perf_counter()
+                results = self.model.predict(source=frames, stream=False, verbose=False)
+                elapsed = time.perf_counter() - started
+                self.predict_seconds += elapsed
+                if self.predict_histogram is not None:
+                    self.predict_histogram.observe(elapsed)
+            except Exception as e:
+                print(f"[Inference Error] {e}")
+                time.sleep(0.1)
+                continue
+
+            self.batches += 1
+            self.batch_frames += len(items)
+            self.fps.tick(len(items))
+            for (state, _), result in zip(items, results):
+                state.fps.tick()
+                try:
+                    self._route(state, result)
+                except Exception as e:
+                    print(f"[Inference Error] {state.stream_id}: {e}")
+
+    def _route(self, state, result):
+        detection = parse_result(result, self.labels, self.min_confidence)
+        if detection is not None:
+            state.raw_detections += 1
+
+        if state.smoother is not None:
+            boxes = result.boxes if result is not None else None
+            if boxes:
+                label_index = state.smoother.update(boxes.cls, boxes.conf)
+            else:
+                label_index = state.smoother.update((), ())
+            if label_index is None:
+                return
+            detection = self.labels[label_index], float(state.smoother.scores()[label_index])
+
+        if detection is None:
+            return
+        label, confidence = detection
+        state.detected_label = label
+        state.current_sign = label.lower()
+        state.sign_start_time = time.time()
+        state.confidence = confidence
+        if state.on_result is not None:
+            state.on_result(state, label, confidence)
+
+    def stats(self):
+        with self._cond:
+            streams = [state.to_dict() for state in self._streams.values()]
+        return {
+            'streams': streams,
+            'stream_count': len(streams),
+            'aggregate_fps': round(self.fps.rate(), 2),
+            'frames_inferred': self.fps.total,
+            'batches': self.batches,
+            'avg_batch_size': round(self.batch_frames / self.batches, 2) if self.batches else 0.0,
+            'avg_predict_ms': round(1000 * self.predict_seconds / self.batches, 2) if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': round(self.max_wait * 1000, 2),
+        }
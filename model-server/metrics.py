@@ -0,0 +1,205 @@
+"""
+Minimal Prometheus text-format metrics (no client library needed).
+
+Histograms are the only thing touched on hot paths: one bisect and a few
+additions under an uncontended lock per observation. Counters and gauges
+the server already keeps (frames captured, grab failures, sessions, ...)
+are exported through callbacks that are only evaluated when /metrics is
+scraped, so they add nothing per frame.
+
+Under serve.py each process has its own registry. snapshot() turns one
+into plain data that other processes can read, and render(others=...)
+adds their samples to this process's, so any process can serve /metrics
+for the whole deployment.
+"""
+
+import threading
+from bisect import bisect_left
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers sub-millisecond grabs up to multi-second model calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{_escape(v)}"' for n, v in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _HistogramChild:
+    __slots__ = ('_upper', '_counts', '_sum', '_lock')
+
+    def __init__(self, upper):
+        self._upper = upper
+        self._counts = [0] * (len(upper) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self._upper, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Histogram:
+    """Fixed-bucket histogram, optionally split by labels"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, _HistogramChild(self.buckets))
+        return child
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def samples(self):
+        for values, child in sorted(self._children.items()):
+            counts, total = child.snapshot()
+            cumulative = 0
+            for upper, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, [('le', _format_value(upper))])
+                yield f'{self.name}_bucket{labels}', cumulative
+            labels = _format_labels(self.labelnames, values)
+            yield f'{self.name}_sum{labels}', total
+            yield f'{self.name}_count{labels}', cumulative
+
+
+class Counter:
+    """Monotonic counter incremented in place"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+    def samples(self):
+        yield self.name, self._value
+
+
+class CallbackMetric:
+    """Counter or gauge whose value is read from the running server at scrape time.
+
+    fn returns a number, or a dict mapping label-value tuples to numbers.
+    """
+
+    def __init__(self, name, documentation, fn, metric_type='gauge', labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.type = metric_type
+        self.labelnames = tuple(labelnames)
+        self._fn = fn
+
+    def samples(self):
+        value = self._fn()
+        if isinstance(value, dict):
+            for values, number in sorted(value.items()):
+                yield f'{self.name}{_format_labels(self.labelnames, values)}', number
+        elif value is not None:
+            yield self.name, value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS, labelnames=()):
+        return self.register(Histogram(name, documentation, buckets, labelnames))
+
+    def counter(self, name, documentation):
+        return self.register(Counter(name, documentation))
+
+    def callback(self, name, documentation, fn, metric_type='gauge', labelnames=()):
+        return self.register(CallbackMetric(name, documentation, fn, metric_type, labelnames))
+
+    def snapshot(self):
+        """[name, documentation, type, [[sample, value], ...]] per metric; JSON-serializable.
+
+        A metric whose samples could not be read has None instead of samples
+        and the error text as its documentation.
+        """
+        snapshot = []
+        for metric in self._metrics:
+            try:
+                samples = [[name, value] for name, value in metric.samples()]
+            except Exception as e:
+                snapshot.append([metric.name, str(e), metric.type, None])
+                continue
+            snapshot.append([metric.name, metric.documentation, metric.type, samples])
+        return snapshot
+
+    def render(self, others=()):
+        """Prometheus text exposition of every registered metric.
+
+        others are snapshot()s of other processes; samples with the same
+        name and labels are summed (counters, histogram buckets and gauges
+        such as connected clients all add up across processes).
+        """
+        merged = {}
+        for snapshot in (self.snapshot(), *others):
+            for name, documentation, metric_type, samples in snapshot:
+                entry = merged.get(name)
+                if entry is None:
+                    entry = merged[name] = [documentation, metric_type, {} if samples is not None else None]
+                if samples is None or entry[2] is None:
+                    continue
+                values = entry[2]
+                for sample, value in samples:
+                    values[sample] = values.get(sample, 0) + value
+        lines = []
+        for name, (documentation, metric_type, values) in merged.items():
+            if values is None:
+                lines.append(f'# {name} unavailable: {_escape(documentation)}')
+                continue
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            lines.extend(f'{sample} {_format_value(value)}' for sample, value in values.items())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,276 @@
+"""
+Encode-once MJPEG broadcaster for /video_feed.
+
+A single encoder thread takes frames from the FrameHub at a paced rate,
+resizes and JPEG-encodes each one once, and fans the same bytes out to every
+connected viewer. Viewers only ever see the latest encoded frame: a client
+that falls behind skips the frames it missed instead of queuing them.
+Web workers relay the owner's stream the same way (owner_ipc.MjpegRelay).
+"""
+
+import io
+import threading
+import time
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = None
+    ImageDraw = None
+
+BOUNDARY = b'--frame'
+
+# Placeholder name -> caption rendered on a black frame
+PLACEHOLDER_TEXT = {
+    'no_camera': 'Camera Not Available',
+    'disconnected': 'Camera Disconnected',
+    'frame_error': 'Frame Error',
+}
+
+
+def multipart_chunk(jpeg_bytes):
+    """Wrap JPEG bytes as one part of a multipart/x-mixed-replace stream"""
+    return (BOUNDARY + b'\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n' % len(jpeg_bytes)
+            + jpeg_bytes + b'\r\n')
+
+
+def iter_multipart(stream):
+    """Yield the JPEG bytes of each part of a multipart_chunk() stream read from a file-like object"""
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        if line.rstrip(b'\r\n') != BOUNDARY:
+            continue
+        length = None
+        while True:
+            header = stream.readline()
+            if not header:
+                return
+            header = header.strip()
+            if not header:
+                break
+            name, _, value = header.partition(b':')
+            if name.strip().lower() == b'content-length':
+                length = int(value)
+        if length is None:
+            # Parts are only delimited by their length here; skip to the next boundary
+            continue
+        data = stream.read(length)
+        if len(data) < length:
+            return
+        yield data
+
+
+class MjpegSubscriber:
+    """One viewer's cursor into the broadcaster's latest-frame slot"""
+
+    def __init__(self, broadcaster):
+        self._broadcaster = broadcaster
+        self.last_seq = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+    def next_frame(self, timeout=1.0):
+        """Return the next encoded JPEG, or None if nothing arrived in time"""
+        seq, jpeg = self._broadcaster.wait_for_jpeg(self.last_seq, timeout)
+        if jpeg is None:
+            return None
+        if self.last_seq and seq > self.last_seq + 1:
+            self.frames_dropped += seq - self.last_seq - 1
+        self.last_seq = seq
+        self.frames_sent += 1
+        return jpeg
+
+    def close(self):
+        self._broadcaster.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JpegFanout:
+    """Latest-JPEG slot shared by all viewers, filled by a thread that runs only while someone watches.
+
+    Subclasses implement _run(), calling _publish() for each JPEG and
+    returning once _idle() reports that the last viewer left.
+    """
+
+    thread_name = 'mjpeg-fanout'
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._jpeg = None
+        self._seq = 0
+        self._subscribers = set()
+        self._thread = None
+
+    @property
+    def subscriber_count(self):
+        with self._cond:
+            return len(self._subscribers)
+
+    def subscribe(self):
+        """Register a viewer; the producer thread runs only while someone watches"""
+        subscriber = MjpegSubscriber(self)
+        with self._cond:
+            self._subscribers.add(subscriber)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._cond:
+            self._subscribers.discard(subscriber)
+
+    def wait_for_jpeg(self, last_seq=0, timeout=1.0):
+        """Block until a JPEG newer than last_seq is available; returns (seq, bytes)"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._seq <= last_seq or self._jpeg is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return self._seq, None
+                self._cond.wait(remaining)
+            return self._seq, self._jpeg
+
+    def _publish(self, jpeg):
+        with self._cond:
+            self._jpeg = jpeg
+            self._seq += 1
+            self._cond.notify_all()
+
+    def _idle(self):
+        """True (and the thread is released) once nobody is watching"""
+        with self._cond:
+            if self._subscribers:
+                return False
+            self._thread = None
+            self._jpeg = None
+            return True
+
+    def _run(self):
+        raise NotImplementedError
+
+
+class MjpegBroadcaster(JpegFanout):
+    """Encodes hub frames once at target_fps and shares the bytes with all viewers"""
+
+    thread_name = 'mjpeg-encoder'
+
+    def __init__(self, frame_hub, target_fps=15.0, jpeg_quality=80, size=(640, 480),
+                 encode_histogram=None):
+        super().__init__()
+        self._hub = frame_hub
+        self.target_fps = target_fps
+        self.jpeg_quality = jpeg_quality
+        self.size = size
+        self.frames_encoded = 0
+        self.encode_seconds = 0.0
+        # Optional metrics.Histogram fed with the duration of each JPEG encode
+        self.encode_histogram = encode_histogram
+
+    def encode(self, frame):
+        """Resize (only if needed) and JPEG-encode one frame"""
+        width, height = self.size
+        if frame.shape[1] != width or frame.shape[0] != height:
+            frame = cv2.resize(frame, (width, height))
+        ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, int(self.jpeg_quality)])
+        if not ok:
+            return None
+        return buffer.tobytes()
+
+    def _run(self):
+        interval = 1.0 / self.target_fps if self.target_fps > 0 else 0.0
+        last_frame_seq = 0
+        next_tick = time.monotonic()
+        while True:
+            if self._idle():
+                # Nobody watching: stop encoding until the next subscribe()
+                return
+
+            last_frame_seq, frame = self._hub.wait_for_frame(last_frame_seq, timeout=1.0)
+            if frame is None:
+                continue
+
+            try:
+                started = time.perf_counter()
+                jpeg = self.encode(frame)
+                elapsed = time.perf_counter() - started
+                self.encode_seconds += elapsed
+                if self.encode_histogram is not None:
+                    self.encode_histogram.observe(elapsed)
+            except Exception as e:
+                print(f"[Encode Error] {e}")
+                jpeg = None
+
+            if jpeg is not None:
+                self.frames_encoded += 1
+                self._publish(jpeg)
+
+            # Pace the encoder to target_fps instead of spinning on every captured frame
+            if interval:
+                next_tick = max(next_tick + interval, time.monotonic())
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+
+class PlaceholderFrames:
+    """Pre-rendered JPEGs shown when there is no live frame to stream.
+
+    Each placeholder is rendered and encoded once, then the same bytes are
+    served at a low fixed rate so idle or degraded streams cost almost no CPU.
+    """
+
+    def __init__(self, size=(640, 480), fps=2.0):
+        self.size = size
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self._cache = {}
+        self._lock = threading.Lock()
+        for name in PLACEHOLDER_TEXT:
+            self.get(name)
+
+    def get(self, name):
+        jpeg = self._cache.get(name)
+        if jpeg is None:
+            with self._lock:
+                jpeg = self._cache.get(name)
+                if jpeg is None:
+                    jpeg = self._render(PLACEHOLDER_TEXT.get(name, ''))
+                    self._cache[name] = jpeg
+        return jpeg
+
+    def _render(self, text):
+        width, height = self.size
+        if cv2 is not None:
+            frame = np.zeros((height, width, 3), dtype=np.uint8)
+            if text:
+                cv2.putText(frame, text, (50, height // 2),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            ok, buffer = cv2.imencode('.jpg', frame)
+            if ok:
+                return buffer.tobytes()
+
+        img = Image.new('RGB', (width, height), color='black')
+        if text:
+            ImageDraw.Draw(img).text((50, height // 2), text, fill='white')
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG')
+        return buffer.getvalue()
+
+    def wait(self):
+        """Sleep one placeholder frame interval"""
+        if self.interval:
+            time.sleep(self.interval)
@@ -0,0 +1,359 @@
+"""
+Offline evaluation: run the sign detector over a recorded video file or an
+image directory instead of the live camera.
+
+Frames are streamed from disk by a generator (a clip is never held in
+memory) in contiguous chunks that a pool of worker processes runs through
+the same detector backends as the server (detectors.load_detector). Each
+worker opens the source itself, so only chunk bounds and boxes cross
+process boundaries, never frames. The main process then applies the
+server's label logic in frame order: inference.parse_result for the raw
+top detection and, unless --smoothing-window 0, the same TemporalSmoother
+that decides current_sign in detect_loop.
+
+Output has one row per box (class_id -1 for frames without boxes):
+    frame, timestamp, class_id, confidence, label, x1, y1, x2, y2, sign
+where sign is the session's current sign after that frame. The format
+follows the --output extension: .csv (readable by
+benchmarks/bench_smoothing.py --predictions), .npz, or .parquet (needs
+pyarrow).
+
+Usage (from model-server/):
+    python offline_eval.py recording.mp4 --output detections.csv [--workers 4]
+    python offline_eval.py frames_dir/ --backend onnx --output detections.npz
+    python offline_eval.py recording.mp4 --workers 1 --workers 2 --workers 4   # throughput per worker count
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+from detectors import BACKENDS, Boxes, DetectionResult, load_detector
+from inference import parse_result
+from smoothing import TemporalSmoother, to_numpy
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+COLUMNS = ('frame', 'timestamp', 'class_id', 'confidence', 'label', 'x1', 'y1', 'x2', 'y2', 'sign')
+
+
+def list_images(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def _open_video(path):
+    if cv2 is None:
+        raise RuntimeError("OpenCV is required to read video files")
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video: {path}")
+    return cap
+
+
+def probe(path, default_fps=30.0, exact=False):
+    """Return (frame_count, fps) for a video file or image directory.
+
+    The container's frame count is an estimate for many files (it is
+    derived from duration x fps); exact=True counts by decoding instead.
+    """
+    if os.path.isdir(path):
+        return len(list_images(path)), default_fps
+    cap = _open_video(path)
+    try:
+        count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or default_fps
+        if exact or count <= 0:
+            # Container without a (trustworthy) frame count: decode once to count
+            count = 0
+            while cap.grab():
+                count += 1
+        return count, fps
+    finally:
+        cap.release()
+
+
+def iter_frames(path, start=0, stop=None):
+    """Yield (index, BGR frame) for frames start..stop-1 of a video file or image directory"""
+    if os.path.isdir(path):
+        for index, image_path in enumerate(list_images(path)[start:stop], start):
+            if cv2 is not None:
+                frame = cv2.imread(image_path)
+            else:
+                from PIL import Image
+                frame = np.asarray(Image.open(image_path).convert('RGB'))[..., ::-1].copy()
+            if frame is None:
+                print(f"⚠️ Skipping unreadable image: {image_path}")
+                continue
+            yield index, frame
+        return
+
+    cap = _open_video(path)
+    try:
+        if start and not _seek(cap, start):
+            # Seeking is unsupported or overshot: decode from the first frame instead
+            cap.release()
+            cap = _open_video(path)
+            for _ in range(start):
+                if not cap.grab():
+                    return
+        index = start
+        while stop is None or index < stop:
+            success, frame = cap.read()
+            if not success:
+                break
+            yield index, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def _seek(cap, index):
+    """Position cap so the next read() returns frame index; False if that cannot be done.
+
+    Depending on backend and codec, setting CAP_PROP_POS_FRAMES may land on
+    the keyframe before index, so check where it went and grab forward.
+    """
+    if not cap.set(cv2.CAP_PROP_POS_FRAMES, index):
+        return False
+    position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    if position < 0 or position > index:
+        return False
+    for _ in range(index - position):
+        if not cap.grab():
+            return False
+    return True
+
+
+# Per-process detector, loaded once by the pool initializer
+_detector = None
+
+
+def _init_worker(backend, weights, threads):
+    global _detector
+    _detector = load_detector(backend, weights, threads=threads)
+
+
+def _run_chunk(task):
+    """Detect on one chunk; returns (start, [(frame, xyxy, conf, cls), ...], busy_seconds)"""
+    path, start, stop, batch_size = task
+    started = time.perf_counter()
+    detections = []
+    batch = []
+
+    def flush():
+        results = _detector.predict(source=[frame for _, frame in batch], stream=False, verbose=False)
+        for (index, _), result in zip(batch, results):
+            boxes = result.boxes if result is not None else None
+            if boxes is None or not len(boxes):
+                detections.append((index, np.empty((0, 4), np.float32), np.empty(0, np.float32),
+                                   np.empty(0, np.intp)))
+            else:
+                detections.append((index, to_numpy(boxes.xyxy).astype(np.float32).reshape(-1, 4),
+                                   to_numpy(boxes.conf).astype(np.float32),
+                                   to_numpy(boxes.cls).astype(np.intp)))
+        batch.clear()
+
+    for item in iter_frames(path, start, stop):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return start, detections, time.perf_counter() - started
+
+
+def _worker_names():
+    return _detector.names
+
+
+class SignTracker:
+    """current_sign over time, decided exactly as InferenceEngine._route does"""
+
+    def __init__(self, names, min_confidence=0.5, smoothing_window=8, enter=0.5, exit=0.25,
+                 smoothing_seconds=None):
+        self.names = names
+        self.min_confidence = min_confidence
+        self.smoother = (TemporalSmoother(max(names) + 1, window=smoothing_window, enter_threshold=enter,
+                                          exit_threshold=exit, window_seconds=smoothing_seconds)
+                         if smoothing_window > 0 and names else None)
+        self.current_sign = 'none'
+        self.raw_detections = 0
+        self.changes = 0
+
+    def update(self, xyxy, conf, cls, timestamp=None):
+        result = DetectionResult(Boxes(xyxy, conf, cls), self.names, None)
+        detection = parse_result(result, self.names, self.min_confidence)
+        if detection is not None:
+            self.raw_detections += 1
+        if self.smoother is not None:
+            label_index = self.smoother.update(cls, conf, timestamp)
+            detection = None if label_index is None else (self.names[label_index], None)
+        if detection is not None:
+            sign = detection[0].lower()
+            if sign != self.current_sign:
+                self.changes += 1
+            self.current_sign = sign
+        return self.current_sign
+
+
+def evaluate(path, backend='ultralytics', weights=None, workers=1, chunk_size=256, batch_size=8,
+             threads=0, min_confidence=0.5, smoothing_window=8, smoothing_enter=0.5,
+             smoothing_exit=0.25, default_fps=30.0, smoothing_seconds=None, exact_count=False):
+    """Run the detector over path; returns (columns dict of NumPy arrays, summary dict)"""
+    started = time.perf_counter()
+    frame_count, fps = probe(path, default_fps, exact=exact_count)
+    workers = max(1, int(workers))
+    chunk_size = max(1, int(chunk_size))
+    tasks = [(path, start, min(start + chunk_size, frame_count), batch_size)
+             for start in range(0, frame_count, chunk_size)]
+    if tasks and not exact_count:
+        # The probed count may be short: the last chunk reads on to the real end of the video
+        tasks[-1] = tasks[-1][:2] + (None,) + tasks[-1][3:]
+
+    # Workers are spawned (not forked) so torch / onnxruntime thread pools start clean
+    context = multiprocessing.get_context('spawn')
+    busy = 0.0
+    chunks = []
+    with context.Pool(workers, initializer=_init_worker, initargs=(backend, weights, threads)) as pool:
+        # Also waits for the first worker to finish loading the model
+        names = pool.apply(_worker_names)
+        loaded = time.perf_counter()
+        # imap keeps chunk order, so smoothing below sees frames in sequence
+        for _, detections, seconds in pool.imap(_run_chunk, tasks):
+            busy += seconds
+            chunks.append(detections)
+    detect_seconds = time.perf_counter() - loaded
+
+    tracker = SignTracker(names, min_confidence, smoothing_window, smoothing_enter, smoothing_exit,
+                          smoothing_seconds)
+    rows = {name: [] for name in COLUMNS}
+    frames = 0
+    for detections in chunks:
+        for index, xyxy, conf, cls in detections:
+            frames += 1
+            # Video time, so a time window covers the same span as it would live
+            sign = tracker.update(xyxy, conf, cls, index / fps)
+            boxes = list(zip(xyxy, conf, cls)) or [((np.nan,) * 4, np.nan, -1)]
+            for box, confidence, class_id in boxes:
+                rows['frame'].append(index)
+                rows['timestamp'].append(index / fps)
+                rows['class_id'].append(int(class_id))
+                rows['confidence'].append(float(confidence))
+                rows['label'].append(names[int(class_id)] if class_id >= 0 else '')
+                for name, value in zip(('x1', 'y1', 'x2', 'y2'), box):
+                    rows[name].append(float(value))
+                rows['sign'].append(sign)
+
+    columns = {
+        'frame': np.asarray(rows['frame'], np.int64),
+        'timestamp': np.asarray(rows['timestamp'], np.float64),
+        'class_id': np.asarray(rows['class_id'], np.int64),
+        'confidence': np.asarray(rows['confidence'], np.float32),
+        'label': np.asarray(rows['label'], dtype=str),
+        'x1': np.asarray(rows['x1'], np.float32),
+        'y1': np.asarray(rows['y1'], np.float32),
+        'x2': np.asarray(rows['x2'], np.float32),
+        'y2': np.asarray(rows['y2'], np.float32),
+        'sign': np.asarray(rows['sign'], dtype=str),
+    }
+    summary = {
+        'source': path,
+        'backend': backend,
+        'workers': workers,
+        'frames': frames,
+        'video_fps': round(fps, 2),
+        'raw_detections': tracker.raw_detections,
+        'sign_changes': tracker.changes,
+        'startup_seconds': round(loaded - started, 2),
+        'detect_seconds': round(detect_seconds, 2),
+        'throughput_fps': round(frames / detect_seconds, 1) if detect_seconds > 0 else 0.0,
+        'per_worker_fps': round(frames / busy, 1) if busy > 0 else 0.0,
+    }
+    return columns, summary
+
+
+def write_output(path, columns):
+    """Write columns as CSV, NPZ or Parquet depending on the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npz':
+        np.savez_compressed(path, **columns)
+    elif extension == '.parquet':
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("❌ Parquet output needs pyarrow (pip install pyarrow)")
+        table = pyarrow.table({name: values for name, values in columns.items()})
+        pyarrow.parquet.write_table(table, path)
+    elif extension == '.csv':
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for row in zip(*(columns[name] for name in COLUMNS)):
+                writer.writerow(['' if isinstance(v, float) and v != v else v for v in
+                                 (value.item() if hasattr(value, 'item') else value for value in row)])
+    else:
+        raise SystemExit(f"❌ Unsupported output format '{extension}' (use .csv, .npz or .parquet)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help='video file or directory of images')
+    parser.add_argument('--output', '-o', help='detections file (.csv, .npz or .parquet)')
+    parser.add_argument('--backend', default=os.getenv('DETECTOR_BACKEND', 'ultralytics'), choices=BACKENDS)
+    parser.add_argument('--weights', default=os.getenv('MODEL_PATH') or None)
+    parser.add_argument('--workers', type=int, action='append',
+                        help='worker processes; repeat to compare throughput (default: 1)')
+    parser.add_argument('--threads', type=int, default=int(os.getenv('DETECTOR_THREADS', 0)),
+                        help='intra-op threads per worker (0 = runtime default)')
+    parser.add_argument('--chunk-size', type=int, default=256, help='frames per worker task')
+    parser.add_argument('--batch-size', type=int, default=int(os.getenv('INFERENCE_MAX_BATCH', 8)))
+    parser.add_argument('--min-confidence', type=float, default=0.5)
+    parser.add_argument('--smoothing-window', type=int, default=int(os.getenv('SMOOTHING_WINDOW', 8)))
+    parser.add_argument('--smoothing-seconds', type=float, default=float(os.getenv('SMOOTHING_SECONDS', 0.8)),
+                        help='smoothing window in seconds of video (0 = --smoothing-window frames)')
+    parser.add_argument('--smoothing-enter', type=float, default=float(os.getenv('SMOOTHING_ENTER', 0.5)))
+    parser.add_argument('--smoothing-exit', type=float, default=float(os.getenv('SMOOTHING_EXIT', 0.25)))
+    parser.add_argument('--fps', type=float, default=30.0, help='frame rate for image directories')
+    parser.add_argument('--exact-count', action='store_true',
+                        help='count video frames by decoding instead of trusting the container (one extra pass)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        raise SystemExit(f"❌ Not found: {args.source}")
+
+    results = []
+    for workers in args.workers or [1]:
+        columns, summary = evaluate(args.source, args.backend, args.weights, workers, args.chunk_size,
+                                    args.batch_size, args.threads, args.min_confidence,
+                                    args.smoothing_window, args.smoothing_enter, args.smoothing_exit,
+                                    args.fps, args.smoothing_seconds or None, args.exact_count)
+        results.append(summary)
+        print(f"✅ {summary['frames']} frames with {workers} worker(s): {summary['throughput_fps']} FPS "
+              f"({summary['per_worker_fps']} FPS per busy worker, {summary['startup_seconds']}s startup), "
+              f"{summary['raw_detections']} detections, {summary['sign_changes']} sign changes")
+
+    if len(results) > 1:
+        print(f"\n{'workers':>8} {'frames':>8} {'detect s':>9} {'FPS':>8} {'speedup':>8}")
+        base = results[0]['throughput_fps'] or 1.0
+        for summary in results:
+            print(f"{summary['workers']:>8} {summary['frames']:>8} {summary['detect_seconds']:>9} "
+                  f"{summary['throughput_fps']:>8} {summary['throughput_fps'] / base:>7.2f}x")
+
+    if args.output:
+        write_output(args.output, columns)
+        print(f"💾 Wrote {len(columns['frame'])} rows to {args.output}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+Local IPC between stateless web workers and the owner process.
+
+In production (serve.py) one owner process holds the camera, detector,
+speech worker and per-session state; any number of web worker processes
+serve GIFs and text-to-sign themselves and talk to the owner over HTTP on
+a Unix domain socket ("unix:/path") or a loopback port ("127.0.0.1:5001").
+Routes the workers do not handle are forwarded as-is, except /internal/*
+and unknown URLs, which the workers answer with 404 themselves. Every
+request a worker sends carries OWNER_SECRET_HEADER, and the owner rejects
+requests without it, so the owner address is not an open back door even if
+it becomes reachable.
+
+Streams are not forwarded per client, since each one would hold an owner
+thread for its whole lifetime. Each worker instead keeps one connection for
+sign events (EventRelay, mirroring the owner's bus into the worker's own)
+and, while anyone watches, one /video_feed connection (MjpegRelay), and
+fans both out to its own clients.
+"""
+
+import hmac
+import http.client
+import json
+import logging
+import socket
+import threading
+import time
+from urllib.parse import quote
+
+from flask import Response
+
+from mjpeg import JpegFanout, iter_multipart
+
+logger = logging.getLogger(__name__)
+
+# Headers that describe a single connection and must not be forwarded
+HOP_BY_HOP = {'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te',
+              'trailer', 'trailers', 'transfer-encoding', 'upgrade', 'host', 'content-length'}
+
+# Carries the per-deployment secret (OWNER_SECRET) from workers to the owner
+OWNER_SECRET_HEADER = 'X-Owner-Secret'
+
+
+def is_internal_path(path):
+    return path == '/internal' or path.startswith('/internal/')
+
+
+def secret_matches(headers, secret):
+    """True if headers carry the owner secret (constant-time compare)"""
+    return bool(secret) and hmac.compare_digest(headers.get(OWNER_SECRET_HEADER, '').encode(), secret.encode())
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket"""
+
+    def __init__(self, path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.unix_path)
+        self.sock = sock
+
+
+class OwnerClient:
+    """Talks to the owner process at address ("unix:/path" or "host:port")"""
+
+    def __init__(self, address, timeout=30.0, secret=''):
+        self.address = address
+        self.timeout = timeout
+        self.secret = secret
+        self.forwarded = 0
+        self.errors = 0
+
+    def _connection(self):
+        if self.address.startswith('unix:'):
+            return UnixHTTPConnection(self.address[len('unix:'):], timeout=self.timeout)
+        host, _, port = self.address.rpartition(':')
+        return http.client.HTTPConnection(host or '127.0.0.1', int(port), timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None):
+        """Send a request; returns (connection, response) - close the connection when done"""
+        headers = dict(headers or {})
+        if self.secret:
+            headers[OWNER_SECRET_HEADER] = self.secret
+        conn = self._connection()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            return conn, conn.getresponse()
+        except Exception:
+            conn.close()
+            self.errors += 1
+            raise
+
+    def call(self, method, path, payload=None):
+        """JSON request/response helper for internal endpoints"""
+        body = json.dumps(payload) if payload is not None else None
+        conn, response = self.request(method, path, body, {'Content-Type': 'application/json'})
+        try:
+            data = response.read()
+            if response.status >= 400:
+                raise RuntimeError(f"owner returned {response.status} for {path}")
+            return json.loads(data) if data else None
+        finally:
+            conn.close()
+
+    def forward(self, request):
+        """Proxy a Flask request to the owner and stream the response back"""
+        headers = {k: v for k, v in request.headers.items()
+                   if k.lower() not in HOP_BY_HOP and k.lower() != OWNER_SECRET_HEADER.lower()}
+        forwarded_for = request.headers.get('X-Forwarded-For')
+        client = request.remote_addr or ''
+        headers['X-Forwarded-For'] = f'{forwarded_for}, {client}' if forwarded_for else client
+        path = request.full_path if request.query_string else request.path
+        try:
+            conn, response = self.request(request.method, path, request.get_data() or None, headers)
+        except OSError as e:
+            return Response(json.dumps({'success': False, 'error': f'Owner process unavailable: {e}'}),
+                            status=503, mimetype='application/json')
+        self.forwarded += 1
+
+        def body():
+            try:
+                while True:
+                    # read1 returns whatever has arrived, so SSE and MJPEG frames are not held back
+                    chunk = response.read1(65536)
+                    if not chunk:
+                        break
+                    yield chunk
+            except OSError:
+                pass
+            finally:
+                conn.close()
+
+        response_headers = [(k, v) for k, v in response.getheaders() if k.lower() not in HOP_BY_HOP]
+        return Response(body(), status=response.status, headers=response_headers, direct_passthrough=True)
+
+    def set_session_sign(self, session_id, sign, source, label=None):
+        return self.call('POST', '/internal/session-sign', {
+            'session_id': session_id, 'sign': sign, 'source': source, 'label': label,
+        })
+
+    def session_snapshot(self, session_id):
+        """Current sign state of a session, for the first message of a worker-served /api/events stream"""
+        return self.call('GET', f'/internal/session-snapshot?session_id={quote(session_id)}')
+
+
+class EventRelay:
+    """Mirrors the owner's sign events into this worker's SignEventBus over one connection.
+
+    Reconnects with backoff and resumes from the mirror's version, so local
+    /api/events clients survive an owner restart (they get a snapshot).
+    Events without a session_id are control messages for the worker itself
+    and are passed to on_control.
+    """
+
+    def __init__(self, client, bus, on_control=None, retry=0.5, max_retry=10.0):
+        self._client = client
+        self._bus = bus
+        self.on_control = on_control
+        self.retry = retry
+        self.max_retry = max_retry
+        # Well under the client timeout, so an idle stream never times out
+        self.heartbeat = max(1.0, min(15.0, client.timeout / 2))
+        self._thread = None
+        self.connected = False
+        self.reconnects = 0
+        self.relayed = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='event-relay', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        delay = self.retry
+        while True:
+            try:
+                conn, response = self._client.request(
+                    'GET', f'/internal/events?since={self._bus.version}&heartbeat={self.heartbeat}')
+            except OSError:
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_retry)
+                continue
+            try:
+                if response.status != 200:
+                    raise OSError(f'owner returned {response.status}')
+                self.connected = True
+                delay = self.retry
+                for line in response:
+                    self._handle(json.loads(line))
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Event relay from owner interrupted: {e}")
+            finally:
+                conn.close()
+                self.connected = False
+            self.reconnects += 1
+            time.sleep(delay)
+
+    def _handle(self, message):
+        kind = message.get('type')
+        if kind == 'reset':
+            self._bus.reset(message['version'])
+        elif kind == 'event':
+            event = message['event']
+            self._bus.append(event)
+            self.relayed += 1
+            if event.get('session_id') is None and self.on_control is not None:
+                try:
+                    self.on_control(event)
+                except Exception as e:
+                    logger.error(f"❌ Control event {event.get('type')} failed: {e}")
+
+
+class MjpegRelay(JpegFanout):
+    """One upstream /video_feed connection per worker, shared by all of its viewers"""
+
+    thread_name = 'mjpeg-relay'
+
+    def __init__(self, client, path='/video_feed', retry=1.0):
+        super().__init__()
+        self._client = client
+        self.path = path
+        self.retry = retry
+        self.frames_relayed = 0
+        self.reconnects = 0
+
+    def _run(self):
+        while not self._idle():
+            try:
+                conn, response = self._client.request('GET', self.path)
+            except OSError:
+                time.sleep(self.retry)
+                continue
+            try:
+                for jpeg in iter_multipart(response):
+                    self.frames_relayed += 1
+                    self._publish(jpeg)
+                    with self._cond:
+                        if not self._subscribers:
+                            break
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Video relay from owner interrupted: {e}")
+            finally:
+                conn.close()
+            with self._cond:
+                reconnect = bool(self._subscribers)
+            if reconnect:
+                self.reconnects += 1
+                time.sleep(self.retry)
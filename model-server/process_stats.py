@@ -0,0 +1,126 @@
+"""
+Stats snapshots shared between the processes of a serve.py deployment.
+
+Each web worker keeps its own text-to-sign cache and counters, so asking
+any single process only describes that process. Every process instead
+writes a JSON snapshot of its registered stats to SHARED_STATE_DIR (created
+by serve.py) every few seconds; a stats request served by any process
+merges its own fresh values with the snapshots of the other processes that
+are still alive. Snapshots of exited processes are deleted on read.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessStats:
+    """Publishes this process's stats to directory and reads everyone else's"""
+
+    def __init__(self, directory, interval=5.0):
+        self.directory = directory
+        self.interval = interval
+        self.pid = os.getpid()
+        self._sources = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, f'stats-{self.pid}.json')
+
+    def register(self, name, collect):
+        """collect() returns a JSON-serializable value published under name"""
+        self._sources[name] = collect
+
+    def snapshot(self):
+        values = {}
+        for name, collect in self._sources.items():
+            try:
+                values[name] = collect()
+            except Exception as e:
+                logger.warning(f"⚠️ Stats source {name} failed: {e}")
+        return values
+
+    def publish(self):
+        """Write this process's snapshot now (atomically, so readers never see half a file)"""
+        data = json.dumps({'pid': self.pid, 'time': time.time(), 'stats': self.snapshot()})
+        tmp = f'{self.path}.tmp'
+        with self._lock:
+            with open(tmp, 'w') as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='process-stats', daemon=True)
+            self._thread.start()
+            atexit.register(self.remove)
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                self.publish()
+            except OSError as e:
+                logger.warning(f"⚠️ Could not publish stats to {self.directory}: {e}")
+            time.sleep(self.interval)
+
+    def remove(self):
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def collect(self, name):
+        """Values of name from every live process, this one first (read fresh, not from disk)"""
+        collect = self._sources.get(name)
+        own = collect() if collect is not None else None
+        return ([own] if own is not None else []) + self.others(name)
+
+    def others(self, name):
+        """Values of name published by the other live processes"""
+        values = []
+        try:
+            entries = os.listdir(self.directory)
+        except OSError:
+            return values
+        for entry in entries:
+            if not (entry.startswith('stats-') and entry.endswith('.json')):
+                continue
+            try:
+                pid = int(entry[len('stats-'):-len('.json')])
+            except ValueError:
+                continue
+            path = os.path.join(self.directory, entry)
+            if pid == self.pid:
+                continue
+            if not pid_alive(pid):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path) as f:
+                    value = json.load(f)['stats'].get(name)
+            except (OSError, ValueError, KeyError):
+                continue
+            if value is not None:
+                values.append(value)
+        return values
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
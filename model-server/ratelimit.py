@@ -0,0 +1,281 @@
+"""
+Keyed rate limiting.
+
+Replaces the ever-growing last_spoken dict: each (scope, key) may pass at
+most `limit` times per `window` seconds, measured on the monotonic clock.
+Entries sit in an OrderedDict in the order their windows started, so
+expired ones are dropped from the front as part of every check (amortized
+O(1)) and the table never holds more than max_keys entries.
+
+SharedRateLimiter keeps the same counters in a file-backed table so that
+every process of a serve.py deployment enforces one shared limit.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def parse_rate(value, default_window=60.0):
+    """Parse "30/60" (30 events per 60 s) or "30" into (limit, window); "0" or "" disables"""
+    value = (value or '').strip()
+    if not value:
+        return 0, default_window
+    limit, _, window = value.partition('/')
+    return int(limit), float(window) if window else default_window
+
+
+class RateLimiter:
+    """At most `limit` events per `window` seconds for each (scope, key)"""
+
+    def __init__(self, limit=1, window=4.0, max_keys=10000, clock=time.monotonic):
+        self.limit = max(1, int(limit))
+        self.window = float(window)
+        self.max_keys = max(1, int(max_keys))
+        self._clock = clock
+        # (scope, key) -> [window_start, count], oldest window first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.passed = 0
+        self.suppressed = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expire(self, now):
+        entries = self._entries
+        while entries:
+            start, _ = next(iter(entries.values()))
+            if now - start < self.window:
+                break
+            entries.popitem(last=False)
+            self.expired += 1
+
+    def allow(self, key, scope=None):
+        """Count one event for key; True if it is within the limit"""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get((scope, key))
+            if entry is None:
+                if len(self._entries) >= self.max_keys:
+                    self._entries.popitem(last=False)
+                    self.evicted += 1
+                self._entries[(scope, key)] = [now, 1]
+                self.passed += 1
+                return True
+            if entry[1] < self.limit:
+                entry[1] += 1
+                self.passed += 1
+                return True
+            self.suppressed += 1
+            return False
+
+    def retry_after(self, key, scope=None):
+        """Seconds until key may pass again (0 if it may pass now)"""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get((scope, key))
+            if entry is None or entry[1] < self.limit:
+                return 0.0
+            return max(0.0, self.window - (now - entry[0]))
+
+    def reset(self, scope=None):
+        """Forget every key, or only the keys of one scope"""
+        with self._lock:
+            if scope is None:
+                self._entries.clear()
+            else:
+                for entry_key in [k for k in self._entries if k[0] == scope]:
+                    del self._entries[entry_key]
+
+    def stats(self):
+        total = self.passed + self.suppressed
+        return {
+            'limit': self.limit,
+            'window_seconds': self.window,
+            'tracked_keys': len(self._entries),
+            'max_keys': self.max_keys,
+            'passed': self.passed,
+            'suppressed': self.suppressed,
+            'suppressed_pct': round(100.0 * self.suppressed / total, 1) if total else 0.0,
+            'expired': self.expired,
+            'evicted': self.evicted,
+        }
+
+
+def _digest(value):
+    """Stable 64-bit hash (hash() is salted per process); never 0, which marks a free slot"""
+    return int.from_bytes(hashlib.blake2b(repr(value).encode(), digest_size=8).digest(), 'little') or 1
+
+
+class SharedRateLimiter:
+    """RateLimiter whose table lives in a file that several processes map at once.
+
+    The file holds the passed/suppressed/expired/evicted counters followed
+    by max_keys slots of (key hash, scope hash, window start, count). Keys
+    are placed by open addressing over a short probe run, so a lookup reads
+    at most PROBES slots; a full run evicts its oldest window. Every access
+    takes an flock on the file plus a thread lock (flock does not separate
+    threads sharing one descriptor). Window starts use time.monotonic, which
+    is system-wide, so all processes must run on the same host.
+    """
+
+    HEADER = struct.Struct('<4q')
+    SLOT = struct.Struct('<QQdq')
+    PROBES = 8
+
+    def __init__(self, path, limit=1, window=4.0, max_keys=10000, clock=time.monotonic):
+        if fcntl is None:
+            raise RuntimeError('SharedRateLimiter needs fcntl (Linux/macOS)')
+        self.path = path
+        self.limit = max(1, int(limit))
+        self.window = float(window)
+        self.max_keys = max(1, int(max_keys))
+        self._clock = clock
+        self._lock = threading.Lock()
+        size = self.HEADER.size + self.max_keys * self.SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size:
+                # New file, or one written with another RATE_LIMIT_MAX_KEYS: start from an empty table
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _counters(self):
+        return list(self.HEADER.unpack_from(self._map, 0))
+
+    def _count(self, index):
+        counters = self._counters()
+        counters[index] += 1
+        self.HEADER.pack_into(self._map, 0, *counters)
+
+    def _expired(self, start, now):
+        # A start in the future can only be left over from before a reboot
+        return now - start >= self.window or start > now
+
+    def _probe(self, key_hash):
+        base = key_hash % self.max_keys
+        for i in range(min(self.PROBES, self.max_keys)):
+            offset = self.HEADER.size + ((base + i) % self.max_keys) * self.SLOT.size
+            yield offset, self.SLOT.unpack_from(self._map, offset)
+
+    def _find(self, key_hash):
+        for offset, slot in self._probe(key_hash):
+            if slot[0] == key_hash:
+                return offset, slot
+        return None, None
+
+    def allow(self, key, scope=None):
+        """Count one event for key; True if it is within the limit"""
+        key_hash, scope_hash = _digest((scope, key)), _digest(scope)
+        now = self._clock()
+        with self._locked():
+            free = oldest = None
+            for offset, slot in self._probe(key_hash):
+                if slot[0] == key_hash:
+                    if self._expired(slot[2], now):
+                        self._count(2)
+                        self.SLOT.pack_into(self._map, offset, key_hash, scope_hash, now, 1)
+                    elif slot[3] < self.limit:
+                        self.SLOT.pack_into(self._map, offset, key_hash, scope_hash, slot[2], slot[3] + 1)
+                    else:
+                        self._count(1)
+                        return False
+                    self._count(0)
+                    return True
+                if free is None and (slot[0] == 0 or self._expired(slot[2], now)):
+                    free = (offset, slot)
+                if oldest is None or slot[2] < oldest[1][2]:
+                    oldest = (offset, slot)
+            if free is None:
+                free = oldest
+                self._count(3)
+            elif free[1][0]:
+                self._count(2)
+            self.SLOT.pack_into(self._map, free[0], key_hash, scope_hash, now, 1)
+            self._count(0)
+            return True
+
+    def retry_after(self, key, scope=None):
+        """Seconds until key may pass again (0 if it may pass now)"""
+        now = self._clock()
+        with self._locked():
+            _, slot = self._find(_digest((scope, key)))
+        if slot is None or slot[3] < self.limit or self._expired(slot[2], now):
+            return 0.0
+        return max(0.0, self.window - (now - slot[2]))
+
+    def reset(self, scope=None):
+        """Forget every key, or only the keys of one scope"""
+        scope_hash = _digest(scope)
+        empty = self.SLOT.pack(0, 0, 0.0, 0)
+        with self._locked():
+            for i in range(self.max_keys):
+                offset = self.HEADER.size + i * self.SLOT.size
+                if scope is None or self.SLOT.unpack_from(self._map, offset)[1] == scope_hash:
+                    self._map[offset:offset + self.SLOT.size] = empty
+
+    def __len__(self):
+        now = self._clock()
+        with self._locked():
+            table = memoryview(self._map)[self.HEADER.size:]
+            try:
+                return sum(1 for key_hash, _, start, _ in self.SLOT.iter_unpack(table)
+                           if key_hash and not self._expired(start, now))
+            finally:
+                table.release()
+
+    @property
+    def passed(self):
+        return self._counters()[0]
+
+    @property
+    def suppressed(self):
+        return self._counters()[1]
+
+    def stats(self):
+        tracked = len(self)
+        passed, suppressed, expired, evicted = self._counters()
+        total = passed + suppressed
+        return {
+            'limit': self.limit,
+            'window_seconds': self.window,
+            'tracked_keys': tracked,
+            'max_keys': self.max_keys,
+            'passed': passed,
+            'suppressed': suppressed,
+            'suppressed_pct': round(100.0 * suppressed / total, 1) if total else 0.0,
+            'expired': expired,
+            'evicted': evicted,
+            'shared': True,
+        }
@@ -0,0 +1,153 @@
+"""
+Production launcher: one owner process plus a pool of stateless web workers.
+
+    owner   - SERVER_ROLE=owner, 1 gunicorn process (threaded) on a local
+              address only. Holds the camera, detector, speech worker and
+              per-session state.
+    workers - SERVER_ROLE=worker, WEB_WORKERS gunicorn processes on the
+              public address. Serve GIFs and text-to-sign on every core,
+              fan /api/events and /video_feed out from one relayed owner
+              stream each, and forward all other routes to the owner (see
+              owner_ipc.py).
+
+All processes share SHARED_STATE_DIR (a fresh temporary directory unless
+set) for the text-to-sign rate-limit table and per-process stats, and an
+OWNER_SECRET (random per run unless set) that workers send and the owner
+requires on every request.
+
+If either side exits, the other is stopped too and the launcher exits with
+its code, so the container / process manager restarts the whole set.
+
+Usage (from model-server/, Linux/macOS):
+    python serve.py [--workers 4] [--bind 0.0.0.0:5000] [--owner-address unix:/tmp/cosign-owner.sock]
+"""
+
+import argparse
+import os
+import secrets
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def gunicorn_command(bind, workers, threads, timeout):
+    return [sys.executable, '-m', 'gunicorn', 'app:app',
+            '--chdir', HERE,
+            '--worker-class', 'gthread',
+            '--workers', str(workers),
+            '--threads', str(threads),
+            '--bind', bind,
+            '--timeout', str(timeout),
+            '--graceful-timeout', '10']
+
+
+def wait_for_owner(address, process, timeout=60.0):
+    """Block until the owner accepts connections (it binds before loading the model)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            if address.startswith('unix:'):
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(address[len('unix:'):])
+            else:
+                host, _, port = address.rpartition(':')
+                socket.create_connection((host or '127.0.0.1', int(port)), timeout=1.0).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def cleanup_state_dir(path, created):
+    """Remove the temporary shared state dir; a SHARED_STATE_DIR given by the user is only emptied of stats"""
+    if created:
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    for entry in os.listdir(path):
+        if entry.startswith('stats-'):
+            try:
+                os.unlink(os.path.join(path, entry))
+            except OSError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bind', default=os.getenv('BIND', f"0.0.0.0:{os.getenv('FLASK_PORT', 5000)}"))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_WORKERS', os.cpu_count() or 2)))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', 8)),
+                        help='threads per web worker (streaming clients each hold one)')
+    parser.add_argument('--owner-address', default=os.getenv('OWNER_ADDRESS', '127.0.0.1:5001'),
+                        help='"unix:/path" or "127.0.0.1:port"; never expose this publicly')
+    parser.add_argument('--owner-threads', type=int, default=int(os.getenv('OWNER_THREADS', 32)),
+                        help='raised to at least 2 x workers + 4 to leave room for the stream relays')
+    parser.add_argument('--timeout', type=int, default=int(os.getenv('WORKER_TIMEOUT', 60)))
+    args = parser.parse_args()
+
+    env = dict(os.environ, OWNER_ADDRESS=args.owner_address)
+    env.setdefault('FLASK_ENV', 'production')
+    if not env.get('OWNER_SECRET'):
+        env['OWNER_SECRET'] = secrets.token_urlsafe(32)
+    state_dir = env.get('SHARED_STATE_DIR')
+    created_state_dir = not state_dir
+    if created_state_dir:
+        state_dir = env['SHARED_STATE_DIR'] = tempfile.mkdtemp(prefix='cosign-')
+    else:
+        os.makedirs(state_dir, exist_ok=True)
+    if args.owner_address.startswith('unix:'):
+        try:
+            os.unlink(args.owner_address[len('unix:'):])
+        except FileNotFoundError:
+            pass
+
+    # Each worker holds up to two owner threads for its relays (events, and video while watched)
+    owner_threads = max(args.owner_threads, 2 * args.workers + 4)
+    print(f"🚀 Starting owner process on {args.owner_address} ({owner_threads} threads)")
+    owner = subprocess.Popen(gunicorn_command(args.owner_address, 1, owner_threads, args.timeout),
+                             env=dict(env, SERVER_ROLE='owner'))
+    if not wait_for_owner(args.owner_address, owner):
+        print("❌ Owner process did not come up")
+        owner.terminate()
+        code = owner.wait() or 1
+        cleanup_state_dir(state_dir, created_state_dir)
+        sys.exit(code)
+
+    print(f"🚀 Starting {args.workers} web workers on {args.bind}")
+    web = subprocess.Popen(gunicorn_command(args.bind, args.workers, args.threads, args.timeout),
+                           env=dict(env, SERVER_ROLE='worker', PRELOAD_COMPONENTS='0'))
+    children = [web, owner]
+
+    def shutdown(signum, frame):
+        for child in children:
+            if child.poll() is None:
+                child.send_signal(signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    exit_code = 0
+    while all(child.poll() is None for child in children):
+        time.sleep(0.5)
+    for child in children:
+        if child.poll() is not None and child.returncode:
+            exit_code = child.returncode
+    shutdown(None, None)
+    for child in children:
+        try:
+            child.wait(15)
+        except subprocess.TimeoutExpired:
+            child.kill()
+    cleanup_state_dir(state_dir, created_state_dir)
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
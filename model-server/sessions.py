@@ -0,0 +1,140 @@
+"""
+Per-meeting session state for the model server.
+
+Every /api/* route resolves a session id (one per meeting room) and reads or
+writes that session's state instead of process-wide globals, so one server
+process can host many concurrent rooms. Idle sessions are evicted.
+"""
+
+import threading
+import time
+
+DEFAULT_SESSION_ID = 'default'
+MAX_SESSION_ID_LENGTH = 128
+
+
+class SessionState:
+    """Compact per-session state; guard multi-field updates with .lock"""
+
+    __slots__ = ('session_id', 'current_sign', 'sign_start_time', 'detected_label',
+                 'detected_gif', 'ai_participant_active', 'camera_active',
+                 'created_at', 'last_seen', 'lock')
+
+    def __init__(self, session_id):
+        now = time.time()
+        self.session_id = session_id
+        self.current_sign = 'none'
+        self.sign_start_time = now
+        self.detected_label = "Detecting..."
+        self.detected_gif = "none.gif"
+        self.ai_participant_active = False
+        self.camera_active = False
+        self.created_at = now
+        self.last_seen = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_sign(self, sign, label=None):
+        """Set the current sign (and detected label); returns True if either changed"""
+        with self.lock:
+            changed = sign != self.current_sign
+            self.current_sign = sign
+            self.sign_start_time = time.time()
+            if label is not None:
+                changed = changed or label != self.detected_label
+                self.detected_label = label
+            return changed
+
+    def to_dict(self):
+        return {
+            'session_id': self.session_id,
+            'current_sign': self.current_sign,
+            'detected_label': self.detected_label,
+            'ai_participant_active': self.ai_participant_active,
+            'camera_active': self.camera_active,
+            'idle_seconds': round(time.monotonic() - self.last_seen, 1),
+        }
+
+
+def normalize_session_id(session_id):
+    """Return a safe session id, falling back to the default session"""
+    if not session_id:
+        return DEFAULT_SESSION_ID
+    session_id = str(session_id).strip()[:MAX_SESSION_ID_LENGTH]
+    return session_id or DEFAULT_SESSION_ID
+
+
+class SessionRegistry:
+    """Thread-safe map of session id -> SessionState with idle eviction"""
+
+    def __init__(self, idle_timeout=3600.0, max_sessions=1000, sweep_interval=60.0, pinned=()):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self.pinned = set(pinned)
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.created = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def get(self, session_id=None, create=True):
+        """Return the session (creating it if needed) and mark it as recently used"""
+        session_id = normalize_session_id(session_id)
+        now = time.monotonic()
+        session = self._sessions.get(session_id)
+        if session is None and create:
+            with self._lock:
+                session = self._sessions.get(session_id)
+                if session is None:
+                    if len(self._sessions) >= self.max_sessions:
+                        self._evict_locked(now, force=True)
+                    session = SessionState(session_id)
+                    self._sessions[session_id] = session
+                    self.created += 1
+        if session is not None:
+            session.last_seen = now
+        if now - self._last_sweep >= self.sweep_interval:
+            self.evict_idle()
+        return session
+
+    def remove(self, session_id):
+        with self._lock:
+            return self._sessions.pop(normalize_session_id(session_id), None)
+
+    def sessions(self):
+        with self._lock:
+            return list(self._sessions.values())
+
+    def evict_idle(self):
+        """Drop sessions not seen for idle_timeout seconds; returns how many went"""
+        with self._lock:
+            return self._evict_locked(time.monotonic())
+
+    def _evict_locked(self, now, force=False):
+        self._last_sweep = now
+        idle = [sid for sid, s in self._sessions.items()
+                if sid not in self.pinned and now - s.last_seen >= self.idle_timeout]
+        if force and not idle:
+            # At capacity with nothing idle: drop the least recently used session
+            candidates = [s for sid, s in self._sessions.items() if sid not in self.pinned]
+            if candidates:
+                idle = [min(candidates, key=lambda s: s.last_seen).session_id]
+        for sid in idle:
+            del self._sessions[sid]
+        self.evicted += len(idle)
+        return len(idle)
+
+    def stats(self):
+        return {
+            'active_sessions': len(self._sessions),
+            'sessions_created': self.created,
+            'sessions_evicted': self.evicted,
+            'idle_timeout_seconds': self.idle_timeout,
+            'max_sessions': self.max_sessions,
+        }
@@ -0,0 +1,207 @@
+"""
+Shared-memory frame ring for handing camera frames to other processes.
+
+FrameBuffer only works inside one process. When the detector or the JPEG
+encoder runs in its own process, pickling 640x480x3 frames through a pipe
+costs about as much as the work it offloads. FrameRing keeps the last
+`slots` frames in a multiprocessing.shared_memory block instead: the
+capture owner writes each frame once, and readers in any process attach by
+name and get NumPy views straight into the block. The frame shape and
+dtype are stored in the block, so readers need only the name.
+
+Layout (one block):
+    header   int64[8]            latest seq, slots, frame nbytes, dtype char, ndim, shape (up to 3 dims)
+    slot i   int64 seqlock, int64 frame seq, float64 timestamp, frame bytes
+
+One writer only. Each slot has a seqlock counter that is odd while the
+writer is filling it. Readers check it before and after reading, so a torn
+frame is detected instead of returned. A view returned by latest() stays
+intact until the writer wraps round to the same slot, i.e. for slots - 1
+more frames. Check ring.valid(seq) after using it to know that the frame
+was not overwritten meanwhile.
+"""
+
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+HEADER_FIELDS = 8
+MAX_DIMS = 3
+SLOT_HEADER_BYTES = 24
+
+# Blocks created by this process (its resource tracker already owns them)
+_created = set()
+
+
+def _attach(name):
+    """Open an existing block without letting this process's resource tracker unlink it at exit"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the block. Children started by multiprocessing share
+        # their parent's tracker (registering twice is harmless there); an unrelated process
+        # has its own, which would unlink the block when this reader exits.
+        import multiprocessing
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        if multiprocessing.parent_process() is None and name not in _created:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class FrameRing:
+    """Single-writer, multi-reader ring of fixed-shape frames in shared memory.
+
+    The creator gives the frame shape; readers may omit it and take the
+    shape and dtype the block was created with.
+    """
+
+    def __init__(self, name=None, shape=None, dtype=np.uint8, slots=4, create=False):
+        if create:
+            if shape is None or not 0 < len(shape) <= MAX_DIMS:
+                raise ValueError(f"creating a ring needs a frame shape of 1 to {MAX_DIMS} dims")
+            self.shape = tuple(int(v) for v in shape)
+            self.dtype = np.dtype(dtype)
+            size = 64 + slots * self._slot_stride()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self._owner = True
+            _created.add(self._shm.name)
+        else:
+            self._shm = _attach(name)
+            self._owner = False
+
+        buf = self._shm.buf
+        self._header = np.ndarray((HEADER_FIELDS,), np.int64, buf, 0)
+        if create:
+            self._header[:] = ((0, slots, self._frame_bytes(), ord(self.dtype.char), len(self.shape))
+                               + self.shape + (0,) * (MAX_DIMS - len(self.shape)))
+        else:
+            held = tuple(int(v) for v in self._header[5:5 + int(self._header[4])])
+            held_dtype = np.dtype(chr(int(self._header[3])))
+            if shape is not None and (tuple(shape) != held or np.dtype(dtype) != held_dtype):
+                self.close()
+                raise ValueError(f"ring {name} holds {held} {held_dtype} frames, "
+                                 f"expected {tuple(shape)} {np.dtype(dtype)}")
+            self.shape, self.dtype = held, held_dtype
+        self._stride = self._slot_stride()
+        self.slots = int(self._header[1])
+        self._locks = []
+        self._seqs = []
+        self._stamps = []
+        self._frames = []
+        for i in range(self.slots):
+            offset = 64 + i * self._stride
+            self._locks.append(np.ndarray((1,), np.int64, buf, offset))
+            self._seqs.append(np.ndarray((1,), np.int64, buf, offset + 8))
+            self._stamps.append(np.ndarray((1,), np.float64, buf, offset + 16))
+            frame = np.ndarray(self.shape, self.dtype, buf, offset + SLOT_HEADER_BYTES)
+            frame.flags.writeable = create
+            self._frames.append(frame)
+        self.frames_written = 0
+        self.frames_rejected = 0
+        self.torn_reads = 0
+
+    def _frame_bytes(self):
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def _slot_stride(self):
+        # Keep every frame 64-byte aligned after its slot header
+        return -(-(SLOT_HEADER_BYTES + self._frame_bytes()) // 64) * 64
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def seq(self):
+        """Sequence number of the newest complete frame (0 before the first write)"""
+        return int(self._header[0])
+
+    # Writer side
+
+    def write(self, frame, timestamp=None):
+        """Copy frame into the next slot; returns its seq, or 0 if the shape does not match"""
+        if frame.shape != self.shape or frame.dtype != self.dtype:
+            self.frames_rejected += 1
+            return 0
+        seq = self.seq + 1
+        slot = seq % self.slots
+        lock = self._locks[slot]
+        lock[0] += 1  # odd: slot is being written
+        np.copyto(self._frames[slot], frame, casting='no')
+        self._seqs[slot][0] = seq
+        self._stamps[slot][0] = time.time() if timestamp is None else timestamp
+        lock[0] += 1  # even: slot is consistent again
+        self._header[0] = seq
+        self.frames_written += 1
+        return seq
+
+    # Reader side
+
+    def latest(self):
+        """Return (seq, frame view, timestamp) of the newest frame without copying.
+
+        frame is None before the first write. The view is read-only and is
+        only guaranteed intact while valid(seq) is true.
+        """
+        while True:
+            seq = self.seq
+            if seq == 0:
+                return 0, None, 0.0
+            slot = seq % self.slots
+            before = int(self._locks[slot][0])
+            frame_seq = int(self._seqs[slot][0])
+            timestamp = float(self._stamps[slot][0])
+            if before % 2 == 0 and frame_seq == seq and int(self._locks[slot][0]) == before:
+                return seq, self._frames[slot], timestamp
+            # The writer lapped us between reading the header and the slot; take the newer frame
+            self.torn_reads += 1
+
+    def valid(self, seq):
+        """True if the frame with this seq has not been overwritten (yet)"""
+        slot = seq % self.slots
+        return int(self._locks[slot][0]) % 2 == 0 and int(self._seqs[slot][0]) == seq
+
+    def read_copy(self, out=None):
+        """Classic seqlock read: copy the newest frame and retry if it was overwritten meanwhile"""
+        while True:
+            seq, frame, timestamp = self.latest()
+            if frame is None:
+                return 0, None, 0.0
+            if out is None:
+                out = np.empty(self.shape, self.dtype)
+            np.copyto(out, frame)
+            if self.valid(seq):
+                return seq, out, timestamp
+            self.torn_reads += 1
+
+    def wait_for_frame(self, last_seq=0, timeout=1.0, poll=0.001):
+        """Poll until a frame newer than last_seq exists; returns (seq, view) or (seq, None) on timeout"""
+        deadline = time.monotonic() + timeout
+        while self.seq <= last_seq:
+            if time.monotonic() >= deadline:
+                return self.seq, None
+            time.sleep(poll)
+        seq, frame, _ = self.latest()
+        return seq, frame
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'slots': self.slots,
+            'shape': list(self.shape),
+            'seq': self.seq,
+            'frames_written': self.frames_written,
+            'frames_rejected': self.frames_rejected,
+            'torn_reads': self.torn_reads,
+        }
+
+    def close(self):
+        # Views into the block must go before the mapping can be closed
+        self._header = None
+        self._locks = self._seqs = self._stamps = self._frames = []
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+            _created.discard(self._shm.name)
@@ -0,0 +1,274 @@
+"""
+Precompiled text -> sign matcher.
+
+Replaces the multi-pass lookup in text_to_sign_mapping (exact match, then a
+per-word loop, then nine chained substring scans) with a single compiled
+regex that finds every candidate in one pass over the text. match() returns
+exactly what the original function returned; find_all() returns every
+phrase match, preferring the longest phrase at each position.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+from signs import NO_SIGN_GIF, load_vocabulary
+
+# Phrase -> GIF mapping and semantic keyword groups (in priority order) of the
+# bundled vocabulary, avatars/signs.json; the server rebuilds its matcher from
+# the live SignRegistry instead
+_bundled = load_vocabulary()
+SIGN_MAPPING = _bundled.phrase_mapping
+SEMANTIC_KEYWORDS = _bundled.semantic_keywords
+
+NO_MATCH = NO_SIGN_GIF
+
+
+def _trie_pattern(words):
+    """Compile literals into a trie-shaped regex (e.g. 'no(?:pe)?').
+
+    Branches are disjoint by their first character and optional tails are
+    greedy, so at any position the regex tries one branch and reports the
+    longest word that starts there.
+    """
+    root = {}
+    for word in words:
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return emit(root)
+
+
+class PhraseMatcher:
+    """One-pass matcher over a phrase mapping and semantic keyword lists"""
+
+    def __init__(self, mapping=None, semantic_keywords=None, default=NO_MATCH):
+        self.mapping = dict(SIGN_MAPPING if mapping is None else mapping)
+        self.semantic_keywords = list(SEMANTIC_KEYWORDS if semantic_keywords is None else semantic_keywords)
+        self.default = default
+
+        # Keyword -> (priority, gif); the first group that lists a keyword wins
+        semantic = {}
+        for priority, (gif, words) in enumerate(self.semantic_keywords):
+            for word in words:
+                if word:
+                    semantic.setdefault(word.lower(), (priority, gif))
+
+        # Single-token mapping keys replace the old per-word loop
+        word_keys = {k for k in self.mapping if k and not any(c.isspace() for c in k)}
+        keys = word_keys | set(semantic)
+
+        # The scan reports the longest key starting at each position. Every key
+        # present at that position is a prefix of it, so precompute per key the
+        # best semantic hit and the word keys hidden among its prefixes.
+        self._best_semantic = {}
+        self._word_prefixes = {}
+        for key in keys:
+            best = None
+            words = []
+            for end in range(1, len(key) + 1):
+                prefix = key[:end]
+                hit = semantic.get(prefix)
+                if hit is not None and (best is None or hit[0] < best[0]):
+                    best = hit
+                if prefix in word_keys:
+                    words.append(prefix)
+            self._best_semantic[key] = best
+            # Longest first, since a longer token match is the one split() would see
+            self._word_prefixes[key] = tuple(reversed(words))
+
+        self._scan = re.compile('(?=(' + _trie_pattern(keys) + '))') if keys else None
+
+        # Leftmost-longest phrase matches on word boundaries, for find_all()
+        phrases = [k for k in self.mapping if k]
+        self._phrases = re.compile(r'\b(?:' + _trie_pattern(phrases) + r')\b') if phrases else None
+
+    def match(self, text):
+        """Return the GIF for text, with the same precedence as the legacy mapper.
+
+        Exact phrase, then the first whitespace-delimited word that is a key,
+        then the highest-priority semantic keyword found anywhere.
+        """
+        if not text:
+            return self.default
+        text = text.lower().strip()
+
+        gif = self.mapping.get(text)
+        if gif is not None:
+            return gif
+        if self._scan is None:
+            return self.default
+
+        best = None
+        length = len(text)
+        for m in self._scan.finditer(text):
+            key = m.group(1)
+            start = m.start()
+            words = self._word_prefixes[key]
+            if words and (start == 0 or text[start - 1].isspace()):
+                for word in words:
+                    end = start + len(word)
+                    if end == length or text[end].isspace():
+                        # The first matching word in text order beats any semantic keyword
+                        return self.mapping[word]
+            hit = self._best_semantic[key]
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = hit
+        return best[1] if best is not None else self.default
+
+    def iter_matches(self, text):
+        """Yield (phrase, gif, start, end) left to right in one pass, longest phrase first.
+
+        Matches are produced lazily, so callers can start acting on the first
+        sign before a long transcript has been scanned.
+        """
+        if not text or self._phrases is None:
+            return
+        mapping = self.mapping
+        for m in self._phrases.finditer(text.lower()):
+            phrase = m.group(0)
+            yield phrase, mapping[phrase], m.start(), m.end()
+
+    def find_all(self, text):
+        """Return [(phrase, gif, start, end)] for every phrase in text, longest first"""
+        return list(self.iter_matches(text))
+
+    def iter_sequence(self, text):
+        """Yield (phrase, gif) for the ordered sequence of signs in text.
+
+        Falls back to the single match() result when no phrase appears as a
+        whole word (e.g. only a semantic keyword matched), and yields nothing
+        when the text does not map to any sign.
+        """
+        found = False
+        for phrase, gif, _, _ in self.iter_matches(text):
+            found = True
+            if gif != self.default:
+                yield phrase, gif
+        if not found:
+            gif = self.match(text)
+            if gif != self.default:
+                yield (text or '').lower().strip(), gif
+
+
+
+class MatchCache:
+    """Bounded LRU cache of match() results keyed on the normalized text.
+
+    Caption streams repeat the same short utterances constantly, so most
+    lookups are served from here. Installing a new matcher (i.e. reloading
+    the sign mapping) clears the cache.
+    """
+
+    def __init__(self, matcher, maxsize=4096):
+        self._matcher = matcher
+        self.maxsize = max(0, int(maxsize))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def matcher(self):
+        return self._matcher
+
+    def set_matcher(self, matcher):
+        """Swap in a rebuilt matcher and drop every cached result"""
+        with self._lock:
+            self._matcher = matcher
+            self._entries.clear()
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def match(self, text):
+        key = text.lower().strip() if text else ''
+        with self._lock:
+            gif = self._entries.get(key)
+            if gif is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return gif
+            self.misses += 1
+            matcher = self._matcher
+
+        gif = matcher.match(key)
+
+        if self.maxsize:
+            with self._lock:
+                # Don't cache a result computed by a matcher that was replaced meanwhile
+                if matcher is self._matcher:
+                    self._entries[key] = gif
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+        return gif
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def merge_cache_stats(stats):
+    """Combine MatchCache.stats() of several processes into deployment-wide totals"""
+    merged = {key: sum(s.get(key, 0) for s in stats)
+              for key in ('size', 'maxsize', 'hits', 'misses', 'evictions', 'invalidations')}
+    lookups = merged['hits'] + merged['misses']
+    merged['hit_rate'] = round(merged['hits'] / lookups, 4) if lookups else 0.0
+    merged['processes'] = len(stats)
+    return merged
+
+
+_default_matcher = None
+
+
+def get_default_matcher():
+    """Shared matcher built from SIGN_MAPPING / SEMANTIC_KEYWORDS"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = PhraseMatcher()
+    return _default_matcher
+
+
+def map_texts(texts, matcher=None):
+    """Map many texts to GIF filenames in one call, preserving order.
+
+    Same rules as text_to_sign_mapping. Repeated lines (common in caption
+    transcripts) are only matched once per call. Usable without Flask:
+
+        from sign_matcher import map_texts
+        gifs = map_texts(["hello", "thank you", "can you repeat that"])
+    """
+    matcher = matcher or get_default_matcher()
+    match = matcher.match
+    seen = {}
+    results = []
+    for text in texts:
+        gif = seen.get(text)
+        if gif is None:
+            gif = seen[text] = match(text)
+        results.append(gif)
+    return results
@@ -0,0 +1,250 @@
+"""
+Sign vocabulary registry.
+
+The list of signs used to be spelled out separately in SIGN_MAPPING, the
+get-sign-gif aliases, /api/available-signs, the detection speech map and
+app_minimal.py. It now comes from one place: the avatar GIFs that exist
+(AVATARS_DIR or avatars.zip) plus an optional manifest, avatars/signs.json,
+that adds display names, text-to-sign phrases, semantic keywords,
+detector labels and speech text.
+
+A SignVocabulary is an immutable snapshot with every lookup table
+precomputed. SignRegistry builds a new one off to the side and swaps it
+in with a single assignment (copy-on-write). Requests in flight keep the
+snapshot they started with, and adding a sign needs no code change or
+restart.
+"""
+
+import json
+import os
+import threading
+import time
+import zipfile
+
+MANIFEST_NAME = 'signs.json'
+NO_SIGN_GIF = 'none.gif'
+BUNDLED_AVATARS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'avatars')
+
+
+def _key(value):
+    return ' '.join(str(value).lower().split())
+
+
+class Sign:
+    """One sign: its GIF and the words, labels and speech that lead to it"""
+
+    __slots__ = ('name', 'display', 'gif', 'phrases', 'keywords', 'aliases', 'labels', 'speech',
+                 'hidden', 'available')
+
+    def __init__(self, name, gif=None, display=None, phrases=None, keywords=None, aliases=None,
+                 labels=None, speech=None, hidden=False, available=True):
+        self.name = _key(name).replace(' ', '_')
+        self.gif = gif or f'{self.name}.gif'
+        stem = os.path.splitext(self.gif)[0].lower()
+        self.display = display or self.name.replace('_', ' ').title()
+        if phrases is None:
+            phrases = (self.name.replace('_', ' '),)
+        self.phrases = tuple(_key(p) for p in phrases)
+        self.keywords = tuple(_key(k) for k in keywords or ())
+        # Route names: the sign name, the GIF name and the display name in snake_case
+        names = [self.name, stem, _key(self.display).replace(' ', '_')]
+        self.aliases = tuple(dict.fromkeys(names + [_key(a).replace(' ', '_') for a in aliases or ()]))
+        self.labels = tuple(_key(l) for l in (labels if labels is not None else (self.name, stem)))
+        self.speech = speech or self.display
+        self.hidden = bool(hidden)
+        self.available = available
+
+    def to_dict(self):
+        return {'name': self.name, 'display': self.display, 'gif': self.gif}
+
+
+class SignVocabulary:
+    """Immutable snapshot of every sign with precomputed lookup tables"""
+
+    def __init__(self, signs, version=0, source=None):
+        self.signs = tuple(signs)
+        self.version = version
+        self.source = source
+        self.loaded_at = time.time()
+        available = [s for s in self.signs if s.available]
+        self.missing = [s.gif for s in self.signs if not s.available]
+
+        self.by_name = {}
+        self.by_label = {}
+        self.phrase_mapping = {}
+        for sign in available:
+            for alias in sign.aliases:
+                self.by_name.setdefault(alias, sign)
+            for label in sign.labels:
+                self.by_label.setdefault(label, sign)
+            for phrase in sign.phrases:
+                self.phrase_mapping.setdefault(phrase, sign.gif)
+        # Keyword groups in manifest order, for PhraseMatcher's semantic fallback
+        self.semantic_keywords = [(s.gif, list(s.keywords)) for s in available if s.keywords]
+        self.public_signs = [s.to_dict() for s in available if not s.hidden]
+
+    @classmethod
+    def build(cls, entries, gif_names, version=0, source=None):
+        """Manifest entries first (in order), then any GIF the manifest does not mention"""
+        gif_names = set(gif_names)
+        signs = []
+        seen_gifs = set()
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {'name': entry}
+            options = {k: entry[k] for k in Sign.__slots__ if k in entry and k != 'available'}
+            sign = Sign(**options)
+            sign.available = sign.gif in gif_names
+            seen_gifs.add(sign.gif)
+            signs.append(sign)
+        for gif in sorted(gif_names - seen_gifs):
+            signs.append(Sign(os.path.splitext(gif)[0], gif=gif))
+        return cls(signs, version, source)
+
+    def __len__(self):
+        return len(self.public_signs)
+
+    def resolve(self, name):
+        """Sign for a route name / alias ('help', 'help_me', 'helpme'), or None"""
+        return self.by_name.get(_key(name).replace(' ', '_'))
+
+    def gif_for(self, name, default=NO_SIGN_GIF):
+        sign = self.resolve(name)
+        return sign.gif if sign is not None else default
+
+    def for_label(self, label):
+        """Sign for a detector class name, or None"""
+        return self.by_label.get(_key(label))
+
+    def unmapped_labels(self, labels):
+        return [label for label in labels if _key(label) not in self.by_label]
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'signs': len(self.public_signs),
+            'phrases': len(self.phrase_mapping),
+            'labels': len(self.by_label),
+            'missing_gifs': self.missing,
+            'source': self.source,
+            'loaded_at': self.loaded_at,
+        }
+
+
+def read_manifest(directory=None, zip_path=None, prefer_zip=False, name=MANIFEST_NAME):
+    """Return (entries, source) from the manifest in the avatars dir or zip; ([], None) if absent"""
+    if zip_path and prefer_zip and os.path.isfile(zip_path):
+        with zipfile.ZipFile(zip_path) as archive:
+            for info in archive.infolist():
+                if os.path.basename(info.filename) == name:
+                    return json.loads(archive.read(info)).get('signs', []), f'{zip_path}:{info.filename}'
+    path = os.path.join(directory, name) if directory else None
+    if path and os.path.isfile(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get('signs', []), path
+    return [], None
+
+
+def load_vocabulary(directory=BUNDLED_AVATARS_DIR, zip_path=None, prefer_zip=False, gif_names=None):
+    """Build a vocabulary from the manifest and the GIF file names (no GIF bytes are read)"""
+    if gif_names is None:
+        gif_names = set()
+        if directory and os.path.isdir(directory):
+            gif_names.update(f for f in os.listdir(directory) if f.lower().endswith('.gif'))
+        if zip_path and prefer_zip and os.path.isfile(zip_path):
+            with zipfile.ZipFile(zip_path) as archive:
+                gif_names.update(os.path.basename(n) for n in archive.namelist() if n.lower().endswith('.gif'))
+    entries, source = read_manifest(directory, zip_path, prefer_zip)
+    return SignVocabulary.build(entries, gif_names, source=source)
+
+
+class SignRegistry:
+    """Current vocabulary plus the avatar bytes, reloaded together and swapped atomically"""
+
+    def __init__(self, asset_store, directory, zip_path=None, prefer_zip=False):
+        self.asset_store = asset_store
+        self.directory = directory
+        self.zip_path = zip_path
+        self.prefer_zip = prefer_zip
+        self._vocabulary = SignVocabulary([])
+        self._signature = None
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._watcher = None
+        self.reloads = 0
+        self.last_error = None
+
+    @property
+    def vocabulary(self):
+        return self._vocabulary
+
+    def on_reload(self, callback):
+        """callback(vocabulary) runs after every successful load, e.g. to rebuild the text matcher"""
+        self._listeners.append(callback)
+        return callback
+
+    def signature(self):
+        """Cheap fingerprint (names, sizes, mtimes) of everything the vocabulary is built from"""
+        entries = []
+        if self.directory and os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.lower().endswith('.gif') or entry.name == MANIFEST_NAME:
+                    stat = entry.stat()
+                    entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+        if self.zip_path and self.prefer_zip and os.path.isfile(self.zip_path):
+            stat = os.stat(self.zip_path)
+            entries.append((self.zip_path, stat.st_size, stat.st_mtime_ns))
+        return tuple(sorted(entries))
+
+    def load(self):
+        """Read GIFs and manifest, build the new vocabulary, then swap both in"""
+        with self._lock:
+            signature = self.signature()
+            assets = self.asset_store.read(self.directory, self.zip_path, self.prefer_zip)
+            entries, source = read_manifest(self.directory, self.zip_path, self.prefer_zip)
+            vocabulary = SignVocabulary.build(entries, assets, version=self._vocabulary.version + 1,
+                                              source=source)
+            self.asset_store.swap(assets)
+            self._vocabulary = vocabulary
+            self._signature = signature
+            self.reloads += 1
+            self.last_error = None
+        for callback in self._listeners:
+            callback(vocabulary)
+        return vocabulary
+
+    def reload_if_changed(self):
+        """Reload when files changed; a broken manifest keeps the current vocabulary"""
+        if self.signature() == self._signature:
+            return False
+        try:
+            self.load()
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            # Don't retry the same broken files every interval
+            self._signature = self.signature()
+            print(f"[Signs Error] reload failed, keeping version {self._vocabulary.version}: {e}")
+            return False
+
+    def watch(self, interval):
+        """Poll for changes every interval seconds on a daemon thread"""
+        if interval <= 0 or self._watcher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                if self.reload_if_changed():
+                    print(f"🔁 Sign vocabulary reloaded (version {self._vocabulary.version})")
+
+        self._watcher = threading.Thread(target=run, name='sign-registry-watch', daemon=True)
+        self._watcher.start()
+
+    def stats(self):
+        return {
+            **self._vocabulary.stats(),
+            'reloads': self.reloads,
+            'watching': self._watcher is not None,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,139 @@
+"""
+Temporal smoothing of per-frame sign detections.
+
+A single flickering YOLO box used to rewrite current_sign and trigger speech
+on its own. TemporalSmoother keeps a sliding window of per-class confidences
+(one NumPy row per frame) and only commits a sign once its windowed score is
+stable, with hysteresis so the committed sign does not bounce between classes.
+
+The window is either a number of frames or, with window_seconds, a span of
+time. A frame-count window stretches when frames arrive slowly (8 frames at
+the motion gate's idle rate of 1 fps cover 8 s); a time window does not.
+"""
+
+import time
+from collections import deque
+
+import numpy as np
+
+
+def to_numpy(values):
+    """Convert a torch tensor / list / array of box values to a NumPy array"""
+    if values is None:
+        return np.empty(0)
+    if hasattr(values, 'cpu'):
+        values = values.cpu()
+    if hasattr(values, 'numpy'):
+        values = values.numpy()
+    return np.asarray(values)
+
+
+class TemporalSmoother:
+    """Sliding-window, per-class confidence accumulator with hysteresis.
+
+    Each update() adds one frame: the best confidence per class among that
+    frame's boxes (0 for classes not seen). A class is committed when its
+    mean confidence over the window reaches enter_threshold and it is the
+    top class; it stays committed until its score falls below
+    exit_threshold, after which the same sign can be committed again.
+
+    With window_seconds the mean is taken over time instead of frames: each
+    frame stands for the time since the previous one and the window holds
+    the last window_seconds of the stream, whatever the frame rate. A frame
+    stands for at most window_seconds / window, so a sign still needs about
+    as many stable frames as the frame-count window before it commits; one
+    confident frame at a low frame rate cannot commit it on its own.
+    """
+
+    def __init__(self, num_classes, window=8, enter_threshold=0.5, exit_threshold=0.25,
+                 min_confidence=0.25, window_seconds=None):
+        if exit_threshold > enter_threshold:
+            raise ValueError("exit_threshold must not exceed enter_threshold")
+        if int(num_classes) < 1:
+            raise ValueError("num_classes must be at least 1")
+        if window_seconds is not None and window_seconds <= 0:
+            raise ValueError("window_seconds must be positive")
+        self.num_classes = int(num_classes)
+        self.window = max(1, int(window))
+        self.window_seconds = window_seconds
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = exit_threshold
+        self.min_confidence = min_confidence
+        self._frames = np.zeros((self.window, self.num_classes), dtype=np.float32)
+        self._sums = np.zeros(self.num_classes, dtype=np.float64)
+        self._index = 0
+        # Time window: (start, end, row) per frame, oldest first
+        self._spans = deque()
+        self._last_time = None
+        self._scores = np.zeros(self.num_classes, dtype=np.float64)
+        self.committed = None
+        self.frames_seen = 0
+        self.commits = 0
+
+    def reset(self):
+        self._frames.fill(0)
+        self._sums.fill(0)
+        self._index = 0
+        self._spans.clear()
+        self._last_time = None
+        self._scores.fill(0)
+        self.committed = None
+
+    def scores(self):
+        """Mean per-class confidence over the window"""
+        if self.window_seconds is not None:
+            return self._scores
+        return self._sums / self.window
+
+    def _add_timed(self, row, timestamp):
+        """Time-weighted window: a frame covers [previous frame, this frame], clipped to the window"""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        cutoff = timestamp - self.window_seconds
+        start = timestamp if self._last_time is None else max(self._last_time, cutoff)
+        self._last_time = timestamp
+        self._spans.append((start, timestamp, row))
+        while self._spans and self._spans[0][1] <= cutoff:
+            self._spans.popleft()
+        # At most window_seconds * fps spans, so recomputing beats keeping partial overlaps in sync
+        weights = np.array([end - max(begin, cutoff) for begin, end, _ in self._spans])
+        np.minimum(weights, self.window_seconds / self.window, out=weights)
+        rows = np.stack([span[2] for span in self._spans])
+        self._scores = weights @ rows / self.window_seconds
+
+    def update(self, classes, confidences, timestamp=None):
+        """Add one frame's boxes; returns the class index when a sign is newly committed.
+
+        timestamp (seconds, monotonic) places the frame in a time window and
+        defaults to now; frame-count windows ignore it.
+        """
+        classes = to_numpy(classes).astype(np.intp, copy=False).ravel()
+        confidences = to_numpy(confidences).astype(np.float32, copy=False).ravel()
+
+        row = np.zeros(self.num_classes, dtype=np.float32)
+        if classes.size:
+            keep = (confidences >= self.min_confidence) & (classes >= 0) & (classes < self.num_classes)
+            # Best box per class in this frame, accumulated without a Python loop
+            np.maximum.at(row, classes[keep], confidences[keep])
+
+        if self.window_seconds is not None:
+            self._add_timed(row, timestamp)
+        else:
+            # O(num_classes) running sums instead of re-summing the whole window
+            self._sums += row - self._frames[self._index]
+            self._frames[self._index] = row
+            self._index = (self._index + 1) % self.window
+        self.frames_seen += 1
+
+        scores = self.scores()
+        if self.committed is not None and scores[self.committed] < self.exit_threshold:
+            # Sign released: allow it (or another one) to be committed again
+            self.committed = None
+
+        best = int(np.argmax(scores))
+        if scores[best] >= self.enter_threshold and best != self.committed:
+            if self.committed is None or scores[best] > scores[self.committed]:
+                self.committed = best
+                self.commits += 1
+                return best
+        return None
@@ -0,0 +1,29 @@
+"""
+Text-to-speech worker: speaks every line it reads from stdin.
+
+Started and supervised by speech.SpeechDispatcher in app.py; run it with
+any interpreter that has pyttsx3 installed (see SPEECH_PYTHON). After each
+line it prints "spoken", and the dispatcher sends the next line only then.
+"""
+
+import sys
+
+import pyttsx3
+
+
+def main():
+    engine = pyttsx3.init()
+    for line in sys.stdin:
+        text = line.strip()
+        try:
+            if text:
+                engine.say(text)
+                engine.runAndWait()
+        except Exception as e:
+            print(f"[Speak Worker Error] {e}", file=sys.stderr, flush=True)
+        # Acknowledge every line, spoken or not, so the dispatcher's one-in-flight line never stalls
+        print('spoken', flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Non-blocking speech output.
+
+speak() used to write straight into the TTS worker's stdin from the
+detection path, so a slow or stalled worker held up detection. The
+SpeechDispatcher puts utterances on a small bounded queue (dropping the
+oldest when full, since stale speech is useless) and a single thread
+feeds them to the worker process, restarting it with backoff when it
+dies, stops accepting input or cannot be started in the first place.
+
+The worker prints ACK once it has finished speaking a line, and only one
+line is in flight at a time. Without that, the OS pipe buffer would hold
+the backlog instead of the queue, nothing would ever be dropped and stale
+speech would still be spoken minutes later.
+"""
+
+import queue
+import subprocess
+import threading
+from collections import deque
+
+# Line the worker prints after each utterance (other output is passed through)
+ACK = 'spoken'
+
+
+class SpeechDispatcher:
+    """Bounded drop-oldest utterance queue drained by one supervised worker process"""
+
+    def __init__(self, command, max_queue=8, write_timeout=5.0, restart_delay=1.0,
+                 max_restart_delay=30.0, cwd=None, speak_timeout=30.0):
+        self.command = list(command)
+        self.max_queue = max(1, int(max_queue))
+        self.write_timeout = write_timeout
+        # Longest a worker may take to speak one line before it is considered stuck
+        self.speak_timeout = speak_timeout
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.cwd = cwd
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._process = None
+        self._acks = None
+        self._thread = None
+        self._running = False
+        self._stopped = threading.Event()
+        self.queued = 0
+        self.spoken = 0
+        self.dropped = 0
+        self.failed = 0
+        self.restarts = 0
+
+    @property
+    def alive(self):
+        process = self._process
+        return process is not None and process.poll() is None
+
+    def start(self):
+        """Spawn the worker and start the feeder thread.
+
+        A worker that cannot be spawned does not fail start(): the feeder
+        keeps retrying with backoff, as it does for a worker that died.
+        """
+        with self._cond:
+            if self._running:
+                return self
+            try:
+                self._spawn()
+            except Exception as e:
+                print(f"[Speech Error] could not start worker: {e}; retrying in {self.restart_delay:.0f}s")
+            self._running = True
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='speech-dispatcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        with self._cond:
+            self._running = False
+            self._stopped.set()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._kill()
+
+    def say(self, text):
+        """Queue text for speaking; never blocks. Returns False if an older item was dropped."""
+        with self._cond:
+            dropped = len(self._queue) >= self.max_queue
+            if dropped:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(text)
+            self.queued += 1
+            self._cond.notify()
+        return not dropped
+
+    def _spawn(self):
+        process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                                   cwd=self.cwd)
+        # A fresh queue per process, so a late ack from a killed worker cannot release the next line
+        self._acks = queue.Queue()
+        threading.Thread(target=self._read_acks, args=(process, self._acks),
+                         name='speech-acks', daemon=True).start()
+        self._process = process
+        print(f"✅ Speech worker started (pid {process.pid})")
+
+    @staticmethod
+    def _read_acks(process, acks):
+        try:
+            for line in process.stdout:
+                if line.strip() == ACK:
+                    acks.put(True)
+                else:
+                    print(line, end='')
+        except (OSError, ValueError):
+            pass
+        # EOF: the worker exited
+        acks.put(False)
+
+    def _kill(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.kill()
+            process.wait(1.0)
+        except Exception:
+            pass
+
+    def _ensure_worker(self, delay=0.0):
+        """Restart a dead worker, backing off while it keeps failing; False when stopping.
+
+        delay is how long to wait before the first attempt.
+        """
+        while self._running and not self.alive:
+            if delay:
+                self._stopped.wait(delay)
+                if not self._running:
+                    break
+            self._kill()
+            self.restarts += 1
+            try:
+                self._spawn()
+                return True
+            except Exception as e:
+                delay = min(max(delay * 2, self.restart_delay), self.max_restart_delay)
+                print(f"[Speech Error] could not start worker: {e}; retrying in {delay:.0f}s")
+        return self._running
+
+    def _write(self, text):
+        """Send one line and wait until the worker has spoken it"""
+        process, acks = self._process, self._acks
+        # A worker that stops reading would block this write forever: kill it after write_timeout
+        watchdog = threading.Timer(self.write_timeout, process.kill)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            # One utterance is one line, or the acks would drift out of step
+            process.stdin.write(' '.join(text.split()) + "\n")
+            process.stdin.flush()
+        finally:
+            watchdog.cancel()
+        try:
+            if not acks.get(timeout=self.speak_timeout):
+                raise BrokenPipeError("speech worker exited while speaking")
+        except queue.Empty:
+            raise TimeoutError(f"speech worker did not finish within {self.speak_timeout:g}s")
+
+    def _run(self):
+        # The first spawn in start() may have failed: keep retrying without waiting for speech
+        if not self.alive and not self._ensure_worker(self.restart_delay):
+            return
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                text = self._queue.popleft()
+            if not self._ensure_worker():
+                return
+            try:
+                self._write(text)
+                self.spoken += 1
+                print(f"🔊 Spoke: {text}")
+            except Exception as e:
+                self.failed += 1
+                print(f"[Speak Error] {e}")
+                # Broken pipe or stalled worker: reap it so the next utterance restarts it
+                self._kill()
+
+    def stats(self):
+        process = self._process
+        return {
+            'worker_alive': self.alive,
+            'worker_pid': process.pid if process is not None else None,
+            'queue_length': len(self._queue),
+            'max_queue': self.max_queue,
+            'queued': self.queued,
+            'spoken': self.spoken,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'restarts': self.restarts,
+        }
@@ -0,0 +1,178 @@
+"""
+Background initialization of slow server components.
+
+Loading the detector (PyTorch / ONNX Runtime import plus weights) and
+starting the speech worker used to happen at import time, before Flask
+could bind its port. Each is now a LazyComponent: loaded once on its own
+thread, either right after startup or on first use, with its state and
+load time reported by /api/health.
+
+StartupProfiler records how long each step of bringing the server up
+took (heavy imports, model load, camera probe, first request served) and
+writes them as a JSON report when STARTUP_PROFILE is set.
+"""
+
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+PENDING = 'pending'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+DISABLED = 'disabled'
+
+
+class LazyComponent:
+    """A resource built once by loader(), on a background thread by default"""
+
+    def __init__(self, name, loader, enabled=True):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self.state = PENDING if enabled else DISABLED
+        self.value = None
+        self.error = None
+        self.load_seconds = None
+        if not enabled:
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self.state == READY
+
+    def start(self, block=False):
+        """Begin loading if nobody has yet; with block=True load on the calling thread"""
+        with self._lock:
+            if self.state != PENDING:
+                return self
+            self.state = LOADING
+        if block:
+            self._load()
+        else:
+            threading.Thread(target=self._load, name=f'load-{self.name}', daemon=True).start()
+        return self
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            value = self._loader()
+            if value is None:
+                raise RuntimeError('not available')
+            self.value = value
+            self.state = READY
+        except Exception as e:
+            self.error = str(e)
+            self.state = FAILED
+            print(f"⚠️ {self.name} failed to load: {e}")
+        finally:
+            self.load_seconds = time.perf_counter() - started
+            self._done.set()
+
+    def get(self):
+        """The loaded value, or None while pending/loading or after a failure"""
+        return self.value if self.state == READY else None
+
+    def wait(self, timeout=None):
+        """Start loading if needed and wait up to timeout; returns the value or None"""
+        self.start()
+        self._done.wait(timeout)
+        return self.get()
+
+    def to_dict(self):
+        return {
+            'state': self.state,
+            'load_seconds': round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            'error': self.error,
+        }
+
+
+def process_age():
+    """Seconds since this process was started (Linux only), or None"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Fields after the ")" that closes the command name; starttime is field 22
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupProfiler:
+    """Named phase durations and one-off marks, relative to when the profiler was created.
+
+    Timings are always collected (they are cheap); the report is only
+    written when a path is given.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or None
+        self.origin = time.perf_counter()
+        self.process_age = process_age()
+        self.phases = {}
+        self.marks = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def mark(self, name):
+        """Record seconds since origin the first time name happens"""
+        with self._lock:
+            if name not in self.marks:
+                self.marks[name] = time.perf_counter() - self.origin
+
+    def time_import(self, module_name):
+        """Import a module, recording how long it took; returns None if it is missing"""
+        if module_name in sys.modules:
+            return sys.modules[module_name]
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            return None
+        self.record(f'import:{module_name}', time.perf_counter() - started)
+        return module
+
+    def report(self, **extra):
+        with self._lock:
+            report = {
+                'pid': os.getpid(),
+                'python': sys.version.split()[0],
+                # Interpreter start + imports that ran before the profiler existed
+                'process_age_at_origin': self.process_age,
+                'phases': {k: round(v, 4) for k, v in self.phases.items()},
+                'marks': {k: round(v, 4) for k, v in self.marks.items()},
+            }
+        report.update(extra)
+        return report
+
+    def write(self, **extra):
+        """Write the JSON report to path (or stdout for "-"); returns the report"""
+        report = self.report(**extra)
+        if self.path == '-':
+            print(json.dumps(report, indent=2))
+        elif self.path:
+            with open(self.path, 'w') as f:
+                json.dump(report, f, indent=2)
+        return report
@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+from inference import StreamState
+
+# The app module reads its configuration at import: no camera, nothing loaded in the background
+os.environ.setdefault('CAMERA_SOURCE', 'none')
+os.environ.setdefault('PRELOAD_COMPONENTS', '0')
+
+app = pytest.importorskip('app')
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+def test_detected_and_typed_signs_share_the_gif_name(client):
+    # The manifest names the sign 'help'; its GIF (and text-to-sign) call it 'helpme'
+    app.on_sign_detected(StreamState('detect-room'), 'help', 0.9)
+    detected = client.get('/api/current-sign', headers={'X-Session-Id': 'detect-room'}).get_json()
+    typed = client.post('/api/text-to-sign', json={'text': 'help me', 'session_id': 'typed-room'}).get_json()
+    assert detected['sign'] == typed['sign'] == 'helpme'
+    assert detected['gif_filename'] == typed['gif_filename'] == 'helpme.gif'
+
+
+def test_only_the_camera_session_can_activate_detection(client, monkeypatch):
+    monkeypatch.setattr(app, 'start_detection_thread', lambda session: None)
+    response = client.post('/api/ai-participant/activate', headers={'X-Session-Id': 'other-room'})
+    assert response.status_code == 409
+    assert response.get_json()['camera_session_id'] == app.CAMERA_SESSION_ID
+    assert not app.sessions.get('other-room').ai_participant_active
+
+    response = client.post('/api/ai-participant/activate', headers={'X-Session-Id': app.CAMERA_SESSION_ID})
+    assert response.status_code == 200 and response.get_json()['ai_participant_active']
+    client.post('/api/ai-participant/deactivate', headers={'X-Session-Id': app.CAMERA_SESSION_ID})
+
+
+def test_sequence_mode_streams_each_sign_then_a_summary(client):
+    response = client.post('/api/text-to-sign', json={'text': 'hello, thank you', 'mode': 'sequence',
+                                                      'session_id': 'sequence-room'},
+                           headers={'Accept': 'application/x-ndjson'})
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line.get('sign') for line in lines[:-1]] == ['hello', 'thanks']
+    assert lines[1]['start'] == lines[0]['duration'] > 0
+    assert lines[-1]['done'] and lines[-1]['count'] == 2
+    assert lines[-1]['total_duration'] == pytest.approx(lines[1]['start'] + lines[1]['duration'])
+    # The first sign becomes the session's current sign
+    current = client.get('/api/current-sign', headers={'X-Session-Id': 'sequence-room'}).get_json()
+    assert current['sign'] == 'hello'
+
+
+def test_batch_maps_every_text_in_order(client, monkeypatch):
+    response = client.post('/api/text-to-sign/batch', json={'texts': ['hello', 'xyz', 'hello', 5]})
+    results = response.get_json()['results']
+    assert [result['sign'] for result in results] == ['hello', 'none', 'hello', 'none']
+    assert results[3]['text'] == ''
+    assert client.post('/api/text-to-sign/batch', json={'texts': 'hello'}).status_code == 400
+    monkeypatch.setattr(app, 'MAX_BATCH_TEXTS', 2)
+    assert client.post('/api/text-to-sign/batch', json={'texts': ['a', 'b', 'c']}).status_code == 413
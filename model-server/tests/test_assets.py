@@ -0,0 +1,75 @@
+import zipfile
+
+import pytest
+from flask import Flask, request
+
+from assets import AssetStore, GifAsset
+
+DATA = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def client():
+    store = AssetStore(max_age=3600)
+    store.swap({'hello.gif': GifAsset('hello.gif', DATA, last_modified=1_700_000_000)})
+    app = Flask(__name__)
+
+    @app.route('/gif/<name>')
+    def gif(name):
+        asset = store.get(name)
+        return store.response(asset, request, versioned=request.args.get('v') == asset.etag)
+
+    client = app.test_client()
+    client.etag = store.get('hello.gif').etag
+    return client
+
+
+def test_full_response_has_strong_etag(client):
+    response = client.get('/gif/hello.gif')
+    assert response.status_code == 200
+    assert response.data == DATA
+    assert response.mimetype == 'image/gif'
+    assert response.headers['ETag'] == f'"{client.etag}"'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+
+
+def test_if_none_match_returns_304(client):
+    response = client.get('/gif/hello.gif', headers={'If-None-Match': f'"{client.etag}"'})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert client.get('/gif/hello.gif', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_range_returns_206(client):
+    response = client.get('/gif/hello.gif', headers={'Range': 'bytes=10-19'})
+    assert response.status_code == 206
+    assert response.data == DATA[10:20]
+    assert response.headers['Content-Range'] == f'bytes 10-19/{len(DATA)}'
+    unsatisfiable = client.get('/gif/hello.gif', headers={'Range': f'bytes={len(DATA) + 5}-'})
+    assert unsatisfiable.status_code == 416
+
+
+def test_only_versioned_urls_are_immutable(client):
+    assert client.get('/gif/hello.gif').headers['Cache-Control'] == 'public, no-cache'
+    assert client.get('/gif/hello.gif?v=old').headers['Cache-Control'] == 'public, no-cache'
+    versioned = client.get(f'/gif/hello.gif?v={client.etag}').headers['Cache-Control']
+    assert versioned == 'public, max-age=3600, immutable'
+
+
+def test_etag_follows_content():
+    assert GifAsset('a.gif', b'same').etag == GifAsset('b.gif', b'same').etag
+    assert GifAsset('a.gif', b'same').etag != GifAsset('a.gif', b'other').etag
+
+
+def test_zip_overrides_directory(tmp_path):
+    (tmp_path / 'hello.gif').write_bytes(b'from dir')
+    (tmp_path / 'yes.gif').write_bytes(b'dir only')
+    archive = tmp_path / 'avatars.zip'
+    with zipfile.ZipFile(archive, 'w') as z:
+        z.writestr('avatars/hello.gif', b'from zip')
+    store = AssetStore()
+    assert store.load(str(tmp_path), str(archive), prefer_zip=True) == 2
+    assert store.get('hello.gif').data == b'from zip'
+    assert store.get('yes.gif').data == b'dir only'
+    store.load(str(tmp_path))
+    assert store.get('hello.gif').data == b'from dir'
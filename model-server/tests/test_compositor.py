@@ -0,0 +1,53 @@
+import io
+import threading
+
+import pytest
+from PIL import Image
+
+from assets import AssetStore, GifAsset
+from compositor import SequenceCompositor
+
+
+def make_gif(frames=4):
+    images = [Image.new('RGB', (64, 32), (40 * i, 10, 10)) for i in range(frames)]
+    buffer = io.BytesIO()
+    images[0].save(buffer, 'GIF', save_all=True, append_images=images[1:], duration=50, loop=0)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def compositor():
+    store = AssetStore()
+    store.swap({'a.gif': GifAsset('a.gif', make_gif()), 'b.gif': GifAsset('b.gif', make_gif(3))})
+    return SequenceCompositor(store, size=(32, 16))
+
+
+def test_frames_are_released_once_every_jpeg_is_cached(compositor):
+    clip = compositor.clip('a.gif')
+    assert compositor.stats()['bytes'] == 4 * 32 * 16 * 3
+    first = compositor.jpeg(clip, 0)
+    assert clip.frames is not None  # three frames still to encode
+    chunks = list(compositor.stream(['a.gif', 'b.gif'], realtime=False))
+    assert len(chunks) == 7
+    stats = compositor.stats()
+    assert stats['bytes'] == 0 and stats['jpeg_bytes'] > 0
+    assert stats['frames'] == 7 and stats['frames_encoded'] == 7
+    # Cached JPEGs keep being served after the frames are gone
+    assert compositor.jpeg(clip, 0) is first
+
+
+def test_stream_counters_are_exact_under_concurrency(compositor):
+    def run():
+        for _ in range(20):
+            for _ in compositor.stream(['a.gif', 'b.gif'], realtime=False):
+                pass
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = compositor.stats()
+    assert stats['active_streams'] == 0
+    assert stats['streams'] == 160 and stats['frames_sent'] == 160 * 7
+    assert stats['frames_encoded'] == 7
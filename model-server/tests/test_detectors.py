@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from detectors import OnnxDetector, letterbox, nms, postprocess
+
+NAMES = "{0: 'Hello', 1: 'Thanks', 2: 'Yes'}"
+
+
+def make_model(path, batch, size=64):
+    """YOLOv8-shaped graph whose class-0 score for each frame is the frame's mean brightness"""
+    onnx = pytest.importorskip('onnx')
+    pytest.importorskip('onnxruntime')
+    from onnx import TensorProto, helper, numpy_helper
+
+    anchors = 2
+    base = np.zeros((1, 7, anchors), np.float32)
+    base[0, :4, 0] = (size / 2, size / 2, size / 4, size / 4)
+    base[0, :4, 1] = (size / 4, size / 4, size / 8, size / 8)
+    base[0, 6, 1] = 0.3
+    mask = np.zeros((1, 7, anchors), np.float32)
+    mask[0, 4, 0] = 1.0
+    nodes = [
+        helper.make_node('ReduceMean', ['images'], ['mean'], axes=[1, 2, 3], keepdims=1),
+        helper.make_node('Reshape', ['mean', 'shape'], ['mean3']),
+        helper.make_node('Mul', ['mean3', 'mask'], ['score']),
+        helper.make_node('Add', ['base', 'score'], ['output0']),
+    ]
+    graph = helper.make_graph(
+        nodes, 'fixed_batch',
+        [helper.make_tensor_value_info('images', TensorProto.FLOAT, [batch, 3, size, size])],
+        [helper.make_tensor_value_info('output0', TensorProto.FLOAT, None)],
+        [numpy_helper.from_array(base, 'base'), numpy_helper.from_array(mask, 'mask'),
+         numpy_helper.from_array(np.array([-1, 1, 1], np.int64), 'shape')])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 17)])
+    model.ir_version = 8
+    helper.set_model_props(model, {'names': NAMES})
+    onnx.save(model, str(path))
+    return str(path)
+
+
+def frames_with_brightness(values, size=64):
+    return [np.full((size, size, 3), int(v * 255), np.uint8) for v in values]
+
+
+@pytest.mark.parametrize('count', [1, 3, 4, 5, 9])
+def test_static_batch_export_pads_partial_batches(tmp_path, count):
+    detector = OnnxDetector(make_model(tmp_path / 'static4.onnx', batch=4))
+    assert detector.batch_size == 4
+    brightness = np.linspace(0.4, 0.9, count)
+    results = detector.predict(frames_with_brightness(brightness))
+
+    assert len(results) == count
+    for result, value in zip(results, brightness):
+        # Every frame keeps its own output: top box is class 0 scored by that frame's brightness
+        assert result.boxes.cls[0] == 0
+        assert result.boxes.conf[0] == pytest.approx(int(value * 255) / 255, abs=1e-3)
+        assert result.names[0] == 'Hello'
+
+
+def test_dynamic_batch_export_runs_in_one_call(tmp_path):
+    detector = OnnxDetector(make_model(tmp_path / 'dynamic.onnx', batch='batch'))
+    assert detector.batch_size is None
+    results = detector.predict(frames_with_brightness([0.5, 0.6, 0.7]))
+    assert [float(r.boxes.conf[0]) for r in results] == pytest.approx([0.5, 0.6, 0.7], abs=0.01)
+
+
+def test_letterbox_keeps_aspect_and_centres():
+    frame = np.zeros((480, 640, 3), np.uint8)
+    image, gain, (left, top) = letterbox(frame, (640, 640))
+    assert image.shape == (640, 640, 3)
+    assert gain == 1.0
+    assert (left, top) == (0, 80)
+    assert (image[:80] == 114).all() and (image[80:560] == 0).all()
+
+
+def test_letterbox_with_stride_pads_only_to_the_next_multiple():
+    frame = np.zeros((480, 640, 3), np.uint8)
+    image, gain, (left, top) = letterbox(frame, (320, 320), stride=32)
+    # Same input ultralytics builds for a dynamic-shape model: 240 rows padded to 256
+    assert image.shape == (256, 320, 3)
+    assert gain == 0.5
+    assert (left, top) == (0, 8)
+
+
+def test_postprocess_suppresses_overlaps_per_class_only():
+    prediction = np.zeros((6, 3), np.float32)  # 4 + 2 classes, 3 anchors, channels first
+    prediction[:4, 0] = (100, 100, 50, 50)
+    prediction[:4, 1] = (102, 102, 50, 50)
+    prediction[:4, 2] = (100, 100, 50, 50)
+    prediction[4, 0], prediction[4, 1], prediction[5, 2] = 0.9, 0.8, 0.7
+    xyxy, conf, cls = postprocess(prediction, num_classes=2)
+    # Anchor 1 overlaps anchor 0 of the same class; anchor 2 overlaps too but is another class
+    assert conf.tolist() == pytest.approx([0.9, 0.7])
+    assert cls.tolist() == [0, 1]
+    assert xyxy[0].tolist() == pytest.approx([75, 75, 125, 125])
+
+
+def test_nms_orders_by_score():
+    boxes = np.array([[0, 0, 10, 10], [50, 50, 60, 60], [1, 1, 10, 10]], np.float32)
+    scores = np.array([0.5, 0.9, 0.8], np.float32)
+    assert nms(boxes, scores, 0.5).tolist() == [1, 2]
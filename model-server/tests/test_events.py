@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+
+from events import SignEventBus, sign_event_stream
+
+
+def parse(message):
+    fields = dict(line.split(': ', 1) for line in message.strip().splitlines())
+    return fields.get('event'), int(fields['id']), json.loads(fields['data'])
+
+
+def snapshot():
+    return {'current_sign': 'hello'}
+
+
+def test_resume_from_last_event_id_sends_only_missed_events():
+    bus = SignEventBus()
+    for sign in ('a', 'b', 'c'):
+        bus.publish('room', {'sign': sign})
+    bus.publish('other room', {'sign': 'x'})
+    stream = sign_event_stream(bus, 'room', snapshot, last_version=1, heartbeat=0.01)
+    assert next(stream).startswith('retry:')
+    assert [parse(next(stream)) for _ in range(2)] == [
+        ('sign', 2, {'sign': 'b', 'session_id': 'room', 'version': 2}),
+        ('sign', 3, {'sign': 'c', 'session_id': 'room', 'version': 3}),
+    ]
+    assert next(stream) == ': keep-alive\n\n'
+    stream.close()
+    assert bus.subscribers == 0
+
+
+def test_resume_point_lost_from_history_gets_a_snapshot():
+    bus = SignEventBus(history=2)
+    for sign in ('a', 'b', 'c', 'd'):
+        bus.publish('room', {'sign': sign})
+    stream = sign_event_stream(bus, 'room', snapshot, last_version=1, heartbeat=0.01)
+    next(stream)
+    assert parse(next(stream)) == ('snapshot', 4, {'current_sign': 'hello', 'version': 4})
+    # Then it continues live from the snapshot's version
+    bus.publish('room', {'sign': 'e'})
+    assert parse(next(stream))[:2] == ('sign', 5)
+
+
+def test_resume_point_from_before_a_restart_gets_a_snapshot():
+    bus = SignEventBus()
+    bus.publish('room', {'sign': 'a'})
+    stream = sign_event_stream(bus, 'room', snapshot, last_version=99, heartbeat=0.01)
+    next(stream)
+    assert parse(next(stream))[:2] == ('snapshot', 1)
+
+
+def test_busy_session_does_not_push_an_idle_one_out_of_history():
+    bus = SignEventBus(history=2)
+    bus.publish('quiet room', {'sign': 'a'})
+    for _ in range(10):
+        bus.publish('busy room', {'sign': 'b'})
+    assert bus.events_since('quiet room', 0) == ([{'sign': 'a', 'session_id': 'quiet room', 'version': 1}], True)
+    assert bus.events_since('busy room', 1) == ([], False)
+    # The relay's combined history is still bounded as a whole
+    assert bus.events_since(None, 1)[1] is False
+
+
+def test_publish_wakes_only_that_sessions_streams():
+    bus = SignEventBus()
+    results = {}
+
+    def waiter(session_id):
+        results[session_id] = bus.wait(session_id, 0, timeout=2.0)
+
+    threads = [threading.Thread(target=waiter, args=(s,)) for s in ('room', 'other room')]
+    for thread in threads:
+        thread.start()
+    while sum(c.waiters for c in bus._channels.values()) < 2:
+        time.sleep(0.01)
+    other = bus._channels['other room'].cond
+    woken = []
+    notify_all = other.notify_all
+    other.notify_all = lambda: (woken.append(True), notify_all())
+    bus.publish('room', {'sign': 'a'})
+    threads[0].join(1.0)
+    assert results['room'] == ([{'sign': 'a', 'session_id': 'room', 'version': 1}], True)
+    assert 'other room' not in results and not woken
+    bus.publish('other room', {'sign': 'b'})
+    threads[1].join(1.0)
+    assert results['other room'][0][0]['version'] == 2
@@ -0,0 +1,50 @@
+import os
+import time
+
+import pytest
+
+from frame_capture import FrameHub, GifFrameSource
+
+AVATARS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'avatars')
+
+
+def test_missing_camera_backs_off_and_reports_no_camera():
+    probes = []
+    hub = FrameHub(lambda: probes.append(time.monotonic()), reconnect_delay=0.05, max_reconnect_delay=0.2)
+    hub.start()
+    try:
+        time.sleep(1.0)
+        assert hub.state == 'no_camera'
+        gaps = [b - a for a, b in zip(probes, probes[1:])]
+        # 0.05, 0.1, then capped at 0.2 instead of probing every 0.05 s
+        assert gaps[0] < gaps[1] < gaps[2] and max(gaps) < 0.5
+        assert len(probes) < 12
+        assert hub.reconnects == 0 and hub.open_failures == len(probes)
+    finally:
+        hub.stop()
+    assert hub.state == 'stopped'
+
+
+def test_reconnect_skips_the_backoff():
+    probes = []
+    hub = FrameHub(lambda: probes.append(1), reconnect_delay=10.0)
+    hub.start()
+    try:
+        time.sleep(0.05)
+        hub.reconnect()
+        time.sleep(0.05)
+        assert len(probes) == 2
+    finally:
+        hub.stop()
+
+
+def test_gif_source_decodes_on_demand_with_a_bounded_cache():
+    pytest.importorskip('PIL')
+    source = GifFrameSource(AVATARS_DIR, width=64, height=48, realtime=False, cache_frames=4)
+    count = len(source)
+    assert count > 4
+    frames = [source.read()[1] for _ in range(count + 1)]
+    assert len(source._cache) == 4
+    assert frames[0].shape == (48, 64, 3)
+    # Wrapped around to the first frame, decoded again identically
+    assert (frames[-1] == frames[0]).all()
@@ -0,0 +1,81 @@
+import threading
+
+from inference import InferenceEngine
+
+
+class Boxes:
+    def __init__(self, cls, conf):
+        self.cls = cls
+        self.conf = conf
+
+    def __len__(self):
+        return len(self.cls)
+
+
+class Result:
+    def __init__(self, cls, conf):
+        self.boxes = Boxes(cls, conf)
+
+
+class FakeModel:
+    """Detects the class whose index is the frame's value, at 0.9"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, source, stream, verbose):
+        self.batches.append(list(source))
+        return [Result([frame], [0.9]) for frame in source]
+
+
+def test_frames_from_several_streams_share_one_predict_call():
+    model = FakeModel()
+    engine = InferenceEngine(model, ['Hello', 'Thanks', 'Yes'], max_wait=1.0)
+    done = threading.Event()
+    results = {}
+
+    def on_result(state, label, confidence):
+        results[state.stream_id] = (label, confidence)
+        if len(results) == 3:
+            done.set()
+
+    for stream_id in range(3):
+        engine.register_stream(stream_id, on_result)
+        engine.submit(stream_id, stream_id)
+    engine.start()
+    try:
+        assert done.wait(2.0)
+    finally:
+        engine.stop()
+    assert model.batches == [[0, 1, 2]]
+    assert results == {0: ('Hello', 0.9), 1: ('Thanks', 0.9), 2: ('Yes', 0.9)}
+    assert engine.get_stream(1).current_sign == 'thanks'
+    stats = engine.stats()
+    assert stats['batches'] == 1 and stats['avg_batch_size'] == 3.0
+
+
+def test_newer_frame_replaces_one_still_waiting_for_a_batch():
+    model = FakeModel()
+    engine = InferenceEngine(model, ['Hello', 'Thanks'])
+    done = threading.Event()
+    engine.register_stream('room', lambda state, label, confidence: done.set())
+    engine.submit('room', 0)
+    engine.submit('room', 1)
+    assert not engine.submit('unknown room', 0)
+    engine.start()
+    try:
+        assert done.wait(2.0)
+    finally:
+        engine.stop()
+    assert model.batches == [[1]]
+    state = engine.get_stream('room')
+    assert (state.frames_submitted, state.frames_dropped) == (2, 1)
+    assert state.detected_label == 'Thanks'
+
+
+def test_unregistered_stream_drops_its_pending_frame():
+    engine = InferenceEngine(FakeModel(), ['Hello'])
+    engine.register_stream('room')
+    engine.submit('room', 0)
+    engine.unregister_stream('room')
+    assert engine._ready == [] and engine.get_stream('room') is None
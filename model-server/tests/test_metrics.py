@@ -0,0 +1,39 @@
+import json
+
+from metrics import Registry
+
+
+def make_registry(observations, clients):
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0), labelnames=('route',))
+    for route, value in observations:
+        latency.labels(route).observe(value)
+    registry.callback('clients', 'Connected clients', lambda: clients)
+    return registry
+
+
+def parse(text):
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if line and not line.startswith('#'))
+
+
+def test_render_sums_other_process_snapshots():
+    owner = make_registry([('/a', 0.05)], clients=1)
+    worker = make_registry([('/a', 0.5), ('/b', 2.0)], clients=3)
+    # Snapshots travel between processes as JSON
+    samples = parse(owner.render([json.loads(json.dumps(worker.snapshot()))]))
+
+    assert samples['latency_seconds_bucket{route="/a",le="0.1"}'] == '1'
+    assert samples['latency_seconds_bucket{route="/a",le="1.0"}'] == '2'
+    assert samples['latency_seconds_count{route="/a"}'] == '2'
+    assert samples['latency_seconds_count{route="/b"}'] == '1'
+    assert float(samples['latency_seconds_sum{route="/a"}']) == 0.55
+    assert samples['clients'] == '4'
+
+
+def test_failing_metric_is_reported_not_raised():
+    registry = Registry()
+    registry.callback('broken', 'Broken', lambda: 1 / 0)
+    registry.counter('ok_total', 'Fine').inc()
+    text = registry.render()
+    assert '# broken unavailable: division by zero' in text
+    assert 'ok_total 1' in text.splitlines()
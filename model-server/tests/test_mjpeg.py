@@ -0,0 +1,75 @@
+import io
+import time
+
+import numpy as np
+
+from frame_capture import FrameBuffer
+from mjpeg import MjpegBroadcaster, PlaceholderFrames, iter_multipart, multipart_chunk
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_every_viewer_gets_the_same_single_encode():
+    hub = FrameBuffer()
+    broadcaster = MjpegBroadcaster(hub, target_fps=0, size=(64, 48))
+    with broadcaster.subscribe() as first, broadcaster.subscribe() as second:
+        hub.publish(np.zeros((96, 128, 3), dtype=np.uint8))
+        jpeg = first.next_frame(timeout=2.0)
+        assert jpeg.startswith(b'\xff\xd8')
+        assert second.next_frame(timeout=2.0) is jpeg
+        assert broadcaster.frames_encoded == 1
+
+
+def test_slow_viewer_skips_to_the_latest_frame():
+    hub = FrameBuffer()
+    broadcaster = MjpegBroadcaster(hub, target_fps=0, size=(64, 48))
+    with broadcaster.subscribe() as viewer:
+        for value in range(3):
+            hub.publish(np.full((48, 64, 3), value * 100, dtype=np.uint8))
+            wait_until(lambda: broadcaster.frames_encoded == value + 1)
+        viewer.next_frame(timeout=2.0)
+        assert viewer.last_seq == 3 and viewer.frames_sent == 1
+
+
+def test_encoder_stops_when_the_last_viewer_leaves():
+    hub = FrameBuffer()
+    broadcaster = MjpegBroadcaster(hub, target_fps=0, size=(64, 48))
+    viewer = broadcaster.subscribe()
+    thread = broadcaster._thread
+    viewer.close()
+    # The encoder notices within one hub wait
+    thread.join(2.0)
+    assert not thread.is_alive() and broadcaster.subscriber_count == 0
+
+
+def test_multipart_chunks_round_trip():
+    parts = [b'\xff\xd8one', b'\xff\xd8--frame\r\ntwo']
+    stream = io.BytesIO(b''.join(multipart_chunk(part) for part in parts))
+    assert list(iter_multipart(stream)) == parts
+
+
+def test_placeholders_are_rendered_once_and_reused():
+    placeholders = PlaceholderFrames(fps=20.0)
+    jpeg = placeholders.get('no_camera')
+    assert jpeg.startswith(b'\xff\xd8')
+    assert placeholders.get('no_camera') is jpeg
+    assert placeholders.get('disconnected') != jpeg
+    # Unknown names render a blank frame, also cached
+    assert placeholders.get('other') is placeholders.get('other')
+
+
+def test_placeholders_are_paced_at_their_fixed_rate():
+    placeholders = PlaceholderFrames(size=(64, 48), fps=20.0)
+    started = time.monotonic()
+    for _ in range(3):
+        placeholders.wait()
+    assert time.monotonic() - started >= 0.15
+    unpaced = PlaceholderFrames(size=(64, 48), fps=0)
+    started = time.monotonic()
+    unpaced.wait()
+    assert time.monotonic() - started < 0.05
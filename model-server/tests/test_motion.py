@@ -0,0 +1,39 @@
+import numpy as np
+
+from motion import MotionGate, thumbnail
+
+
+def frame(value=0, height=120, width=160):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def test_thumbnail_is_a_small_grayscale_copy():
+    thumb = thumbnail(frame(200, 480, 640), target_width=80)
+    assert thumb.shape == (60, 80)
+    assert np.allclose(thumb, 200.0, atol=0.1)
+
+
+def test_still_scene_is_inferred_at_the_keep_alive_rate():
+    gate = MotionGate(min_rate=1.0, max_rate=10.0)
+    still = frame(80)
+    inferred = [i for i in range(30) if gate.should_infer(still, now=i / 10)]
+    assert inferred == [0, 10, 20]
+    assert gate.stats()['frames_skipped'] == 27
+
+
+def test_motion_is_inferred_at_up_to_max_rate():
+    gate = MotionGate(min_rate=1.0, max_rate=8.0)
+    # Every frame differs from the previous ones, delivered at 32 fps for one second
+    inferred = [i for i in range(32) if gate.should_infer(frame(i % 5 * 50), now=i / 32)]
+    assert inferred == list(range(0, 32, 4)) and gate.motion_frames == 32
+
+
+def test_sensor_noise_is_ignored_but_a_small_moving_hand_is_not():
+    gate = MotionGate(min_rate=1.0, max_rate=10.0, motion_threshold=0.5, pixel_threshold=15.0)
+    gate.should_infer(frame(100), now=0.0)
+    noise = np.random.default_rng(0).integers(90, 111, size=(120, 160, 3)).astype(np.uint8)
+    assert not gate.should_infer(noise, now=0.2)
+    hand = frame(100)
+    hand[:20, :20] = 255  # about 2% of the image
+    assert gate.should_infer(hand, now=0.3)
+    assert gate.last_score > 0.5
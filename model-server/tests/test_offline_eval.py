@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+
+import offline_eval  # noqa: E402
+from offline_eval import iter_frames, probe  # noqa: E402
+
+
+class KeyframeCapture:
+    """Stands in for a backend whose POS_FRAMES seek lands on the previous keyframe"""
+
+    def __init__(self, keyframe_interval=10):
+        self.keyframe_interval = keyframe_interval
+        self.position = 0
+
+    def set(self, prop, value):
+        self.position = value - value % self.keyframe_interval
+        return True
+
+    def get(self, prop):
+        return self.position
+
+    def grab(self):
+        self.position += 1
+        return True
+
+
+def test_seek_grabs_forward_from_the_keyframe():
+    cap = KeyframeCapture()
+    assert offline_eval._seek(cap, 25)
+    assert cap.position == 25
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / 'clip.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 48))
+    for i in range(40):
+        writer.write(np.full((48, 64, 3), i * 6, np.uint8))
+    writer.release()
+    return path
+
+
+def test_chunks_read_the_same_frames_as_one_pass(video):
+    assert probe(video, exact=True)[0] == 40
+    whole = {index: frame for index, frame in iter_frames(video)}
+    chunks = {}
+    for start in range(0, 40, 16):
+        chunks.update(iter_frames(video, start, start + 16))
+    assert sorted(chunks) == list(range(40))
+    assert all((chunks[i] == whole[i]).all() for i in range(40))
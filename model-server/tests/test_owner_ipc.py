@@ -0,0 +1,59 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from flask import Flask, request
+
+from owner_ipc import OWNER_SECRET_HEADER, OwnerClient, is_internal_path, secret_matches
+
+
+@pytest.fixture
+def owner():
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            seen.append((self.path, dict(self.headers)))
+            body = b'{"ok": true}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'127.0.0.1:{server.server_address[1]}', seen
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_sends_the_secret_and_replaces_a_forged_one(owner):
+    address, seen = owner
+    client = OwnerClient(address, timeout=5, secret='s3cret')
+    assert client.call('GET', '/internal/session-snapshot?session_id=a') == {'ok': True}
+
+    app = Flask(__name__)
+
+    @app.route('/api/current-sign')
+    def current_sign():
+        return client.forward(request)
+
+    response = app.test_client().get('/api/current-sign', headers={OWNER_SECRET_HEADER: 'guess'})
+    assert response.status_code == 200
+    assert [headers[OWNER_SECRET_HEADER] for _, headers in seen] == ['s3cret', 's3cret']
+
+
+def test_secret_check():
+    assert secret_matches({OWNER_SECRET_HEADER: 'abc'}, 'abc')
+    assert not secret_matches({OWNER_SECRET_HEADER: 'abd'}, 'abc')
+    assert not secret_matches({}, 'abc')
+    assert not secret_matches({OWNER_SECRET_HEADER: ''}, '')
+
+
+def test_internal_paths():
+    assert is_internal_path('/internal/events') and is_internal_path('/internal')
+    assert not is_internal_path('/internals') and not is_internal_path('/api/internal/x')
@@ -0,0 +1,46 @@
+import pytest
+
+from ratelimit import RateLimiter, parse_rate
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('30/60', (30, 60.0)),
+    ('5/0.5', (5, 0.5)),
+    ('30', (30, 60.0)),
+    (' 10/1 ', (10, 1.0)),
+    ('0', (0, 60.0)),
+    ('', (0, 60.0)),
+    (None, (0, 60.0)),
+])
+def test_parse_rate(value, expected):
+    assert parse_rate(value) == expected
+
+
+def test_parse_rate_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_rate('fast')
+
+
+def test_fixed_window_resets_when_it_ends():
+    now = [100.0]
+    limiter = RateLimiter(limit=2, window=10, clock=lambda: now[0])
+    assert limiter.allow('k') and limiter.allow('k')
+    assert not limiter.allow('k')
+    assert limiter.allow('k', scope='other room')
+    now[0] = 106.0
+    # Fixed window: still counted from 100, not sliding from the last event
+    assert not limiter.allow('k')
+    assert limiter.retry_after('k') == pytest.approx(4.0)
+    now[0] = 110.0
+    assert limiter.allow('k') and limiter.retry_after('k') == 0.0
+    stats = limiter.stats()
+    assert (stats['passed'], stats['suppressed'], stats['expired']) == (4, 2, 2)
+
+
+def test_table_stays_bounded():
+    limiter = RateLimiter(limit=1, window=60, max_keys=3, clock=lambda: 0.0)
+    for key in 'abcde':
+        limiter.allow(key)
+    assert len(limiter) == 3 and limiter.evicted == 2
+    # The evicted key starts a fresh window
+    assert limiter.allow('a')
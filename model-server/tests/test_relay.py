@@ -0,0 +1,75 @@
+import io
+import json
+
+from events import SignEventBus, relay_event_stream
+from mjpeg import iter_multipart, multipart_chunk
+from ratelimit import SharedRateLimiter
+
+
+def test_multipart_round_trip_survives_boundary_in_payload():
+    frames = [b'\xff\xd8first\xff\xd9', b'--frame\r\n inside the jpeg', b'']
+    stream = io.BytesIO(b''.join(multipart_chunk(f) for f in frames))
+    assert list(iter_multipart(stream)) == frames
+
+
+def test_truncated_part_is_dropped():
+    data = multipart_chunk(b'whole') + multipart_chunk(b'cut short')[:-6]
+    assert list(iter_multipart(io.BytesIO(data))) == [b'whole']
+
+
+def messages(stream, count):
+    return [json.loads(next(stream)) for _ in range(count)]
+
+
+def test_relay_stream_replays_history_then_resets_when_it_cannot():
+    owner = SignEventBus(history=3)
+    for sign in ('a', 'b'):
+        owner.publish('s1', {'sign': sign})
+    replay = messages(relay_event_stream(owner, since=0, heartbeat=0.01), 2)
+    assert [m['event']['sign'] for m in replay] == ['a', 'b']
+
+    for sign in ('c', 'd', 'e'):
+        owner.publish('s2', {'sign': sign})
+    # Version 1 -> 2 fell out of the history: the mirror must resync
+    assert messages(relay_event_stream(owner, since=1, heartbeat=0.01), 1) == [{'type': 'reset', 'version': 5}]
+    # A mirror ahead of the owner means the owner restarted
+    assert messages(relay_event_stream(owner, since=9, heartbeat=0.01), 1) == [{'type': 'reset', 'version': 5}]
+
+
+def test_mirror_keeps_owner_versions_and_snapshots_after_reset():
+    owner, mirror = SignEventBus(), SignEventBus()
+    for sign in ('a', 'b'):
+        owner.publish('s1', {'sign': sign})
+    events, _ = owner.events_since(None, 0)
+    for event in events + events[:1]:  # the duplicate is ignored
+        mirror.append(event)
+    assert mirror.version == 2
+    assert [e['sign'] for e in mirror.events_since('s1', 1)[0]] == ['b']
+
+    mirror.reset(10)
+    events, complete = mirror.events_since('s1', 2)
+    assert (events, complete) == ([], False)
+    assert mirror.events_since('s1', 10) == ([], True)
+
+
+def test_shared_limiter_counts_across_instances(tmp_path):
+    path = str(tmp_path / 'limits')
+    first = SharedRateLimiter(path, limit=3, window=60)
+    second = SharedRateLimiter(path, limit=3, window=60)
+    assert [first.allow('client'), second.allow('client'), first.allow('client')] == [True] * 3
+    assert not second.allow('client')
+    assert second.allow('client', scope='other')
+    assert 0 < first.retry_after('client') <= 60
+    assert first.stats()['passed'] == 4 and second.stats()['suppressed'] == 1
+
+
+def test_shared_limiter_expires_and_evicts(tmp_path):
+    now = [0.0]
+    limiter = SharedRateLimiter(str(tmp_path / 'limits'), limit=1, window=10, max_keys=4, clock=lambda: now[0])
+    assert limiter.allow('a') and not limiter.allow('a')
+    now[0] = 10.0
+    assert limiter.allow('a')
+    for key in 'bcdef':
+        limiter.allow(key)
+    stats = limiter.stats()
+    assert stats['tracked_keys'] == 4 and stats['evicted'] >= 2 and stats['expired'] == 1
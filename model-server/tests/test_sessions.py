@@ -0,0 +1,34 @@
+import time
+
+from sessions import DEFAULT_SESSION_ID, SessionRegistry, normalize_session_id
+
+
+def test_normalize_session_id():
+    assert normalize_session_id(None) == normalize_session_id('   ') == DEFAULT_SESSION_ID
+    assert normalize_session_id(' room-1 ') == 'room-1'
+    assert len(normalize_session_id('x' * 500)) == 128
+
+
+def test_idle_sessions_are_evicted_but_pinned_ones_stay():
+    registry = SessionRegistry(idle_timeout=60, pinned=(DEFAULT_SESSION_ID,))
+    for session_id in (DEFAULT_SESSION_ID, 'idle', 'busy'):
+        registry.get(session_id)
+    for session in registry.sessions():
+        session.last_seen -= 120
+    registry.get('busy')
+    assert registry.evict_idle() == 1
+    assert 'idle' not in registry and 'busy' in registry and DEFAULT_SESSION_ID in registry
+    assert registry.stats()['sessions_evicted'] == 1
+
+
+def test_full_registry_drops_the_least_recently_used_session():
+    registry = SessionRegistry(idle_timeout=3600, max_sessions=3, pinned=(DEFAULT_SESSION_ID,))
+    registry.get(DEFAULT_SESSION_ID)
+    registry.get('a')
+    time.sleep(0.001)
+    registry.get('b')
+    time.sleep(0.001)
+    registry.get('a')  # 'b' is now the least recently used
+    registry.get('c')
+    assert sorted(s.session_id for s in registry.sessions()) == ['a', 'c', DEFAULT_SESSION_ID]
+    assert registry.get('b', create=False) is None
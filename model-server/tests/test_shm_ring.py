@@ -0,0 +1,100 @@
+import time
+
+import numpy as np
+import pytest
+
+from frame_capture import FrameHub
+from shm_ring import FrameRing
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing(shape=(4, 6, 3), slots=3, create=True)
+    yield ring
+    ring.close()
+
+
+def test_reader_takes_the_shape_from_the_ring(ring):
+    reader = FrameRing(ring.name)
+    try:
+        assert reader.shape == (4, 6, 3) and reader.dtype == np.uint8
+        ring.write(np.full((4, 6, 3), 7, np.uint8))
+        seq, frame, _ = reader.latest()
+        assert seq == 1 and (frame == 7).all()
+    finally:
+        reader.close()
+    with pytest.raises(ValueError):
+        FrameRing(ring.name, shape=(480, 640, 3))
+
+
+class StaticSource:
+    def __init__(self, shapes):
+        self.shapes = list(shapes)
+
+    def read(self):
+        shape = self.shapes.pop(0) if len(self.shapes) > 1 else self.shapes[0]
+        time.sleep(0.005)
+        return True, np.zeros(shape, np.uint8)
+
+    def release(self):
+        pass
+
+
+def test_hub_sizes_the_ring_from_the_first_frame(capsys):
+    created = []
+
+    def factory(frame):
+        created.append(FrameRing(shape=frame.shape, slots=2, create=True))
+        return created[-1]
+
+    source = StaticSource([(72, 96, 3), (72, 96, 3), (48, 64, 3)])
+    hub = FrameHub(lambda: source, ring_factory=factory)
+    hub.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while (hub.ring is None or hub.ring.frames_rejected < 3) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        hub.stop()
+    try:
+        assert len(created) == 1 and hub.ring.shape == (72, 96, 3)
+        assert hub.ring.frames_written == 2 and hub.ring.frames_rejected >= 3
+        assert capsys.readouterr().out.count('Frame ring holds') == 1
+    finally:
+        hub.ring.close()
+
+
+def test_reader_never_sees_a_slot_while_it_is_written(ring):
+    reader = FrameRing(ring.name)
+    try:
+        ring.write(np.full((4, 6, 3), 1, np.uint8))
+        seq, frame, _ = reader.latest()
+        assert seq == 1 and reader.valid(1)
+        # Simulate the writer mid-copy on the slot the next frame goes to
+        lock = ring._locks[2 % ring.slots]
+        lock[0] += 1
+        ring._header[0] = 2
+        assert not reader.valid(2)
+        lock[0] += 1
+        ring._seqs[2 % ring.slots][0] = 2
+        assert reader.valid(2)
+    finally:
+        reader.close()
+
+
+def test_views_are_invalidated_when_the_writer_laps_them(ring):
+    reader = FrameRing(ring.name)
+    try:
+        ring.write(np.full((4, 6, 3), 1, np.uint8))
+        seq, view, _ = reader.latest()
+        assert not view.flags.writeable
+        ring.write(np.full((4, 6, 3), 2, np.uint8))
+        ring.write(np.full((4, 6, 3), 3, np.uint8))
+        # Three slots: the view outlives slots - 1 newer frames
+        assert reader.valid(seq) and (view == 1).all()
+        ring.write(np.full((4, 6, 3), 4, np.uint8))
+        assert not reader.valid(seq)
+        seq, copy, _ = reader.read_copy()
+        assert seq == 4 and (copy == 4).all()
+    finally:
+        reader.close()
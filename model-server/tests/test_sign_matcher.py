@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from sign_matcher import NO_MATCH, SEMANTIC_KEYWORDS, SIGN_MAPPING, MatchCache, PhraseMatcher, map_texts
+
+
+def legacy_match(text, mapping, semantic_keywords):
+    """The original multi-pass text_to_sign_mapping, over any vocabulary"""
+    if not text:
+        return NO_MATCH
+    text = text.lower().strip()
+    if text in mapping:
+        return mapping[text]
+    for word in text.split():
+        if word in mapping:
+            return mapping[word]
+    for gif, words in semantic_keywords:
+        if any(w in text for w in words):
+            return gif
+    return NO_MATCH
+
+
+# Overlapping prefixes and multi-word phrases, where a one-pass scan is easiest to get wrong
+SMALL_MAPPING = {'no': 'no.gif', 'nope': 'nope.gif', 'not now': 'later.gif', 'thank you': 'thanks.gif',
+                 'he': 'he.gif', 'hello': 'hello.gif'}
+SMALL_SEMANTIC = [('help.gif', ['help', 'elp']), ('no.gif', ['no', 'on']), ('hello.gif', ['hell', 'lo'])]
+
+
+def fuzz_corpus(mapping, semantic_keywords, count, seed):
+    rng = random.Random(seed)
+    tokens = list(mapping) + [w for _, words in semantic_keywords for w in words]
+    tokens += [t[:len(t) // 2] for t in tokens] + ['x', 'the', 'a', '!', ',', '-', '42']
+    separators = [' ', ' ', '', '  ', '\t', ', ', '.']
+    corpus = []
+    for _ in range(count):
+        parts = [rng.choice(tokens) for _ in range(rng.randint(0, 6))]
+        text = ''.join(part + rng.choice(separators) for part in parts)
+        if rng.random() < 0.2:
+            text = text.upper()
+        if rng.random() < 0.2:
+            text = '  ' + text + ' '
+        corpus.append(text)
+    return corpus
+
+
+@pytest.mark.parametrize('mapping, semantic_keywords', [(SIGN_MAPPING, SEMANTIC_KEYWORDS),
+                                                        (SMALL_MAPPING, SMALL_SEMANTIC)])
+def test_match_equals_the_legacy_mapper(mapping, semantic_keywords):
+    matcher = PhraseMatcher(mapping, semantic_keywords)
+    for text in fuzz_corpus(mapping, semantic_keywords, 3000, seed=len(mapping)) + ['', '   ']:
+        assert matcher.match(text) == legacy_match(text, mapping, semantic_keywords), repr(text)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = MatchCache(PhraseMatcher(SMALL_MAPPING, SMALL_SEMANTIC), maxsize=2)
+    cache.match('no')
+    cache.match('Hello ')
+    assert cache.match(' NO') == 'no.gif'  # hit on the normalized key; 'hello' is now the oldest
+    cache.match('nope')
+    assert cache.stats()['evictions'] == 1
+    cache.match('no')
+    cache.match('hello')
+    stats = cache.stats()
+    assert (stats['size'], stats['hits'], stats['misses'], stats['evictions']) == (2, 2, 4, 2)
+
+
+def test_new_matcher_invalidates_the_cache():
+    cache = MatchCache(PhraseMatcher(SMALL_MAPPING, SMALL_SEMANTIC))
+    assert cache.match('he') == 'he.gif'
+    cache.set_matcher(PhraseMatcher({'he': 'him.gif'}, []))
+    assert cache.match('he') == 'him.gif'
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_sequence_lists_every_sign_in_order():
+    matcher = PhraseMatcher(SMALL_MAPPING, SMALL_SEMANTIC)
+    assert list(matcher.iter_sequence('Nope, thank you. Hello he said')) == [
+        ('nope', 'nope.gif'), ('thank you', 'thanks.gif'), ('hello', 'hello.gif'), ('he', 'he.gif')]
+    # No whole-word phrase: falls back to the single semantic match, or to nothing
+    assert list(matcher.iter_sequence('Yelp ')) == [('yelp', 'help.gif')]
+    assert list(matcher.iter_sequence('xyz')) == []
+    assert list(matcher.iter_sequence('')) == []
+
+
+def test_map_texts_keeps_order_and_matches_repeats_once():
+    matcher = PhraseMatcher(SMALL_MAPPING, SMALL_SEMANTIC)
+    calls = []
+    match = matcher.match
+    matcher.match = lambda text: calls.append(text) or match(text)
+    texts = ['hello', 'not now', 'xyz', 'hello', 'not now']
+    assert map_texts(texts, matcher) == ['hello.gif', 'later.gif', NO_MATCH, 'hello.gif', 'later.gif']
+    assert calls == ['hello', 'not now', 'xyz']
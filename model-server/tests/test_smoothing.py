@@ -0,0 +1,70 @@
+import pytest
+
+from smoothing import TemporalSmoother
+
+
+def test_rejects_a_model_without_classes():
+    with pytest.raises(ValueError):
+        TemporalSmoother(0)
+
+
+def test_time_window_does_not_stretch_when_frames_slow_down():
+    frames = TemporalSmoother(3, window=8)
+    timed = TemporalSmoother(3, window=8, window_seconds=0.8)
+    # Sign 1 held at 10 fps, then the gate drops to 1 fps and sign 2 is shown
+    for i in range(8):
+        frames.update([1], [0.9])
+        timed.update([1], [0.9], i * 0.1)
+    assert frames.committed == timed.committed == 1
+    # One second later the time window only holds sign 2, so sign 1 is released;
+    # the frame window still mostly holds sign 1
+    frames.update([2], [0.9])
+    assert timed.update([2], [0.9], 1.7) is None
+    assert timed.committed is None and frames.committed == 1
+    # A single slow frame is not enough to commit sign 2, but a few quick ones are
+    committed = [timed.update([2], [0.9], 1.7 + i * 0.1) for i in range(1, 5)]
+    assert committed == [None, None, None, 2]
+
+
+def test_single_confident_frame_at_low_fps_does_not_commit():
+    smoother = TemporalSmoother(3, window=8, window_seconds=0.8)
+    smoother.update((), (), 0.0)
+    # At 2 fps the frame spans 0.5 s of the 0.8 s window, but counts for at most 0.1 s
+    assert smoother.update([1], [0.9], 0.5) is None
+    assert smoother.committed is None and smoother.commits == 0
+    assert smoother.scores()[1] == pytest.approx(0.9 * 0.1 / 0.8)
+
+
+def test_time_window_matches_frame_window_at_a_steady_rate():
+    frames = TemporalSmoother(2, window=8)
+    timed = TemporalSmoother(2, window=8, window_seconds=0.8)
+    # A window's worth of empty frames first: the first timed frame has no duration yet
+    pattern = [[]] * 9 + [[0], [0], [], [1], [0], [0], [], [0], [1], [1], [1], [1], [1], [1], [], [1]]
+    for i, classes in enumerate(pattern):
+        confidences = [0.9] * len(classes)
+        assert frames.update(classes, confidences) == timed.update(classes, confidences, 1.0 + i * 0.1)
+        assert timed.scores() == pytest.approx(frames.scores())
+
+
+def test_hysteresis_holds_the_sign_until_it_drops_below_exit():
+    smoother = TemporalSmoother(3, window=4, enter_threshold=0.5, exit_threshold=0.25)
+    committed = [smoother.update([1], [0.8]) for _ in range(4)]
+    # 0.2, 0.4, 0.6: committed once, on the third frame
+    assert committed == [None, None, 1, None] and smoother.commits == 1
+    # A dropout and then a weaker class: 0.6 and then 0.4, between the thresholds, so the sign is held
+    smoother.update((), ())
+    assert smoother.update([2], [0.9]) is None and smoother.committed == 1
+    # Below exit the sign is released, and the same sign can be committed again
+    smoother.update((), ())
+    assert smoother.committed is None
+    assert [smoother.update([1], [0.9]) for _ in range(3)] == [None, None, 1]
+    assert smoother.commits == 2
+
+
+def test_single_flicker_does_not_commit():
+    smoother = TemporalSmoother(3, window=8)
+    for classes in ([0], [0], [2], [0], [], [0], [0], [0]):
+        committed = smoother.update(classes, [0.9] * len(classes))
+        assert committed in (None, 0)
+    assert smoother.committed == 0 and smoother.commits == 1
+    assert smoother.update([0], [0.1]) is None  # below min_confidence: counts as a miss
@@ -0,0 +1,76 @@
+import sys
+import time
+
+from speech import ACK, SpeechDispatcher
+
+
+def worker(delay=0.0, ack=True):
+    """A worker that takes delay seconds per line and (optionally) acknowledges it like speak_worker.py"""
+    script = ('import sys, time\n'
+              'for line in sys.stdin:\n'
+              f'    time.sleep({delay})\n'
+              f'    {"print(ACK, flush=True)" if ack else "pass"}\n')
+    return [sys.executable, '-c', script.replace('ACK', repr(ACK))]
+
+
+WORKER = worker()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_failed_first_start_is_retried_with_backoff():
+    dispatcher = SpeechDispatcher(['/nonexistent/speak-worker'], restart_delay=0.05, max_restart_delay=0.1)
+    dispatcher.start()  # does not raise
+    try:
+        assert not dispatcher.alive
+        assert wait_for(lambda: dispatcher.restarts >= 2)
+        # The worker becomes startable (e.g. a dependency got installed): speech recovers by itself
+        dispatcher.command = WORKER
+        assert wait_for(lambda: dispatcher.alive)
+        dispatcher.say('hello')
+        assert wait_for(lambda: dispatcher.spoken == 1)
+    finally:
+        dispatcher.stop()
+
+
+def test_queue_drops_the_oldest_utterance():
+    dispatcher = SpeechDispatcher(WORKER, max_queue=2)
+    assert dispatcher.say('a') and dispatcher.say('b')
+    assert not dispatcher.say('c')
+    assert list(dispatcher._queue) == ['b', 'c'] and dispatcher.dropped == 1
+
+
+def test_one_line_in_flight_keeps_the_backlog_in_the_bounded_queue():
+    dispatcher = SpeechDispatcher(worker(delay=0.3), max_queue=2)
+    dispatcher.start()
+    try:
+        assert wait_for(lambda: dispatcher.alive)
+        dispatcher.say('utterance 0')
+        assert wait_for(lambda: not dispatcher._queue)  # taken by the feeder, now being spoken
+        for i in range(1, 10):
+            dispatcher.say(f'utterance {i}')
+        # The pipe does not swallow the backlog: all but the line in flight and two queued are dropped
+        assert wait_for(lambda: dispatcher.spoken == 3)
+        time.sleep(0.4)
+        assert dispatcher.spoken == 3 and dispatcher.dropped == 7
+    finally:
+        dispatcher.stop()
+
+
+def test_worker_that_never_finishes_is_restarted():
+    dispatcher = SpeechDispatcher(worker(ack=False), speak_timeout=0.2, restart_delay=0.05)
+    dispatcher.start()
+    try:
+        dispatcher.say('hello')
+        assert wait_for(lambda: dispatcher.failed == 1)
+        dispatcher.command = WORKER
+        dispatcher.say('again')
+        assert wait_for(lambda: dispatcher.spoken == 1)
+        assert dispatcher.restarts >= 1
+    finally:
+        dispatcher.stop()
@@ -0,0 +1,77 @@
+import json
+import sys
+import threading
+
+from startup import DISABLED, FAILED, PENDING, READY, LazyComponent, StartupProfiler
+
+
+def test_loads_once_in_the_background():
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(threading.current_thread().name)
+        release.wait(2.0)
+        return 'model'
+
+    component = LazyComponent('detector', loader)
+    assert component.state == PENDING and component.get() is None
+    component.start()
+    component.start()
+    # Still loading: callers get None instead of blocking
+    assert component.get() is None
+    release.set()
+    assert component.wait(2.0) == 'model'
+    assert component.ready and calls == ['load-detector']
+    assert component.to_dict()['state'] == READY
+
+
+def test_blocking_start_loads_on_the_calling_thread():
+    calls = []
+    component = LazyComponent('camera', lambda: calls.append(threading.current_thread().name) or 'camera')
+    component.start(block=True)
+    assert component.get() == 'camera' and calls == [threading.current_thread().name]
+
+
+def test_failure_and_missing_value_are_reported():
+    def loader():
+        raise OSError('no weights')
+
+    broken = LazyComponent('detector', loader)
+    assert broken.wait(2.0) is None
+    assert broken.to_dict()['state'] == FAILED and broken.error == 'no weights'
+    missing = LazyComponent('speech', lambda: None)
+    assert missing.wait(2.0) is None and missing.error == 'not available'
+
+
+def test_disabled_component_never_loads():
+    calls = []
+    component = LazyComponent('speech', lambda: calls.append(1), enabled=False)
+    assert component.wait(0.1) is None
+    assert component.state == DISABLED and calls == []
+
+
+def test_profiler_records_phases_marks_and_imports(tmp_path, monkeypatch):
+    monkeypatch.delitem(sys.modules, 'colorsys', raising=False)
+    path = tmp_path / 'startup.json'
+    profiler = StartupProfiler(str(path))
+    with profiler.phase('model_load'):
+        pass
+    profiler.mark('first_request')
+    first = profiler.marks['first_request']
+    profiler.mark('first_request')
+    assert profiler.marks['first_request'] == first
+    assert profiler.time_import('colorsys') is not None
+    assert profiler.time_import('no_such_module_here') is None
+    profiler.write(mode='test')
+    report = json.loads(path.read_text())
+    assert set(report['phases']) >= {'model_load', 'import:colorsys'}
+    assert 'import:no_such_module_here' not in report['phases']
+    assert report['marks'] == {'first_request': round(first, 4)} and report['mode'] == 'test'
+
+
+def test_profiler_without_a_path_writes_nothing(capsys):
+    profiler = StartupProfiler(None)
+    assert not profiler.enabled
+    assert profiler.write()['phases'] == {}
+    assert capsys.readouterr().out == ''
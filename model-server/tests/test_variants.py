@@ -0,0 +1,71 @@
+import io
+
+import pytest
+from PIL import Image
+
+from assets import GifAsset
+from variants import VariantCache, accepts, parse_accept
+
+
+def make_gif(color, size=(96, 48), frames=3):
+    images = [Image.new('RGB', size, tuple(min(255, c + 40 * i) for c in color)) for i in range(frames)]
+    buffer = io.BytesIO()
+    images[0].save(buffer, 'GIF', save_all=True, append_images=images[1:], duration=100, loop=0)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return VariantCache(str(tmp_path / 'cache'), formats=('webp',), widths=(64,))
+
+
+def test_parse_accept_drops_q0_and_keeps_best_q():
+    accepted = parse_accept('image/webp;q=0, image/gif;q=0.5, image/gif, */*;q=0.1')
+    assert accepted == {'image/gif': 1.0, '*/*': 0.1}
+
+
+@pytest.mark.parametrize('header, fmt, expected', [
+    ('image/avif,image/webp,*/*;q=0.8', 'webp', True),
+    ('image/*,*/*;q=0.8', 'webp', False),
+    ('*/*', 'webm', False),
+    ('video/*', 'webm', True),
+    ('video/*', 'webp', False),
+])
+def test_wildcards_never_select_variants(header, fmt, expected):
+    assert accepts(parse_accept(header), fmt) is expected
+
+
+def test_select_negotiates_format_and_size(cache):
+    asset = GifAsset('hello.gif', make_gif((10, 20, 30)))
+    assert cache.build([asset]) == 3  # webp at full width, webp and gif at 64px
+    assert cache.covers(asset)
+
+    assert cache.select(asset, '*/*') is asset
+    webp = cache.select(asset, 'image/webp,*/*')
+    assert webp.content_type == 'image/webp'
+    small = cache.select(asset, 'image/gif', size=50)
+    assert small.content_type == 'image/gif' and Image.open(io.BytesIO(small.data)).width == 64
+    assert cache.select(asset, '*/*', size=90) is asset  # no configured width between 90 and 96
+    assert cache.select(asset, None, fmt='webp').content_type == 'image/webp'
+
+
+def test_lookups_follow_content_not_name(cache):
+    old = GifAsset('hello.gif', make_gif((10, 20, 30)))
+    cache.build([old])
+    replaced = GifAsset('hello.gif', make_gif((200, 10, 10)))
+    # Same name, new bytes: the old variants must not be served for it
+    assert not cache.covers(replaced)
+    assert cache.select(replaced, 'image/webp') is replaced
+
+    cache.build([replaced])
+    assert cache.covers(replaced) and not cache.covers(old)
+    assert cache.select(replaced, 'image/webp').content_type == 'image/webp'
+
+
+def test_cache_dir_is_reused(tmp_path):
+    asset = GifAsset('hello.gif', make_gif((10, 20, 30)))
+    first = VariantCache(str(tmp_path), formats=('webp',), widths=())
+    first.build([asset])
+    second = VariantCache(str(tmp_path), formats=('webp',), widths=())
+    second.build([asset])
+    assert (first.transcoded, second.transcoded, second.reused) == (1, 0, 1)
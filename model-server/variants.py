@@ -0,0 +1,324 @@
+"""
+Smaller encodings of the avatar GIFs, chosen per request.
+
+Every avatar is transcoded once into animated WebP, WebM (VP9), MP4
+(H.264, if this OpenCV build can encode it) and optionally APNG, at its
+original width and at each configured smaller width, plus downscaled GIFs
+for clients that only take GIF. Encoded files are kept in a
+content-addressed cache directory: the file name is a hash of the source
+GIF's bytes and the encoding settings. Restarts and other processes reuse
+the files, and an edited GIF simply gets new entries.
+
+select() picks the smallest variant the client accepts at the requested
+size. Clients that accept nothing better keep getting the original GIF.
+
+Pre-build the cache (e.g. during the Docker build):
+    python variants.py [--formats webp,webm,mp4] [--widths 320,160]
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+try:
+    from PIL import Image, ImageSequence
+except ImportError:
+    Image = None
+    ImageSequence = None
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+from assets import AssetStore, GifAsset
+
+# Bump when encoder settings change so old cache entries are not reused
+TRANSCODER_VERSION = 1
+
+CONTENT_TYPES = {
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+    'apng': 'image/apng',
+    'webm': 'video/webm',
+    'mp4': 'video/mp4',
+}
+VIDEO_FORMATS = ('webm', 'mp4')
+# fourcc per video container; mp4 needs H.264, MPEG-4 part 2 does not play in browsers
+VIDEO_FOURCC = {'webm': 'VP90', 'mp4': 'avc1'}
+
+
+def parse_accept(header):
+    """Accept header -> {media type: q}, dropping q=0 entries"""
+    accepted = {}
+    for part in (header or '').split(','):
+        fields = part.strip().split(';')
+        media = fields[0].strip().lower()
+        if not media:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted[media] = max(q, accepted.get(media, 0.0))
+    return accepted
+
+
+def accepts(accepted, fmt):
+    """True if the client names this format.
+
+    Wildcards are not enough: browsers without WebP still send image/* and
+    */*, and <img> requests send */* but cannot play video. Only <video>
+    elements' video/* counts, for the video formats.
+    """
+    content_type = CONTENT_TYPES[fmt]
+    return content_type in accepted or (fmt in VIDEO_FORMATS and 'video/*' in accepted)
+
+
+def decode_gif(data):
+    """GIF bytes -> (list of RGBA PIL frames, list of durations in ms)"""
+    frames = []
+    durations = []
+    with Image.open(io.BytesIO(data)) as gif:
+        for frame in ImageSequence.Iterator(gif):
+            frames.append(frame.convert('RGBA'))
+            durations.append(max(20, int(frame.info.get('duration', 100) or 100)))
+    return frames, durations
+
+
+def resize_frames(frames, width):
+    if width is None or width >= frames[0].width:
+        return frames
+    height = max(1, round(frames[0].height * width / frames[0].width))
+    return [frame.resize((width, height), Image.LANCZOS) for frame in frames]
+
+
+def encode_image(frames, durations, fmt, quality=80):
+    buffer = io.BytesIO()
+    options = {'save_all': True, 'append_images': frames[1:], 'duration': durations, 'loop': 0}
+    if fmt == 'webp':
+        frames[0].save(buffer, 'WEBP', quality=quality, method=4, **options)
+    elif fmt == 'apng':
+        frames[0].save(buffer, 'PNG', **options)
+    else:
+        # Quantize each frame to a palette again after resizing
+        paletted = [frame.convert('RGB').quantize(256) for frame in frames]
+        options['append_images'] = paletted[1:]
+        paletted[0].save(buffer, 'GIF', optimize=True, disposal=2, **options)
+    return buffer.getvalue()
+
+
+def encode_video(frames, durations, fmt):
+    """Constant-rate video; frames are repeated to keep the GIF's timing. None if unsupported."""
+    if cv2 is None:
+        return None
+    fps = min(30.0, max(5.0, 1000.0 / float(np.median(durations))))
+    # Codecs need even dimensions
+    width = frames[0].width - frames[0].width % 2
+    height = frames[0].height - frames[0].height % 2
+    fd, path = tempfile.mkstemp(suffix=f'.{fmt}')
+    os.close(fd)
+    try:
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*VIDEO_FOURCC[fmt]), fps, (width, height))
+        if not writer.isOpened():
+            return None
+        elapsed = 0.0
+        written = 0
+        for frame, duration in zip(frames, durations):
+            # Flatten transparency onto white, as browsers show the GIF on the default page
+            background = Image.new('RGBA', frame.size, (255, 255, 255, 255))
+            rgb = np.asarray(Image.alpha_composite(background, frame).convert('RGB'))[:height, :width]
+            bgr = np.ascontiguousarray(rgb[:, :, ::-1])
+            elapsed += duration / 1000.0
+            while written < max(1, round(elapsed * fps)):
+                writer.write(bgr)
+                written += 1
+        writer.release()
+        with open(path, 'rb') as f:
+            data = f.read()
+        return data or None
+    finally:
+        os.remove(path)
+
+
+def transcode(data, fmt, width=None, quality=80):
+    """Encode one GIF as fmt at width (None = original); returns bytes or None if unsupported"""
+    frames, durations = decode_gif(data)
+    frames = resize_frames(frames, width)
+    if fmt in VIDEO_FORMATS:
+        return encode_video(frames, durations, fmt)
+    return encode_image(frames, durations, fmt, quality)
+
+
+def gif_width(data):
+    with Image.open(io.BytesIO(data)) as gif:
+        return gif.width
+
+
+class VariantCache:
+    """Transcoded avatar variants, on disk and in memory by the source GIF's content hash.
+
+    Lookups go by the source ETag rather than the file name, so a replaced
+    GIF never gets its predecessor's variants: it is served as-is until
+    build() has run for the new bytes.
+    """
+
+    def __init__(self, cache_dir, formats=('webp', 'webm', 'mp4'), widths=(320, 160), quality=80):
+        self.cache_dir = cache_dir
+        self.formats = tuple(f for f in formats if f in CONTENT_TYPES and f != 'gif')
+        self.widths = tuple(sorted({int(w) for w in widths if int(w) > 0}, reverse=True))
+        self.quality = quality
+        self._variants = {}
+        self._widths = {}
+        self._lock = threading.Lock()
+        self.transcoded = 0
+        self.reused = 0
+        self.unsupported = set()
+        self.build_seconds = None
+
+    def key(self, asset, fmt, width):
+        spec = f'{asset.etag}:{fmt}:{width}:{self.quality}:{TRANSCODER_VERSION}'
+        return hashlib.sha256(spec.encode()).hexdigest()[:40]
+
+    def _variant(self, asset, fmt, width):
+        """Load a variant from the cache directory, transcoding it first if missing"""
+        path = os.path.join(self.cache_dir, f'{self.key(asset, fmt, width)}.{fmt}')
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            self.reused += 1
+        else:
+            data = transcode(asset.data, fmt, width, self.quality)
+            if not data:
+                self.unsupported.add(fmt)
+                return None
+            # Write then rename, so other processes never read a partial file
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self.transcoded += 1
+        return GifAsset(asset.name, data, asset.last_modified, content_type=CONTENT_TYPES[fmt], source=path)
+
+    def build(self, assets):
+        """Make sure every variant of every asset exists; returns the number of variants held"""
+        with self._lock:
+            return self._build(list(assets))
+
+    def _build(self, assets):
+        started = time.perf_counter()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        variants = {}
+        widths = {}
+        for asset in assets:
+            try:
+                original_width = gif_width(asset.data)
+            except Exception as e:
+                print(f"[Variant Error] {asset.name}: {e}")
+                continue
+            widths[asset.etag] = original_width
+            sizes = [None] + [w for w in self.widths if w < original_width]
+            for width in sizes:
+                formats = self.formats if width is None else self.formats + ('gif',)
+                for fmt in formats:
+                    if fmt in self.unsupported:
+                        continue
+                    try:
+                        variant = self._variant(asset, fmt, width)
+                    except Exception as e:
+                        print(f"[Variant Error] {asset.name} -> {fmt}@{width or 'full'}: {e}")
+                        continue
+                    if variant is not None:
+                        variants[(asset.etag, fmt, width)] = variant
+        # Swap both maps in at once; select() reads whichever pair it finds
+        self._variants, self._widths = variants, widths
+        self.build_seconds = time.perf_counter() - started
+        return len(variants)
+
+    def covers(self, asset):
+        """True once the variants of exactly this content have been built"""
+        return asset.etag in self._widths
+
+    def select(self, asset, accept=None, size=None, fmt=None):
+        """Smallest variant of asset the client accepts at the requested width (or asset itself)"""
+        variants, original_widths = self._variants, self._widths
+        key = asset.etag
+        original_width = original_widths.get(key)
+        width = None
+        if size and original_width and size < original_width:
+            # Smallest configured width that is still at least as wide as asked
+            fitting = [w for w in self.widths if size <= w < original_width]
+            width = min(fitting) if fitting else None
+        candidates = []
+        if width is None:
+            candidates.append(asset)
+        elif (key, 'gif', width) in variants:
+            candidates.append(variants[(key, 'gif', width)])
+        else:
+            candidates.append(asset)
+
+        if fmt:
+            forced = variants.get((key, fmt, width))
+            return forced if forced is not None else candidates[0]
+
+        accepted = parse_accept(accept)
+        for name in self.formats:
+            variant = variants.get((key, name, width))
+            if variant is not None and accepts(accepted, name):
+                candidates.append(variant)
+        return min(candidates, key=lambda candidate: candidate.size)
+
+    def stats(self):
+        variants = self._variants
+        return {
+            'variants': len(variants),
+            'formats': list(self.formats),
+            'widths': list(self.widths),
+            'bytes': sum(v.size for v in variants.values()),
+            'transcoded': self.transcoded,
+            'reused': self.reused,
+            'unsupported': sorted(self.unsupported),
+            'build_seconds': round(self.build_seconds, 2) if self.build_seconds is not None else None,
+            'cache_dir': self.cache_dir,
+        }
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--avatars', default=os.path.join(here, 'avatars'))
+    parser.add_argument('--cache-dir', default=os.getenv('AVATAR_VARIANT_CACHE', os.path.join(here, '.avatar-cache')))
+    parser.add_argument('--formats', default=os.getenv('AVATAR_VARIANTS', 'webp,webm,mp4'))
+    parser.add_argument('--widths', default=os.getenv('AVATAR_VARIANT_WIDTHS', '320,160'))
+    parser.add_argument('--quality', type=int, default=int(os.getenv('AVATAR_VARIANT_QUALITY', 80)))
+    args = parser.parse_args()
+
+    store = AssetStore()
+    store.load(args.avatars)
+    cache = VariantCache(args.cache_dir, [f.strip() for f in args.formats.split(',') if f.strip()],
+                         [w for w in args.widths.split(',') if w.strip()], args.quality)
+    count = cache.build(store.get(name) for name in store.names())
+    stats = cache.stats()
+    print(f"✅ {count} variants of {len(store)} GIFs in {stats['build_seconds']}s "
+          f"({stats['transcoded']} transcoded, {stats['reused']} reused) -> {args.cache_dir}")
+    if stats['unsupported']:
+        print(f"⚠️ No encoder for: {', '.join(stats['unsupported'])}")
+    for name in store.names():
+        original = store.get(name)
+        best = cache.select(original, 'image/webp,video/webm,video/mp4')
+        print(f"   {name:<18} {original.size // 1024:>5} KB -> {best.size // 1024:>5} KB {best.content_type}")
+
+
+if __name__ == '__main__':
+    main()